@@ -0,0 +1,53 @@
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy import create_engine
+from app.core.config import get_settings
+from app.core.database import Base
+import app.models  # noqa: F401  Registers all tables on Base.metadata
+
+config = context.config
+
+# app.core.migrations passes its own connection and keeps the app's logging setup
+connection = config.attributes.get("connection")
+if config.config_file_name is not None and connection is None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def _configure(**kwargs):
+    context.configure(
+        target_metadata=target_metadata,
+        render_as_batch=True,  # SQLite can only alter tables by copying them
+        compare_type=True,
+        # A failed migration doesn't roll back the ones before it, and long ones don't hold every lock to the end
+        transaction_per_migration=True,
+        **kwargs,
+    )
+
+
+def run_migrations_offline():
+    _configure(url=get_settings().database_url, literal_binds=True, dialect_opts={"paramstyle": "named"})
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    if connection is not None:
+        _configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
+    engine = create_engine(get_settings().database_url)
+    with engine.connect() as own_connection:
+        _configure(connection=own_connection)
+        with context.begin_transaction():
+            context.run_migrations()
+    engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
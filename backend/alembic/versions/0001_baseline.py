@@ -0,0 +1,155 @@
+"""Baseline schema, as created by create_all before migrations were introduced
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("password_hash", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("is_global_admin", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "gardens",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("width_meters", sa.Integer(), nullable=False),
+        sa.Column("height_meters", sa.Integer(), nullable=False),
+        sa.Column("preview_image", sa.String()),
+        sa.Column("created_by", UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    op.create_table(
+        "garden_members",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("garden_id", UUID(as_uuid=True), sa.ForeignKey("gardens.id"), nullable=False),
+        sa.Column("user_id", UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("role", sa.Enum("ADMIN", "EDITOR", "VIEWER", name="memberrole")),
+        sa.Column("invited_at", sa.DateTime()),
+        sa.Column("accepted_at", sa.DateTime()),
+    )
+    op.create_table(
+        "beds",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("garden_id", UUID(as_uuid=True), sa.ForeignKey("gardens.id"), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("width_cells", sa.Integer(), nullable=False),
+        sa.Column("height_cells", sa.Integer(), nullable=False),
+        sa.Column("position_x", sa.Integer(), nullable=False),
+        sa.Column("position_y", sa.Integer(), nullable=False),
+    )
+    op.create_table(
+        "zones",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("bed_id", UUID(as_uuid=True), sa.ForeignKey("beds.id"), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("cells", sa.JSON()),
+        sa.Column("color", sa.String()),
+    )
+    op.create_table(
+        "crops",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("icon", sa.String()),
+        sa.Column("cells_width", sa.Integer(), nullable=False),
+        sa.Column("cells_height", sa.Integer(), nullable=False),
+        sa.Column("per_cell", sa.Integer(), nullable=False),
+        sa.Column("spacing_cm", sa.Integer(), nullable=False),
+        sa.Column("row_spacing_cm", sa.Integer(), nullable=False),
+        sa.Column("care_schedule", sa.JSON()),
+        sa.Column("plant_month_start", sa.Integer()),
+        sa.Column("plant_month_end", sa.Integer()),
+        sa.Column("care_month_start", sa.Integer()),
+        sa.Column("care_month_end", sa.Integer()),
+        sa.Column("harvest_month_start", sa.Integer()),
+        sa.Column("harvest_month_end", sa.Integer()),
+        sa.Column("created_by", UUID(as_uuid=True), sa.ForeignKey("users.id")),
+        sa.Column("is_public", sa.Boolean()),
+        sa.Column("is_approved", sa.Boolean()),
+    )
+    op.create_table(
+        "crop_placements",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("bed_id", UUID(as_uuid=True), sa.ForeignKey("beds.id"), nullable=False),
+        sa.Column("crop_id", UUID(as_uuid=True), sa.ForeignKey("crops.id"), nullable=False),
+        sa.Column("zone_id", UUID(as_uuid=True), sa.ForeignKey("zones.id")),
+        sa.Column("position_x", sa.Integer(), nullable=False),
+        sa.Column("position_y", sa.Integer(), nullable=False),
+        sa.Column("width_cells", sa.Integer(), nullable=False),
+        sa.Column("height_cells", sa.Integer(), nullable=False),
+        sa.Column("custom_spacing_cm", sa.Integer()),
+        sa.Column("custom_row_spacing_cm", sa.Integer()),
+        sa.Column("planted_date", sa.Date()),
+        sa.Column("status", sa.Enum("PLANNED", "PLANTED", "GROWING", "HARVESTED", name="cropstatus")),
+    )
+    op.create_table(
+        "hubs",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("name", sa.String()),
+        sa.Column("ip_address", sa.String()),
+        sa.Column("status", sa.Enum("PENDING", "APPROVED", "IGNORED", "BLOCKED", name="hubstatus"), nullable=False),
+        sa.Column("last_seen", sa.DateTime()),
+        sa.Column("user_email", sa.String()),
+        sa.Column("access_token", sa.String()),
+    )
+    op.create_table(
+        "zigbee_devices",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("hub_id", UUID(as_uuid=True), sa.ForeignKey("hubs.id"), nullable=False),
+        sa.Column("zone_id", UUID(as_uuid=True), sa.ForeignKey("zones.id")),
+        sa.Column("ieee_address", sa.String(), nullable=False, unique=True),
+        sa.Column("friendly_name", sa.String()),
+        sa.Column("model", sa.String()),
+        sa.Column("vendor", sa.String()),
+        sa.Column("description", sa.String()),
+        sa.Column("exposes", sa.JSON()),
+        sa.Column("is_online", sa.Boolean()),
+        sa.Column("is_tracked", sa.Boolean()),
+        sa.Column("state", sa.JSON()),
+        sa.Column("last_seen", sa.DateTime()),
+    )
+    op.create_table(
+        "device_state_history",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("device_id", UUID(as_uuid=True), sa.ForeignKey("zigbee_devices.id"), nullable=False),
+        sa.Column("timestamp", sa.DateTime()),
+        sa.Column("state", sa.JSON(), nullable=False),
+    )
+    op.create_table(
+        "automations",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("hub_id", UUID(as_uuid=True), sa.ForeignKey("hubs.id"), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.String()),
+        sa.Column("triggers", sa.JSON(), nullable=False),
+        sa.Column("conditions", sa.JSON()),
+        sa.Column("actions", sa.JSON(), nullable=False),
+        sa.Column("enabled", sa.Boolean()),
+    )
+
+
+def downgrade():
+    for table in (
+        "automations", "device_state_history", "zigbee_devices", "hubs", "crop_placements",
+        "crops", "zones", "beds", "garden_members", "gardens", "users",
+    ):
+        op.drop_table(table)
+    for enum in ("hubstatus", "cropstatus", "memberrole"):
+        sa.Enum(name=enum).drop(op.get_bind(), checkfirst=True)
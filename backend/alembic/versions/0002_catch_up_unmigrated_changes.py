@@ -0,0 +1,141 @@
+"""Catch up with schema changes made while tables were still created by create_all
+
+Revision tables, blob-backed previews and icons, presence columns and interned
+device definitions were added to the models without migrations, so databases
+stamped at the baseline can be at any point in between. Every step checks
+what is already there.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.core.device_definitions import definition_hash
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def _tables():
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def _columns(table):
+    return {column["name"] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def _add_missing(table, *columns):
+    existing = _columns(table)
+    missing = [column for column in columns if column.name not in existing]
+    if missing:
+        with op.batch_alter_table(table) as batch:
+            for column in missing:
+                batch.add_column(column)
+
+
+def _intern_exposes():
+    """Move exposes stored on each device row into shared definitions."""
+    bind = op.get_bind()
+    devices = sa.table(
+        "zigbee_devices",
+        sa.column("id"), sa.column("vendor"), sa.column("model"), sa.column("exposes", sa.JSON), sa.column("definition_hash"),
+    )
+    definitions = sa.table(
+        "device_model_definitions",
+        sa.column("hash"), sa.column("vendor"), sa.column("model"), sa.column("exposes", sa.JSON),
+    )
+    known = set(bind.scalars(sa.select(definitions.c.hash)))
+    rows = bind.execute(
+        sa.select(devices.c.id, devices.c.vendor, devices.c.model, devices.c.exposes).where(devices.c.definition_hash.is_(None))
+    ).all()
+    for row in rows:
+        exposes = row.exposes or []
+        digest = definition_hash(row.vendor, row.model, exposes)
+        if digest not in known:
+            # Capabilities are indexed by revision 0005
+            bind.execute(definitions.insert().values(hash=digest, vendor=row.vendor, model=row.model, exposes=exposes))
+            known.add(digest)
+        bind.execute(devices.update().where(devices.c.id == row.id).values(definition_hash=digest))
+
+
+def upgrade():
+    tables = _tables()
+    if "revision_counters" not in tables:
+        op.create_table(
+            "revision_counters",
+            sa.Column("name", sa.String(), primary_key=True),
+            sa.Column("value", sa.Integer(), nullable=False),
+        )
+    if "device_model_definitions" not in tables:
+        op.create_table(
+            "device_model_definitions",
+            sa.Column("hash", sa.String(64), primary_key=True),
+            sa.Column("vendor", sa.String()),
+            sa.Column("model", sa.String()),
+            sa.Column("exposes", sa.JSON(), nullable=False),
+            sa.Column("created_at", sa.DateTime()),
+        )
+    if "device_capabilities" not in tables:
+        op.create_table(
+            "device_capabilities",
+            sa.Column("definition_hash", sa.String(64), sa.ForeignKey("device_model_definitions.hash"), primary_key=True),
+            sa.Column("property", sa.String(), primary_key=True),
+            sa.Column("name", sa.String()),
+            sa.Column("type", sa.String(), nullable=False),
+            sa.Column("unit", sa.String()),
+            sa.Column("access", sa.Integer(), nullable=False),
+            sa.Column("value_min", sa.Float()),
+            sa.Column("value_max", sa.Float()),
+            sa.Column("values", sa.JSON()),
+        )
+
+    _add_missing("crops", sa.Column("icon_hash", sa.String(64)))
+    _add_missing(
+        "gardens",
+        sa.Column("preview_hash", sa.String(64)),
+        sa.Column("preview_thumb_hash", sa.String(64)),
+        sa.Column("revision", sa.Integer(), nullable=False, server_default="0"),
+    )
+    _add_missing(
+        "hubs",
+        sa.Column("is_online", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("devices_revision", sa.Integer(), nullable=False, server_default="0"),
+    )
+    _add_missing("zigbee_devices", sa.Column("definition_hash", sa.String(64)), sa.Column("report_interval", sa.Float()))
+
+    if "exposes" in _columns("zigbee_devices"):
+        _intern_exposes()
+        with op.batch_alter_table("zigbee_devices") as batch:
+            batch.create_foreign_key(
+                "zigbee_devices_definition_hash_fkey", "device_model_definitions", ["definition_hash"], ["hash"]
+            )
+            batch.drop_column("exposes")
+
+
+def downgrade():
+    with op.batch_alter_table("zigbee_devices") as batch:
+        batch.add_column(sa.Column("exposes", sa.JSON()))
+    devices = sa.table("zigbee_devices", sa.column("definition_hash"), sa.column("exposes", sa.JSON))
+    definitions = sa.table("device_model_definitions", sa.column("hash"), sa.column("exposes", sa.JSON))
+    op.execute(devices.update().values(
+        exposes=sa.select(definitions.c.exposes).where(definitions.c.hash == devices.c.definition_hash).scalar_subquery()
+    ))
+    with op.batch_alter_table("zigbee_devices") as batch:
+        batch.drop_constraint("zigbee_devices_definition_hash_fkey", type_="foreignkey")
+        batch.drop_column("definition_hash")
+        batch.drop_column("report_interval")
+    with op.batch_alter_table("hubs") as batch:
+        batch.drop_column("is_online")
+        batch.drop_column("devices_revision")
+    with op.batch_alter_table("gardens") as batch:
+        batch.drop_column("preview_hash")
+        batch.drop_column("preview_thumb_hash")
+        batch.drop_column("revision")
+    with op.batch_alter_table("crops") as batch:
+        batch.drop_column("icon_hash")
+    op.drop_table("device_capabilities")
+    op.drop_table("device_model_definitions")
+    op.drop_table("revision_counters")
@@ -0,0 +1,72 @@
+"""Index foreign keys and hot-path filter columns
+
+Every per-garden and per-hub read filters or joins on a foreign key, none of
+which had an index, so they were sequential scans growing with the whole
+table. Indexes are built CONCURRENTLY on PostgreSQL so a live database keeps
+taking writes while they build; that can't run inside a transaction, hence
+the autocommit block. A concurrent build that was interrupted leaves an
+INVALID index behind, which is dropped and rebuilt.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    # Garden layout: beds -> zones -> placements
+    ("ix_beds_garden_id", "beds", ["garden_id"]),
+    ("ix_zones_bed_id", "zones", ["bed_id"]),
+    ("ix_crop_placements_bed_id", "crop_placements", ["bed_id"]),
+    ("ix_crop_placements_zone_id", "crop_placements", ["zone_id"]),
+    ("ix_crop_placements_crop_id", "crop_placements", ["crop_id"]),
+    # Role checks look up (garden, user); garden lists look up by user
+    ("ix_garden_members_garden_id_user_id", "garden_members", ["garden_id", "user_id"]),
+    ("ix_garden_members_user_id", "garden_members", ["user_id"]),
+    # Hubs and their devices
+    ("ix_zigbee_devices_hub_id", "zigbee_devices", ["hub_id"]),
+    ("ix_zigbee_devices_zone_id", "zigbee_devices", ["zone_id"]),
+    ("ix_automations_hub_id", "automations", ["hub_id"]),
+    ("ix_device_state_history_device_id_timestamp", "device_state_history", ["device_id", "timestamp"]),
+    # Declared on the models while tables were still created by create_all
+    ("ix_hubs_last_seen", "hubs", ["last_seen"]),
+    ("ix_hubs_is_online", "hubs", ["is_online"]),
+    ("ix_zigbee_devices_definition_hash", "zigbee_devices", ["definition_hash"]),
+    ("ix_zigbee_devices_is_online", "zigbee_devices", ["is_online"]),
+    ("ix_zigbee_devices_last_seen", "zigbee_devices", ["last_seen"]),
+    ("ix_device_capabilities_property", "device_capabilities", ["property"]),
+]
+
+
+def _drop_if_invalid(name):
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+    invalid = bind.scalar(
+        sa.text(
+            "SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+            "WHERE c.relname = :name AND NOT i.indisvalid"
+        ),
+        {"name": name},
+    )
+    if invalid:
+        op.drop_index(name, postgresql_concurrently=True)
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            _drop_if_invalid(name)
+            op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,89 @@
+"""Backfill data stored before icon hashes, the blob store and the capability index
+
+Crop image icons get their icon_hash, garden previews stored inline as data
+URLs move to the blob store, and device definitions get their capabilities
+indexed. Rows already in the new shape are left alone, so this is a no-op on
+databases created after those changes.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+import hashlib
+import logging
+from alembic import op
+import sqlalchemy as sa
+from app.core.blobs import decode_data_url, store_image
+from app.core.config import get_settings
+from app.core.device_definitions import parse_capabilities
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+def _hash_icons(bind):
+    crops = sa.table("crops", sa.column("id"), sa.column("icon"), sa.column("icon_hash"))
+    rows = bind.execute(
+        sa.select(crops.c.id, crops.c.icon).where(crops.c.icon.like("data:%"), crops.c.icon_hash.is_(None))
+    ).all()
+    for row in rows:
+        # Same hash as Crop._hash_icon
+        digest = hashlib.sha256(row.icon.encode()).hexdigest()
+        bind.execute(crops.update().where(crops.c.id == row.id).values(icon_hash=digest))
+    return len(rows)
+
+
+def _move_previews(bind):
+    gardens = sa.table(
+        "gardens",
+        sa.column("id"), sa.column("preview_image"), sa.column("preview_hash"), sa.column("preview_thumb_hash"),
+    )
+    rows = bind.execute(
+        sa.select(gardens.c.id, gardens.c.preview_image).where(gardens.c.preview_image.like("data:%"))
+    ).all()
+    thumbnail_size = get_settings().preview_thumbnail_size
+    for row in rows:
+        values = {"preview_image": None}
+        try:
+            values["preview_hash"], values["preview_thumb_hash"] = store_image(
+                decode_data_url(row.preview_image), thumbnail_size
+            )
+        except ValueError:
+            logger.warning(f"Dropping unreadable preview of garden {row.id}")
+        bind.execute(gardens.update().where(gardens.c.id == row.id).values(**values))
+    return len(rows)
+
+
+def _index_capabilities(bind):
+    definitions = sa.table("device_model_definitions", sa.column("hash"), sa.column("exposes", sa.JSON))
+    capabilities = sa.table(
+        "device_capabilities",
+        sa.column("definition_hash"), sa.column("property"), sa.column("name"), sa.column("type"),
+        sa.column("unit"), sa.column("access"), sa.column("value_min"), sa.column("value_max"),
+        sa.column("values", sa.JSON),
+    )
+    indexed = sa.select(capabilities.c.definition_hash).distinct()
+    rows = bind.execute(
+        sa.select(definitions.c.hash, definitions.c.exposes).where(definitions.c.hash.not_in(indexed))
+    ).all()
+    for row in rows:
+        parsed = parse_capabilities(row.exposes).values()
+        if parsed:
+            bind.execute(capabilities.insert(), [{"definition_hash": row.hash, **capability} for capability in parsed])
+    return len(rows)
+
+
+def upgrade():
+    bind = op.get_bind()
+    icons, previews, definitions = _hash_icons(bind), _move_previews(bind), _index_capabilities(bind)
+    if icons or previews or definitions:
+        logger.info(f"Backfilled {icons} icon hash(es), {previews} preview(s), {definitions} definition(s)")
+
+
+def downgrade():
+    # The backfilled data is valid at the previous revision too
+    pass
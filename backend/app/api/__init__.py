@@ -4,6 +4,7 @@ from app.api.gardens import router as gardens_router
 from app.api.beds import router as beds_router
 from app.api.crops import router as crops_router
 from app.api.users import router as users_router
+from app.api.blobs import router as blobs_router
 
 __all__ = [
     "auth_router",
@@ -11,4 +12,5 @@ __all__ = [
     "beds_router",
     "crops_router",
     "users_router",
+    "blobs_router",
 ]
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status, BackgroundTasks
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 import json
 import uuid
 
-from app.core.database import get_db
+from app.core.database import get_db, AsyncSessionLocal
+from app.core.pagination import MAX_PAGE_SIZE, select_fields, fetched_rows, select_page, page_response
 from app.core.ws import manager
 from app.models.automation import Automation
 from app.models.hub import Hub
@@ -13,12 +15,14 @@ from app.schemas.automation import AutomationCreate, AutomationUpdate, Automatio
 router = APIRouter()
 
 
-async def _sync_automations_to_hub(hub_id: uuid.UUID, db: Session):
+async def _sync_automations_to_hub(hub_id: uuid.UUID):
     """Push all automations for a hub to the connected hub agent via WebSocket."""
     if hub_id not in manager.active_connections:
         return  # Hub not connected, nothing to push
 
-    automations = db.query(Automation).filter(Automation.hub_id == hub_id).all()
+    # Runs after the response is sent, when the request's session is already closed
+    async with AsyncSessionLocal() as db:
+        automations = (await db.scalars(select(Automation).where(Automation.hub_id == hub_id))).all()
     payload = [
         {
             "id": str(a.id),
@@ -35,37 +39,47 @@ async def _sync_automations_to_hub(hub_id: uuid.UUID, db: Session):
 
 
 @router.get("/automations", response_model=List[AutomationResponse])
-def get_automations(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    automations = db.query(Automation).offset(skip).limit(limit).all()
-    return automations
+async def get_automations(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name,enabled"),
+    db: AsyncSession = Depends(get_db)
+):
+    query, projected = select_fields(Automation, AutomationResponse, fields)
+    
+    result = await db.execute(select_page(query, Automation.id, cursor, limit))
+    rows = fetched_rows(result, projected)
+    return page_response(request, response, rows, limit, AutomationResponse)
 
 @router.post("/automations", response_model=AutomationResponse)
-async def create_automation(automation: AutomationCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+async def create_automation(automation: AutomationCreate, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_db)):
     # Verify hub exists
-    hub = db.query(Hub).filter(Hub.id == automation.hub_id).first()
+    hub = await db.get(Hub, automation.hub_id)
     if not hub:
         raise HTTPException(status_code=404, detail="Hub not found")
 
     db_automation = Automation(**automation.dict())
     db.add(db_automation)
-    db.commit()
-    db.refresh(db_automation)
+    await db.commit()
+    await db.refresh(db_automation)
 
     # Sync to hub agent
-    background_tasks.add_task(_sync_automations_to_hub, automation.hub_id, db)
+    background_tasks.add_task(_sync_automations_to_hub, automation.hub_id)
 
     return db_automation
 
 @router.get("/automations/{automation_id}", response_model=AutomationResponse)
-def get_automation(automation_id: uuid.UUID, db: Session = Depends(get_db)):
-    automation = db.query(Automation).filter(Automation.id == automation_id).first()
+async def get_automation(automation_id: uuid.UUID, db: AsyncSession = Depends(get_db)):
+    automation = await db.get(Automation, automation_id)
     if not automation:
         raise HTTPException(status_code=404, detail="Automation not found")
     return automation
 
 @router.put("/automations/{automation_id}", response_model=AutomationResponse)
-async def update_automation(automation_id: uuid.UUID, automation_update: AutomationUpdate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
-    automation = db.query(Automation).filter(Automation.id == automation_id).first()
+async def update_automation(automation_id: uuid.UUID, automation_update: AutomationUpdate, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_db)):
+    automation = await db.get(Automation, automation_id)
     if not automation:
         raise HTTPException(status_code=404, detail="Automation not found")
     
@@ -73,25 +87,25 @@ async def update_automation(automation_id: uuid.UUID, automation_update: Automat
     for key, value in update_data.items():
         setattr(automation, key, value)
 
-    db.commit()
-    db.refresh(automation)
+    await db.commit()
+    await db.refresh(automation)
 
     # Sync to hub agent
-    background_tasks.add_task(_sync_automations_to_hub, automation.hub_id, db)
+    background_tasks.add_task(_sync_automations_to_hub, automation.hub_id)
 
     return automation
 
 @router.delete("/automations/{automation_id}", response_model=AutomationResponse)
-async def delete_automation(automation_id: uuid.UUID, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
-    automation = db.query(Automation).filter(Automation.id == automation_id).first()
+async def delete_automation(automation_id: uuid.UUID, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_db)):
+    automation = await db.get(Automation, automation_id)
     if not automation:
         raise HTTPException(status_code=404, detail="Automation not found")
     
     hub_id = automation.hub_id
-    db.delete(automation)
-    db.commit()
+    await db.delete(automation)
+    await db.commit()
 
     # Sync to hub agent
-    background_tasks.add_task(_sync_automations_to_hub, hub_id, db)
+    background_tasks.add_task(_sync_automations_to_hub, hub_id)
 
     return automation
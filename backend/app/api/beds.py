@@ -1,11 +1,13 @@
 from typing import List
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.conditional import make_etag, etag_matches, not_modified, set_validators
 from app.core.database import get_db
 from app.core.security import get_current_user
 from app.models.user import User
-from app.models.garden import GardenMember, MemberRole
+from app.models.garden import Garden, MemberRole
 from app.models.bed import Bed, Zone
 from app.schemas.bed import (
     BedCreate,
@@ -15,7 +17,9 @@ from app.schemas.bed import (
     ZoneUpdate,
     ZoneResponse,
 )
-from app.api.gardens import require_garden_access
+from app.core import access_cache
+from app.api.gardens import require_garden_role, require_bed_access, bump_garden_revision
+from app.api.hubs import bump_hub_devices_revisions, hubs_of_zones
 
 router = APIRouter(prefix="/beds", tags=["Beds"])
 
@@ -23,12 +27,23 @@ router = APIRouter(prefix="/beds", tags=["Beds"])
 @router.get("/garden/{garden_id}", response_model=List[BedResponse])
 async def list_beds(
     garden_id: UUID,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """List all beds in a garden."""
-    require_garden_access(db, garden_id, current_user.id)
-    beds = db.query(Bed).filter(Bed.garden_id == garden_id).all()
+    await require_garden_role(db, garden_id, current_user.id)
+    
+    revision = await db.scalar(select(Garden.revision).where(Garden.id == garden_id))
+    etag = make_etag("garden-beds", garden_id, revision)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_validators(response, etag)
+    
+    beds = (await db.scalars(select(Bed).where(Bed.garden_id == garden_id))).all()
+    for bed in beds:
+        access_cache.set_bed_garden(bed.id, bed.garden_id)
     return beds
 
 
@@ -36,15 +51,17 @@ async def list_beds(
 async def create_bed(
     bed_data: BedCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new bed. Requires editor role."""
-    require_garden_access(db, bed_data.garden_id, current_user.id, MemberRole.EDITOR)
+    await require_garden_role(db, bed_data.garden_id, current_user.id, MemberRole.EDITOR)
     
     bed = Bed(**bed_data.model_dump())
     db.add(bed)
-    db.commit()
-    db.refresh(bed)
+    await bump_garden_revision(db, bed.garden_id)
+    await db.commit()
+    await db.refresh(bed)
+    access_cache.set_bed_garden(bed.id, bed.garden_id)
     
     return bed
 
@@ -53,14 +70,14 @@ async def create_bed(
 async def get_bed(
     bed_id: UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get bed details."""
-    bed = db.query(Bed).filter(Bed.id == bed_id).first()
+    bed = await db.get(Bed, bed_id)
     if not bed:
         raise HTTPException(status_code=404, detail="Bed not found")
     
-    require_garden_access(db, bed.garden_id, current_user.id)
+    await require_garden_role(db, bed.garden_id, current_user.id)
     return bed
 
 
@@ -69,21 +86,22 @@ async def update_bed(
     bed_id: UUID,
     bed_data: BedUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update bed. Requires editor role."""
-    bed = db.query(Bed).filter(Bed.id == bed_id).first()
+    bed = await db.get(Bed, bed_id)
     if not bed:
         raise HTTPException(status_code=404, detail="Bed not found")
     
-    require_garden_access(db, bed.garden_id, current_user.id, MemberRole.EDITOR)
+    await require_garden_role(db, bed.garden_id, current_user.id, MemberRole.EDITOR)
     
     update_data = bed_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(bed, field, value)
     
-    db.commit()
-    db.refresh(bed)
+    await bump_garden_revision(db, bed.garden_id)
+    await db.commit()
+    await db.refresh(bed)
     
     return bed
 
@@ -92,17 +110,21 @@ async def update_bed(
 async def delete_bed(
     bed_id: UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete bed. Requires editor role."""
-    bed = db.query(Bed).filter(Bed.id == bed_id).first()
+    bed = await db.get(Bed, bed_id)
     if not bed:
         raise HTTPException(status_code=404, detail="Bed not found")
     
-    require_garden_access(db, bed.garden_id, current_user.id, MemberRole.EDITOR)
+    await require_garden_role(db, bed.garden_id, current_user.id, MemberRole.EDITOR)
     
-    db.delete(bed)
-    db.commit()
+    # Deleting the zones unassigns their devices
+    await bump_hub_devices_revisions(db, hubs_of_zones(select(Zone.id).where(Zone.bed_id == bed_id)))
+    await db.delete(bed)
+    await bump_garden_revision(db, bed.garden_id)
+    await db.commit()
+    access_cache.forget_bed(bed_id)
 
 
 # Zone endpoints
@@ -110,15 +132,11 @@ async def delete_bed(
 async def list_zones(
     bed_id: UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """List all zones in a bed."""
-    bed = db.query(Bed).filter(Bed.id == bed_id).first()
-    if not bed:
-        raise HTTPException(status_code=404, detail="Bed not found")
-    
-    require_garden_access(db, bed.garden_id, current_user.id)
-    zones = db.query(Zone).filter(Zone.bed_id == bed_id).all()
+    await require_bed_access(db, bed_id, current_user.id)
+    zones = (await db.scalars(select(Zone).where(Zone.bed_id == bed_id))).all()
     return zones
 
 
@@ -126,19 +144,16 @@ async def list_zones(
 async def create_zone(
     zone_data: ZoneCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new zone. Requires editor role."""
-    bed = db.query(Bed).filter(Bed.id == zone_data.bed_id).first()
-    if not bed:
-        raise HTTPException(status_code=404, detail="Bed not found")
-    
-    require_garden_access(db, bed.garden_id, current_user.id, MemberRole.EDITOR)
+    garden_id = await require_bed_access(db, zone_data.bed_id, current_user.id, MemberRole.EDITOR)
     
     zone = Zone(**zone_data.model_dump())
     db.add(zone)
-    db.commit()
-    db.refresh(zone)
+    await bump_garden_revision(db, garden_id)
+    await db.commit()
+    await db.refresh(zone)
     
     return zone
 
@@ -148,22 +163,22 @@ async def update_zone(
     zone_id: UUID,
     zone_data: ZoneUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update zone. Requires editor role."""
-    zone = db.query(Zone).filter(Zone.id == zone_id).first()
+    zone = await db.get(Zone, zone_id)
     if not zone:
         raise HTTPException(status_code=404, detail="Zone not found")
     
-    bed = db.query(Bed).filter(Bed.id == zone.bed_id).first()
-    require_garden_access(db, bed.garden_id, current_user.id, MemberRole.EDITOR)
+    garden_id = await require_bed_access(db, zone.bed_id, current_user.id, MemberRole.EDITOR)
     
     update_data = zone_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(zone, field, value)
     
-    db.commit()
-    db.refresh(zone)
+    await bump_garden_revision(db, garden_id)
+    await db.commit()
+    await db.refresh(zone)
     
     return zone
 
@@ -172,15 +187,17 @@ async def update_zone(
 async def delete_zone(
     zone_id: UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete zone. Requires editor role."""
-    zone = db.query(Zone).filter(Zone.id == zone_id).first()
+    zone = await db.get(Zone, zone_id)
     if not zone:
         raise HTTPException(status_code=404, detail="Zone not found")
     
-    bed = db.query(Bed).filter(Bed.id == zone.bed_id).first()
-    require_garden_access(db, bed.garden_id, current_user.id, MemberRole.EDITOR)
+    garden_id = await require_bed_access(db, zone.bed_id, current_user.id, MemberRole.EDITOR)
     
-    db.delete(zone)
-    db.commit()
+    # Deleting the zone unassigns its devices
+    await bump_hub_devices_revisions(db, hubs_of_zones([zone_id]))
+    await db.delete(zone)
+    await bump_garden_revision(db, garden_id)
+    await db.commit()
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+from app.core.blobs import blob_store, sniff_media_type
+from app.core.conditional import etag_matches
+
+router = APIRouter(prefix="/blobs", tags=["Blobs"])
+
+# Where blobs are served, as returned in API responses
+BLOB_URL_PREFIX = "/api/blobs/"
+
+# A hash always names the same bytes
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def blob_url(digest: str | None) -> str | None:
+    return f"{BLOB_URL_PREFIX}{digest}" if digest else None
+
+
+@router.get("/{digest}")
+async def get_blob(digest: str, request: Request):
+    """
+    Serve a stored blob. Unauthenticated so it can be used as an <img> source;
+    blob hashes are only handed out in responses to users allowed to see them.
+    """
+    if not blob_store.exists(digest):
+        raise HTTPException(status_code=404, detail="Blob not found")
+
+    headers = {"ETag": f'"{digest}"', "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    path = blob_store.path(digest)
+    with open(path, "rb") as f:
+        media_type = sniff_media_type(f.read(16))
+    return FileResponse(path, media_type=media_type, headers=headers)
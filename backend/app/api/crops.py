@@ -1,8 +1,17 @@
+import base64
 from typing import List, Optional
+from urllib.parse import unquote_to_bytes
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from pydantic import TypeAdapter
+from app.core.compression import is_compressible
+from app.core.conditional import make_etag, etag_matches, not_modified, set_validators
 from app.core.database import get_db
+from app.core.fast_json import json_response
+from app.core.revisions import CROPS, get_revision, bump_revision
 from app.core.security import get_current_user
 from app.models.user import User
 from app.models.garden import MemberRole
@@ -12,37 +21,68 @@ from app.schemas.crop import (
     CropCreate,
     CropUpdate,
     CropResponse,
+    CropListItem,
     CropPlacementCreate,
     CropPlacementUpdate,
     CropPlacementResponse,
 )
-from app.api.gardens import require_garden_access
+from app.api.blobs import IMMUTABLE_CACHE_CONTROL
+from app.api.gardens import require_garden_role, require_bed_access, bump_garden_revision, bump_garden_revisions
 
 router = APIRouter(prefix="/crops", tags=["Crops"])
 
+_crop_list_adapter = TypeAdapter(List[CropListItem])
 
-@router.get("/", response_model=List[CropResponse])
+# The public catalogue is the same for every user: keep it serialized for the
+# current crops revision. Per process, so each worker rebuilds it once per change.
+_public_catalogue = {"revision": None, "items": b""}
+
+
+def _serialize_crop_items(crops) -> bytes:
+    """JSON array elements (without the brackets) for a list of crops."""
+    return _crop_list_adapter.dump_json(_crop_list_adapter.validate_python(crops, from_attributes=True))[1:-1]
+
+
+async def _public_crop_items(db: AsyncSession, revision: int) -> bytes:
+    if _public_catalogue["revision"] != revision:
+        # Read after the revision, so the bytes are never older than the revision they're cached under
+        crops = (await db.scalars(select(Crop).where(Crop.is_public == True))).all()
+        _public_catalogue["items"] = _serialize_crop_items(crops)
+        _public_catalogue["revision"] = revision
+    return _public_catalogue["items"]
+
+
+@router.get("/", response_model=List[CropListItem])
 async def list_crops(
+    request: Request,
     include_private: bool = Query(False, description="Include user's private crops"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """List all public crops, optionally including user's private crops."""
-    query = db.query(Crop).filter(
-        (Crop.is_public == True) | (Crop.created_by == current_user.id)
-    )
+    """List all public crops, optionally including user's private crops. Image icons are served by /crops/{id}/icon."""
+    revision = await get_revision(db, CROPS)
+    # Private crops make the list user-specific
+    etag = make_etag("crops", revision, current_user.id if include_private else "public")
+    if etag_matches(request, etag):
+        return not_modified(etag)
     
-    if not include_private:
-        query = db.query(Crop).filter(Crop.is_public == True)
+    items = await _public_crop_items(db, revision)
+    if include_private:
+        own = (await db.scalars(
+            select(Crop).where(Crop.is_public.is_not(True), Crop.created_by == current_user.id)
+        )).all()
+        items = b",".join(part for part in (items, _serialize_crop_items(own)) if part)
     
-    return query.all()
+    response = Response(content=b"[" + items + b"]", media_type="application/json")
+    set_validators(response, etag)
+    return response
 
 
 @router.post("/", response_model=CropResponse, status_code=status.HTTP_201_CREATED)
 async def create_crop(
     crop_data: CropCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new crop. New crops are private until approved by global admin."""
     # Default values
@@ -61,8 +101,9 @@ async def create_crop(
         is_approved=is_approved
     )
     db.add(crop)
-    db.commit()
-    db.refresh(crop)
+    await bump_revision(db, CROPS)
+    await db.commit()
+    await db.refresh(crop)
     
     return crop
 
@@ -71,10 +112,10 @@ async def create_crop(
 async def get_crop(
     crop_id: UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get crop details."""
-    crop = db.query(Crop).filter(Crop.id == crop_id).first()
+    crop = await db.get(Crop, crop_id)
     if not crop:
         raise HTTPException(status_code=404, detail="Crop not found")
     
@@ -85,15 +126,54 @@ async def get_crop(
     return crop
 
 
+@router.get("/{crop_id}/icon")
+async def get_crop_icon(
+    crop_id: UUID,
+    request: Request,
+    v: Optional[str] = Query(None, description="Icon hash from the crop list"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Image icon of a crop. Unauthenticated so it can be used as an <img> source;
+    private crops' icons are only served when the caller knows the hash.
+    """
+    crop = (await db.execute(
+        select(Crop.icon, Crop.icon_hash, Crop.is_public).where(Crop.id == crop_id)
+    )).first()
+    if crop is None or not crop.icon_hash or (not crop.is_public and v != crop.icon_hash):
+        raise HTTPException(status_code=404, detail="Icon not found")
+    
+    etag = f'"{crop.icon_hash}"'
+    # A URL carrying the current hash always maps to these exact bytes, so it may be cached forever
+    cache_control = IMMUTABLE_CACHE_CONTROL if v == crop.icon_hash else "public, no-cache"
+
+    # data:[<media type>][;base64],<data>
+    header, _, data = crop.icon.partition(",")
+    media_type = header[len("data:"):].split(";")[0] or "application/octet-stream"
+    if etag_matches(request, etag):
+        headers = {"ETag": etag, "Cache-Control": cache_control}
+        if is_compressible(media_type):
+            # SVG icons are compressed, so their 304 gets the same weak ETag (see not_modified)
+            headers["Vary"] = "Accept-Encoding"
+        return Response(status_code=304, headers=headers)
+    
+    try:
+        content = base64.b64decode(data) if header.endswith(";base64") else unquote_to_bytes(data)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Icon not found")
+    
+    return Response(content=content, media_type=media_type, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
 @router.patch("/{crop_id}", response_model=CropResponse)
 async def update_crop(
     crop_id: UUID,
     crop_data: CropUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update crop. Only owner or global admin can update."""
-    crop = db.query(Crop).filter(Crop.id == crop_id).first()
+    crop = await db.get(Crop, crop_id)
     if not crop:
         raise HTTPException(status_code=404, detail="Crop not found")
     
@@ -111,8 +191,13 @@ async def update_crop(
     for field, value in update_data.items():
         setattr(crop, field, value)
     
-    db.commit()
-    db.refresh(crop)
+    # Snapshots embed the crops their placements reference
+    await bump_garden_revisions(
+        db, select(Bed.garden_id).join(CropPlacement, CropPlacement.bed_id == Bed.id).where(CropPlacement.crop_id == crop_id)
+    )
+    await bump_revision(db, CROPS)
+    await db.commit()
+    await db.refresh(crop)
     
     return crop
 
@@ -120,10 +205,10 @@ async def update_crop(
 async def delete_crop(
     crop_id: UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a crop. Only owner or global admin can delete."""
-    crop = db.query(Crop).filter(Crop.id == crop_id).first()
+    crop = await db.get(Crop, crop_id)
     if not crop:
         raise HTTPException(status_code=404, detail="Crop not found")
     
@@ -131,64 +216,63 @@ async def delete_crop(
     if crop.created_by != current_user.id and not current_user.is_global_admin:
         raise HTTPException(status_code=403, detail="Not authorized to delete this crop")
     
-    db.delete(crop)
-    db.commit()
+    await db.delete(crop)
+    await bump_revision(db, CROPS)
+    await db.commit()
 # Crop Placement endpoints
 @router.get("/placements/bed/{bed_id}", response_model=List[CropPlacementResponse])
 async def list_crop_placements(
     bed_id: UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """List all crop placements in a bed."""
-    bed = db.query(Bed).filter(Bed.id == bed_id).first()
-    if not bed:
-        raise HTTPException(status_code=404, detail="Bed not found")
-    
-    require_garden_access(db, bed.garden_id, current_user.id)
+    await require_bed_access(db, bed_id, current_user.id)
     
-    placements = db.query(CropPlacement).filter(CropPlacement.bed_id == bed_id).all()
-    return placements
+    placements = (await db.scalars(
+        select(CropPlacement)
+        .options(selectinload(CropPlacement.crop))
+        .where(CropPlacement.bed_id == bed_id)
+    )).all()
+    return json_response(List[CropPlacementResponse], placements)
 
 
 @router.get("/placements/garden/{garden_id}", response_model=List[CropPlacementResponse])
 async def list_garden_placements(
     garden_id: UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """List all crop placements across all beds in a garden."""
-    require_garden_access(db, garden_id, current_user.id)
+    await require_garden_role(db, garden_id, current_user.id)
     
-    # Get all beds in the garden, then all placements in those beds
-    bed_ids = db.query(Bed.id).filter(Bed.garden_id == garden_id).all()
-    bed_id_list = [b.id for b in bed_ids]
-    
-    placements = db.query(CropPlacement).filter(CropPlacement.bed_id.in_(bed_id_list)).all()
-    return placements
+    placements = (await db.scalars(
+        select(CropPlacement)
+        .join(Bed, Bed.id == CropPlacement.bed_id)
+        .options(selectinload(CropPlacement.crop))
+        .where(Bed.garden_id == garden_id)
+    )).all()
+    return json_response(List[CropPlacementResponse], placements)
 
 @router.post("/placements", response_model=CropPlacementResponse, status_code=status.HTTP_201_CREATED)
 async def create_crop_placement(
     placement_data: CropPlacementCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Place a crop in a bed. Requires editor role."""
-    bed = db.query(Bed).filter(Bed.id == placement_data.bed_id).first()
-    if not bed:
-        raise HTTPException(status_code=404, detail="Bed not found")
-    
-    require_garden_access(db, bed.garden_id, current_user.id, MemberRole.EDITOR)
+    garden_id = await require_bed_access(db, placement_data.bed_id, current_user.id, MemberRole.EDITOR)
     
     # Verify crop exists
-    crop = db.query(Crop).filter(Crop.id == placement_data.crop_id).first()
+    crop = await db.get(Crop, placement_data.crop_id)
     if not crop:
         raise HTTPException(status_code=404, detail="Crop not found")
     
     placement = CropPlacement(**placement_data.model_dump())
     db.add(placement)
-    db.commit()
-    db.refresh(placement)
+    await bump_garden_revision(db, garden_id)
+    await db.commit()
+    await db.refresh(placement, ["crop"])
     
     return placement
 
@@ -198,22 +282,22 @@ async def update_crop_placement(
     placement_id: UUID,
     placement_data: CropPlacementUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update crop placement. Requires editor role."""
-    placement = db.query(CropPlacement).filter(CropPlacement.id == placement_id).first()
+    placement = await db.get(CropPlacement, placement_id)
     if not placement:
         raise HTTPException(status_code=404, detail="Placement not found")
     
-    bed = db.query(Bed).filter(Bed.id == placement.bed_id).first()
-    require_garden_access(db, bed.garden_id, current_user.id, MemberRole.EDITOR)
+    garden_id = await require_bed_access(db, placement.bed_id, current_user.id, MemberRole.EDITOR)
     
     update_data = placement_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(placement, field, value)
     
-    db.commit()
-    db.refresh(placement)
+    await bump_garden_revision(db, garden_id)
+    await db.commit()
+    await db.refresh(placement, ["crop"])
     
     return placement
 
@@ -222,15 +306,15 @@ async def update_crop_placement(
 async def delete_crop_placement(
     placement_id: UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete crop placement. Requires editor role."""
-    placement = db.query(CropPlacement).filter(CropPlacement.id == placement_id).first()
+    placement = await db.get(CropPlacement, placement_id)
     if not placement:
         raise HTTPException(status_code=404, detail="Placement not found")
     
-    bed = db.query(Bed).filter(Bed.id == placement.bed_id).first()
-    require_garden_access(db, bed.garden_id, current_user.id, MemberRole.EDITOR)
+    garden_id = await require_bed_access(db, placement.bed_id, current_user.id, MemberRole.EDITOR)
     
-    db.delete(placement)
-    db.commit()
+    await db.delete(placement)
+    await bump_garden_revision(db, garden_id)
+    await db.commit()
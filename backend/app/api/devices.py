@@ -1,25 +1,126 @@
 import uuid
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
-from app.models.device_zigbee import ZigbeeDevice
-from app.schemas.device_zigbee import ZigbeeDeviceResponse, ZigbeeDeviceUpdate
+from app.core.device_definitions import ACCESS_SET
+from app.core.fast_json import json_response
+from app.core.pagination import MAX_PAGE_SIZE, select_fields, fetched_rows, select_page, page_response
+from app.api.gardens import bump_garden_revisions, gardens_of_zones
+from app.api.hubs import bump_hub_devices_revision
+from app.api.blobs import IMMUTABLE_CACHE_CONTROL
+from app.models.bed import Bed, Zone
+from app.models.device_zigbee import ZigbeeDevice, DeviceModelDefinition, DeviceCapability
+from app.schemas.device_zigbee import (
+    ZigbeeDeviceResponse, ZigbeeDeviceUpdate, DeviceModelDefinitionResponse, DeviceCapabilityResponse
+)
 
 router = APIRouter()
 
+
+def _filter_devices(query, garden: Optional[uuid.UUID] = None, hub: Optional[uuid.UUID] = None):
+    if garden is not None:
+        query = query.where(ZigbeeDevice.zone_id.in_(
+            select(Zone.id).join(Bed, Bed.id == Zone.bed_id).where(Bed.garden_id == garden)
+        ))
+    if hub is not None:
+        query = query.where(ZigbeeDevice.hub_id == hub)
+    return query
+
+
+def _filter_capabilities(query, capability: Optional[str], writable: Optional[bool]):
+    if capability is not None:
+        query = query.where(DeviceCapability.property == capability)
+    if writable is not None:
+        can_set = DeviceCapability.access.op("&")(ACCESS_SET) != 0
+        query = query.where(can_set if writable else ~can_set)
+    return query
+
+
 @router.get("/devices", response_model=List[ZigbeeDeviceResponse])
-def get_all_devices(db: Session = Depends(get_db)):
-    """List all Zigbee devices across all hubs"""
-    devices = db.query(ZigbeeDevice).all()
-    return devices
+async def get_all_devices(
+    request: Request,
+    response: Response,
+    online: Optional[bool] = None,
+    capability: Optional[str] = Query(None, description="Only devices exposing this property, e.g. soil_moisture"),
+    writable: Optional[bool] = Query(None, description="With capability: only devices that can (or can't) set it"),
+    garden: Optional[uuid.UUID] = Query(None, description="Only devices assigned to zones of this garden"),
+    hub: Optional[uuid.UUID] = None,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; all devices if omitted"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,friendly_name,zone_id"),
+    db: AsyncSession = Depends(get_db)
+):
+    """List all Zigbee devices across all hubs, optionally filtered by presence, capability and garden"""
+    query, projected = select_fields(ZigbeeDevice, ZigbeeDeviceResponse, fields)
+    if online is not None:
+        query = query.where(ZigbeeDevice.is_online == online)
+    if capability is not None or writable is not None:
+        query = query.where(ZigbeeDevice.definition_hash.in_(
+            _filter_capabilities(select(DeviceCapability.definition_hash), capability, writable)
+        ))
+    query = _filter_devices(query, garden, hub)
+    
+    result = await db.execute(select_page(query, ZigbeeDevice.id, cursor, limit))
+    rows = fetched_rows(result, projected)
+    return page_response(request, response, rows, limit, ZigbeeDeviceResponse)
+
+@router.get("/devices/capabilities", response_model=List[DeviceCapabilityResponse])
+async def get_device_capabilities(
+    capability: Optional[str] = None,
+    writable: Optional[bool] = None,
+    garden: Optional[uuid.UUID] = None,
+    hub: Optional[uuid.UUID] = None,
+    device_id: Optional[uuid.UUID] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    The capability index: one row per (device, property), with type, unit,
+    access and value range. Answers "what can these devices report or set"
+    without loading exposes.
+    """
+    capability_columns = [c for c in DeviceCapability.__table__.columns if c.key != "definition_hash"]
+    query = (
+        select(ZigbeeDevice.id.label("device_id"), *capability_columns)
+        .join(DeviceCapability, DeviceCapability.definition_hash == ZigbeeDevice.definition_hash)
+        .order_by(ZigbeeDevice.id, DeviceCapability.property)
+    )
+    query = _filter_capabilities(query, capability, writable)
+    if device_id is not None:
+        query = query.where(ZigbeeDevice.id == device_id)
+    query = _filter_devices(query, garden, hub)
+    
+    return json_response(List[DeviceCapabilityResponse], (await db.execute(query)).mappings().all())
+
+@router.get("/devices/definitions", response_model=List[DeviceModelDefinitionResponse])
+async def get_device_definitions(
+    response: Response,
+    hashes: Optional[str] = Query(None, description="Comma-separated definition hashes; all definitions if omitted"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Device model definitions (exposes) referenced by devices' `definition_hash`.
+    A hash always names the same definition, so clients fetch each one once.
+    """
+    if hashes is None:
+        return (await db.scalars(select(DeviceModelDefinition))).all()
+    
+    requested = {h.strip() for h in hashes.split(",") if h.strip()}
+    definitions = (await db.scalars(
+        select(DeviceModelDefinition).where(DeviceModelDefinition.hash.in_(requested))
+    )).all()
+    if len(definitions) == len(requested):
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return definitions
 
 @router.put("/devices/{device_id}", response_model=ZigbeeDeviceResponse)
-def update_device(device_id: uuid.UUID, device_update: ZigbeeDeviceUpdate, db: Session = Depends(get_db)):
+async def update_device(device_id: uuid.UUID, device_update: ZigbeeDeviceUpdate, db: AsyncSession = Depends(get_db)):
     """Update a Zigbee device (e.g. assign to zone, rename)"""
-    device = db.query(ZigbeeDevice).filter(ZigbeeDevice.id == device_id).first()
+    device = await db.get(ZigbeeDevice, device_id)
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
+    previous_zone_id = device.zone_id
     
     if device_update.friendly_name is not None:
         device.friendly_name = device_update.friendly_name
@@ -39,6 +140,12 @@ def update_device(device_id: uuid.UUID, device_update: ZigbeeDeviceUpdate, db: S
     for key, value in update_data.items():
         setattr(device, key, value)
 
-    db.commit()
-    db.refresh(device)
+    # Garden snapshots list each zone's devices by name
+    zone_ids = {previous_zone_id, device.zone_id} - {None}
+    if zone_ids and update_data.keys() & {"friendly_name", "zone_id"}:
+        await bump_garden_revisions(db, gardens_of_zones(zone_ids))
+    await bump_hub_devices_revision(db, device.hub_id)
+
+    await db.commit()
+    await db.refresh(device)
     return device
@@ -1,67 +1,153 @@
-from typing import List
+import asyncio
+from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select, update, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from app.core import access_cache
+from app.core.blobs import decode_data_url, store_image
+from app.core.config import get_settings
+from app.core.conditional import make_etag, etag_matches, not_modified, set_validators
 from app.core.database import get_db
+from app.core.fast_json import validate, raw_json_response
+from app.core.pagination import select_fields, fetched_rows, validate_rows
 from app.core.security import get_current_user
+from app.api.blobs import blob_url
 from app.models.user import User
 from app.models.garden import Garden, GardenMember, MemberRole
+from app.models.bed import Bed, Zone
+from app.models.crop import Crop, CropPlacement
+from app.models.device_zigbee import ZigbeeDevice
 from app.schemas.garden import (
     GardenCreate,
     GardenUpdate,
     GardenResponse,
     GardenListItem,
     GardenMemberResponse,
+    GardenSnapshot,
 )
+from app.schemas.bed import BedResponse, ZoneResponse
+from app.schemas.crop import CropListItem, CropPlacementSummary
+from app.schemas.device_zigbee import ZigbeeDeviceSummary
 
 router = APIRouter(prefix="/gardens", tags=["Gardens"])
+settings = get_settings()
 
 
-def get_user_garden_role(db: Session, garden_id: UUID, user_id: UUID) -> MemberRole | None:
-    """Get user's role in a garden, or None if not a member."""
-    member = db.query(GardenMember).filter(
-        GardenMember.garden_id == garden_id,
-        GardenMember.user_id == user_id
-    ).first()
-    return member.role if member else None
+ROLE_HIERARCHY = {MemberRole.VIEWER: 0, MemberRole.EDITOR: 1, MemberRole.ADMIN: 2}
 
 
-def require_garden_access(db: Session, garden_id: UUID, user_id: UUID, min_role: MemberRole = MemberRole.VIEWER) -> Garden:
-    """Require user has at least min_role access to garden."""
-    garden = db.query(Garden).filter(Garden.id == garden_id).first()
-    if not garden:
+async def get_user_garden_role(db: AsyncSession, garden_id: UUID, user_id: UUID) -> MemberRole | None:
+    """Get user's role in a garden, or None if not a member. Raises 404 if the garden doesn't exist."""
+    role = access_cache.get_role(user_id, garden_id)
+    if role is not access_cache.MISS:
+        return role
+    
+    # One query answers both "does the garden exist" and "what is the role"
+    row = (await db.execute(
+        select(Garden.id, GardenMember.role)
+        .outerjoin(GardenMember, and_(
+            GardenMember.garden_id == Garden.id,
+            GardenMember.user_id == user_id
+        ))
+        .where(Garden.id == garden_id)
+    )).first()
+    if row is None:
         raise HTTPException(status_code=404, detail="Garden not found")
     
-    role = get_user_garden_role(db, garden_id, user_id)
+    access_cache.set_role(user_id, garden_id, row.role)
+    return row.role
+
+
+async def require_garden_role(db: AsyncSession, garden_id: UUID, user_id: UUID, min_role: MemberRole = MemberRole.VIEWER) -> MemberRole:
+    """Require user has at least min_role access to garden, without loading the garden."""
+    role = await get_user_garden_role(db, garden_id, user_id)
     if role is None:
         raise HTTPException(status_code=403, detail="Not a member of this garden")
     
-    role_hierarchy = {MemberRole.VIEWER: 0, MemberRole.EDITOR: 1, MemberRole.ADMIN: 2}
-    if role_hierarchy[role] < role_hierarchy[min_role]:
+    if ROLE_HIERARCHY[role] < ROLE_HIERARCHY[min_role]:
         raise HTTPException(status_code=403, detail=f"Requires {min_role.value} role")
     
+    return role
+
+
+async def require_garden_access(db: AsyncSession, garden_id: UUID, user_id: UUID, min_role: MemberRole = MemberRole.VIEWER) -> Garden:
+    """Require user has at least min_role access to garden, and return the garden."""
+    await require_garden_role(db, garden_id, user_id, min_role)
+    
+    garden = await db.get(Garden, garden_id)
+    if not garden:
+        raise HTTPException(status_code=404, detail="Garden not found")
     return garden
 
 
+async def get_bed_garden_id(db: AsyncSession, bed_id: UUID) -> UUID:
+    """Garden owning a bed, through the ownership cache. Raises 404 if the bed doesn't exist."""
+    garden_id = access_cache.get_bed_garden(bed_id)
+    if garden_id is None:
+        garden_id = await db.scalar(select(Bed.garden_id).where(Bed.id == bed_id))
+        if garden_id is None:
+            raise HTTPException(status_code=404, detail="Bed not found")
+        access_cache.set_bed_garden(bed_id, garden_id)
+    return garden_id
+
+
+async def require_bed_access(db: AsyncSession, bed_id: UUID, user_id: UUID, min_role: MemberRole = MemberRole.VIEWER) -> UUID:
+    """Require user has at least min_role access to the bed's garden. Returns the garden id."""
+    garden_id = await get_bed_garden_id(db, bed_id)
+    await require_garden_role(db, garden_id, user_id, min_role)
+    return garden_id
+
+
+async def bump_garden_revision(db: AsyncSession, garden_id: UUID):
+    """Invalidate a garden's snapshot. Call in the same transaction as the change."""
+    await db.execute(
+        update(Garden)
+        .where(Garden.id == garden_id)
+        .values(revision=Garden.revision + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def bump_garden_revisions(db: AsyncSession, garden_ids):
+    """Bump every garden selected by `garden_ids`, a select of garden ids."""
+    await db.execute(
+        update(Garden)
+        .where(Garden.id.in_(garden_ids))
+        .values(revision=Garden.revision + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def gardens_of_zones(zone_ids):
+    """Select the ids of the gardens owning the given zones."""
+    return select(Bed.garden_id).join(Zone, Zone.bed_id == Bed.id).where(Zone.id.in_(zone_ids))
+
+
 @router.get("/", response_model=List[GardenListItem])
 async def list_gardens(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """List all gardens the user is a member of."""
-    memberships = db.query(GardenMember).filter(
-        GardenMember.user_id == current_user.id
-    ).all()
+    memberships = (await db.scalars(
+        select(GardenMember)
+        .options(joinedload(GardenMember.garden))
+        .where(GardenMember.user_id == current_user.id)
+    )).all()
     
     result = []
     for membership in memberships:
         garden = membership.garden
+        access_cache.set_role(current_user.id, garden.id, membership.role)
         result.append(GardenListItem(
             id=garden.id,
             name=garden.name,
             width_meters=garden.width_meters,
             height_meters=garden.height_meters,
-            preview_image=garden.preview_image,
+            preview_image=blob_url(garden.preview_hash) or garden.preview_image,
+            preview_thumbnail=blob_url(garden.preview_thumb_hash),
             created_at=garden.created_at,
             role=membership.role
         ))
@@ -73,7 +159,7 @@ async def list_gardens(
 async def create_garden(
     garden_data: GardenCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new garden. Creator becomes admin."""
     garden = Garden(
@@ -82,8 +168,10 @@ async def create_garden(
         height_meters=garden_data.height_meters,
         created_by=current_user.id
     )
+    if garden_data.preview_image:
+        await _set_preview(garden, garden_data.preview_image)
     db.add(garden)
-    db.flush()
+    await db.flush()
     
     # Add creator as admin member
     member = GardenMember(
@@ -92,21 +180,98 @@ async def create_garden(
         role=MemberRole.ADMIN
     )
     db.add(member)
-    db.commit()
-    db.refresh(garden)
+    await db.commit()
+    await db.refresh(garden)
+    access_cache.set_role(current_user.id, garden.id, MemberRole.ADMIN)
     
-    return _garden_to_response(garden, db)
+    return await _garden_to_response(garden, db)
 
 
 @router.get("/{garden_id}", response_model=GardenResponse)
 async def get_garden(
     garden_id: UUID,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get garden details."""
-    garden = require_garden_access(db, garden_id, current_user.id)
-    return _garden_to_response(garden, db)
+    garden = await require_garden_access(db, garden_id, current_user.id)
+    
+    etag = make_etag("garden-detail", garden.id, garden.revision)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_validators(response, etag)
+    return await _garden_to_response(garden, db)
+
+
+@router.get("/{garden_id}/snapshot", response_model=GardenSnapshot)
+async def get_garden_snapshot(
+    garden_id: UUID,
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Beds, zones, placements, referenced crops and assigned devices of a garden in one payload."""
+    await require_garden_role(db, garden_id, current_user.id)
+    
+    # The revision is read before the rows, so the data is never older than its ETag
+    garden = (await db.execute(
+        select(Garden.id, Garden.name, Garden.width_meters, Garden.height_meters, Garden.revision)
+        .where(Garden.id == garden_id)
+    )).first()
+    if garden is None:
+        raise HTTPException(status_code=404, detail="Garden not found")
+    
+    etag = make_etag("garden-snapshot", garden.id, garden.revision)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    # With the fast JSON path these are column rows, validated below
+    query, projected = select_fields(Bed, BedResponse, None)
+    beds = fetched_rows(await db.execute(query.where(Bed.garden_id == garden_id)), projected)
+    query, _ = select_fields(Zone, ZoneResponse, None)
+    zones = fetched_rows(await db.execute(
+        query.join(Bed, Bed.id == Zone.bed_id).where(Bed.garden_id == garden_id)
+    ), projected)
+    query, _ = select_fields(CropPlacement, CropPlacementSummary, None)
+    placements = fetched_rows(await db.execute(
+        query.join(Bed, Bed.id == CropPlacement.bed_id).where(Bed.garden_id == garden_id)
+    ), projected)
+    crops = (await db.scalars(
+        select(Crop).where(Crop.id.in_({placement.crop_id for placement in placements}))
+    )).all() if placements else []
+    query, _ = select_fields(ZigbeeDevice, ZigbeeDeviceSummary, None)
+    devices = fetched_rows(await db.execute(
+        query
+        .join(Zone, Zone.id == ZigbeeDevice.zone_id)
+        .join(Bed, Bed.id == Zone.bed_id)
+        .where(Bed.garden_id == garden_id)
+    ), projected)
+    
+    for bed in beds:
+        access_cache.set_bed_garden(bed.id, garden_id)
+    
+    set_validators(response, etag)
+    snapshot = dict(
+        id=garden.id,
+        name=garden.name,
+        width_meters=garden.width_meters,
+        height_meters=garden.height_meters,
+        revision=garden.revision,
+        beds=beds,
+        zones=zones,
+        placements=placements,
+        crops=crops,
+        devices=devices,
+    )
+    if not projected:
+        return snapshot
+    for key, schema in (("beds", BedResponse), ("zones", ZoneResponse), ("placements", CropPlacementSummary), ("devices", ZigbeeDeviceSummary)):
+        snapshot[key] = validate_rows(schema, snapshot[key])
+    snapshot["crops"] = validate(List[CropListItem], crops)
+    return raw_json_response(snapshot, response)
 
 
 @router.patch("/{garden_id}", response_model=GardenResponse)
@@ -114,43 +279,89 @@ async def update_garden(
     garden_id: UUID,
     garden_data: GardenUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update garden. Requires editor or admin role."""
-    garden = require_garden_access(db, garden_id, current_user.id, MemberRole.EDITOR)
+    garden = await require_garden_access(db, garden_id, current_user.id, MemberRole.EDITOR)
     
     update_data = garden_data.model_dump(exclude_unset=True)
+    if "preview_image" in update_data:
+        await _set_preview(garden, update_data.pop("preview_image"))
     for field, value in update_data.items():
         setattr(garden, field, value)
     
-    db.commit()
-    db.refresh(garden)
+    await bump_garden_revision(db, garden_id)
+    await db.commit()
+    await db.refresh(garden)
     
-    return _garden_to_response(garden, db)
+    return await _garden_to_response(garden, db)
 
 
 @router.delete("/{garden_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_garden(
     garden_id: UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete garden. Requires admin role."""
-    garden = require_garden_access(db, garden_id, current_user.id, MemberRole.ADMIN)
-    db.delete(garden)
-    db.commit()
+    # app.api.hubs imports this module
+    from app.api.hubs import bump_hub_devices_revisions, hubs_of_zones
+
+    garden = await require_garden_access(db, garden_id, current_user.id, MemberRole.ADMIN)
+    # Deleting the garden's zones unassigns their devices
+    zone_ids = select(Zone.id).join(Bed, Zone.bed_id == Bed.id).where(Bed.garden_id == garden_id)
+    await bump_hub_devices_revisions(db, hubs_of_zones(zone_ids))
+    await db.delete(garden)
+    await db.commit()
+    access_cache.invalidate_garden(garden_id)
 
 
-def _garden_to_response(garden: Garden, db: Session) -> GardenResponse:
+async def _set_preview(garden: Garden, preview: Optional[str]):
+    """
+    Apply a preview from a create/update request. Uploaded data URLs go to the
+    blob store and the row keeps only their hashes; other URLs are kept as-is.
+    """
+    if preview and garden.preview_hash and preview.endswith(blob_url(garden.preview_hash)):
+        return  # The client echoed back the current preview
+    
+    garden.preview_image = None
+    garden.preview_hash = garden.preview_thumb_hash = None
+    if not preview:
+        return
+    if not preview.startswith("data:"):
+        garden.preview_image = preview
+        return
+    
+    try:
+        data = decode_data_url(preview)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid preview image")
+    if len(data) > settings.preview_max_bytes:
+        raise HTTPException(status_code=413, detail=f"Preview image is larger than {settings.preview_max_bytes} bytes")
+    try:
+        # Hashing, disk writes and thumbnailing stay off the event loop
+        garden.preview_hash, garden.preview_thumb_hash = await asyncio.to_thread(
+            store_image, data, settings.preview_thumbnail_size
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid preview image")
+
+
+async def _garden_to_response(garden: Garden, db: AsyncSession) -> GardenResponse:
     """Convert garden model to response with member details."""
+    rows = (await db.execute(
+        select(GardenMember, User.name, User.email)
+        .outerjoin(User, User.id == GardenMember.user_id)
+        .where(GardenMember.garden_id == garden.id)
+    )).all()
+    
     members = []
-    for member in garden.members:
-        user = db.query(User).filter(User.id == member.user_id).first()
+    for member, user_name, user_email in rows:
         members.append(GardenMemberResponse(
             id=member.id,
             user_id=member.user_id,
-            user_name=user.name if user else "Unknown",
-            user_email=user.email if user else "",
+            user_name=user_name or "Unknown",
+            user_email=user_email or "",
             role=member.role,
             invited_at=member.invited_at,
             accepted_at=member.accepted_at
@@ -161,7 +372,8 @@ def _garden_to_response(garden: Garden, db: Session) -> GardenResponse:
         name=garden.name,
         width_meters=garden.width_meters,
         height_meters=garden.height_meters,
-        preview_image=garden.preview_image,
+        preview_image=blob_url(garden.preview_hash) or garden.preview_image,
+        preview_thumbnail=blob_url(garden.preview_thumb_hash),
         created_by=garden.created_by,
         created_at=garden.created_at,
         members=members
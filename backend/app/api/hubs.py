@@ -1,26 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, status, BackgroundTasks
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, WebSocket, WebSocketDisconnect, status, BackgroundTasks
+from sqlalchemy import select, update, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional, Dict
+import asyncio
 import json
 import uuid
 import secrets
 import logging
 from datetime import datetime
 
+from app.core.conditional import make_etag, etag_matches, not_modified, set_validators
+from app.core.config import get_settings
 from app.core.database import get_db
+from app.core.device_definitions import definition_hash, parse_capabilities
+from app.core.pagination import rows_response, select_fields
+from app.core.ingest import get_ingest_limiter, ingest_stats
+from app.core.presence import record_device_report
 from app.models.hub import Hub, HubStatus
-from app.models.device_zigbee import ZigbeeDevice
+from app.models.device_zigbee import ZigbeeDevice, DeviceStateHistory, DeviceModelDefinition, DeviceCapability
 from app.schemas.hub import HubCreate, HubResponse, HubUpdate, HubRegister, HubTokenResponse
 from app.schemas.device_zigbee import ZigbeeDeviceCreate, ZigbeeDeviceResponse
 from app.models.automation import Automation
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 from app.core.ws import manager
+from app.api.gardens import bump_garden_revisions, gardens_of_zones
 
 @router.post("/hubs/register", response_model=HubTokenResponse)
-def register_hub(hub_in: HubRegister, db: Session = Depends(get_db)):
+async def register_hub(hub_in: HubRegister, db: AsyncSession = Depends(get_db)):
     # Check if hub already exists by chip_id/name (using name for now as chip_id)
     # In a real scenario, we'd use a unique hardware ID field. 
     # For now, let's treat 'name' as potentially unique or just create a new one.
@@ -38,7 +49,7 @@ def register_hub(hub_in: HubRegister, db: Session = Depends(get_db)):
     # We should probably store it. For now, we'll store chip_id in 'name' if it's new.
     
     # Check if a hub with this name (chip_id) exists
-    hub = db.query(Hub).filter(Hub.name == hub_in.chip_id).first()
+    hub = await db.scalar(select(Hub).where(Hub.name == hub_in.chip_id))
     
     if not hub:
         # Create new Pending Hub
@@ -50,20 +61,22 @@ def register_hub(hub_in: HubRegister, db: Session = Depends(get_db)):
             # Let's assume the request client host is the keys.
             user_email=hub_in.user_email,
             status=HubStatus.PENDING,
-            last_seen=datetime.utcnow()
+            last_seen=datetime.utcnow(),
+            is_online=True
         )
         db.add(hub)
-        db.commit()
-        db.refresh(hub)
+        await db.commit()
+        await db.refresh(hub)
         logger.info(f"Registered new hub: {hub.id} (Pending)")
     else:
         # Update existing hub info
         hub.last_seen = datetime.utcnow()
+        hub.is_online = True
         if hub.status == HubStatus.APPROVED and not hub.access_token:
              # Generate token if missing for approved hub
             hub.access_token = secrets.token_urlsafe(32)
-        db.commit()
-        db.refresh(hub)
+        await db.commit()
+        await db.refresh(hub)
 
     return HubTokenResponse(
         hub_id=hub.id,
@@ -72,18 +85,16 @@ def register_hub(hub_in: HubRegister, db: Session = Depends(get_db)):
     )
 
 @router.get("/hubs", response_model=List[HubResponse])
-def read_hubs(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    hubs = db.query(Hub).offset(skip).limit(limit).all()
-    # Fill is_online property
-    for hub in hubs:
-        # This is a bit hacky as is_online is a property, not a DB column in the model file
-        # but pydantic with from_attributes=True should pick it up from the property method.
-        pass 
-    return hubs
+async def read_hubs(skip: int = 0, limit: int = 100, online: Optional[bool] = None, db: AsyncSession = Depends(get_db)):
+    query = select(Hub)
+    if online is not None:
+        # is_online is kept current by the presence sweeper, so this filters in SQL
+        query = query.where(Hub.is_online == online)
+    return (await db.scalars(query.offset(skip).limit(limit))).all()
 
 @router.put("/hubs/{hub_id}/status", response_model=HubResponse)
-def update_hub_status(hub_id: uuid.UUID, status_in: HubUpdate, db: Session = Depends(get_db)):
-    hub = db.query(Hub).filter(Hub.id == hub_id).first()
+async def update_hub_status(hub_id: uuid.UUID, status_in: HubUpdate, db: AsyncSession = Depends(get_db)):
+    hub = await db.get(Hub, hub_id)
     if not hub:
         raise HTTPException(status_code=404, detail="Hub not found")
     
@@ -95,14 +106,14 @@ def update_hub_status(hub_id: uuid.UUID, status_in: HubUpdate, db: Session = Dep
     if status_in.name:
         hub.name = status_in.name
         
-    db.commit()
-    db.refresh(hub)
+    await db.commit()
+    await db.refresh(hub)
     return hub
 
 @router.websocket("/hubs/{hub_id}/ws")
-async def websocket_endpoint(websocket: WebSocket, hub_id: uuid.UUID, token: Optional[str] = None, db: Session = Depends(get_db)):
+async def websocket_endpoint(websocket: WebSocket, hub_id: uuid.UUID, token: Optional[str] = None, db: AsyncSession = Depends(get_db)):
     # Validate Hub and Token
-    hub = db.query(Hub).filter(Hub.id == hub_id).first()
+    hub = await db.get(Hub, hub_id)
     if not hub:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return
@@ -123,99 +134,266 @@ async def websocket_endpoint(websocket: WebSocket, hub_id: uuid.UUID, token: Opt
          return
 
     await manager.connect(hub_id, websocket)
+    limiter = get_ingest_limiter(hub_id)
+    last_heartbeat = None
     
     try:
+        # Tell the agent which definitions we have, so discovery can send just their hashes
+        known = (await db.scalars(select(DeviceModelDefinition.hash))).all()
+        await _send_definition_hashes(websocket, "definitions_known", known, replace=True)
+        # Either side may have restarted since the window was last sent, so always resync it
+        await _send_batch_window(websocket, limiter.batch_window_ms)
+
         while True:
-            data = await websocket.receive_text()
-            message = json.loads(data)
-            msg_type = message.get("type")
-            payload = message.get("payload")
-
-            # Update heartbeat
-            hub.last_seen = datetime.utcnow()
-            db.commit()
-
-            if msg_type == "device_discovery":
-                # payload: list of devices
-                devices_data = message.get("payload", [])
-                for device_data in devices_data:
-                    ieee = device_data.get("ieee_address")
-                    if not ieee: continue
-                    
-                    # Check if device exists
-                    device = db.query(ZigbeeDevice).filter(ZigbeeDevice.ieee_address == ieee).first()
-                    if not device:
-                        device = ZigbeeDevice(
-                            hub_id=hub.id,
-                            ieee_address=ieee,
-                            friendly_name=device_data.get("friendly_name"),
-                            model=device_data.get("model"),
-                            vendor=device_data.get("vendor"),
-                            description=device_data.get("description"),
-                            exposes=device_data.get("exposes", []),
-                            is_online=True,
-                            last_seen=datetime.utcnow()
-                        )
-                        db.add(device)
-                    else:
-                        # Update existing
-                        device.friendly_name = device_data.get("friendly_name")
-                        device.model = device_data.get("model")
-                        device.vendor = device_data.get("vendor")
-                        device.description = device_data.get("description")
-                        device.exposes = device_data.get("exposes", [])
-                        device.is_online = True
-                        device.last_seen = datetime.utcnow()
-                        # Ensure it belongs to this hub (move if needed?)
-                        if device.hub_id != hub.id:
-                            device.hub_id = hub.id
-
-                db.commit()
-                
-            elif msg_type == "device_state_update":
-                # payload: {ieee_address, state}
-                ieee = message.get("payload", {}).get("ieee_address")
-                state = message.get("payload", {}).get("state") # Assuming payload has 'state' object
-
-                if ieee:
-                    device = db.query(ZigbeeDevice).filter(ZigbeeDevice.ieee_address == ieee).first()
-                    if device:
-                        device.last_seen = datetime.utcnow()
-                        device.is_online = True
-                        
-                        # Update current state if provided
-                        if state:
-                            # Merge with existing state if needed, or replace. 
-                            # Usually state updates are partial, so merge is better.
-                            current_state = dict(device.state) if device.state else {}
-                            current_state.update(state)
-                            device.state = current_state
-
-                        # Save history if tracked
-                        if device.is_tracked and state:
-                            # Import here to avoid circular imports if any, or just rely on global import
-                            from app.models.device_zigbee import DeviceStateHistory
-                            history_entry = DeviceStateHistory(
-                                device_id=device.id,
-                                state=state
-                            )
-                            db.add(history_entry)
-                        
-                        db.commit()
-                
-                # TODO: Broadcast this to frontend via another WS or similar mechanism if needed.
-
-            elif msg_type == "heartbeat":
-                pass # Just keepalive
+            # Wake up periodically even when the hub is quiet so coalesced
+            # updates are flushed once their tokens refill.
+            try:
+                data = await asyncio.wait_for(websocket.receive_text(), timeout=settings.ingest_flush_interval_seconds)
+            except asyncio.TimeoutError:
+                data = None
+
+            now = datetime.utcnow()
+            learned, missing = [], []
+            heartbeat_written = False
+            if data is not None:
+                message = json.loads(data)
+                msg_type = message.get("type")
+                payload = message.get("payload")
+
+                # Update heartbeat (throttled so a busy hub doesn't rewrite its row per frame).
+                # A bulk update, because the presence sweeper may have set is_online in the
+                # database behind the Hub loaded above.
+                if last_heartbeat is None or (now - last_heartbeat).total_seconds() >= settings.heartbeat_write_interval_seconds:
+                    await db.execute(
+                        update(Hub)
+                        .where(Hub.id == hub_id)
+                        .values(last_seen=now, is_online=True)
+                        .execution_options(synchronize_session=False)
+                    )
+                    last_heartbeat = now
+                    heartbeat_written = True
+
+                if msg_type == "device_discovery":
+                    # payload: list of devices
+                    learned, missing = await _apply_device_discovery(db, hub, payload or [], now)
+
+                elif msg_type == "device_state_update":
+                    # payload: {ieee_address, state}
+                    ieee = (payload or {}).get("ieee_address")
+                    state = (payload or {}).get("state")  # Assuming payload has 'state' object
+
+                    if ieee and limiter.admit(ieee, state):
+                        await _apply_device_state(db, ieee, state, now)
+
+                    # TODO: Broadcast this to frontend via another WS or similar mechanism if needed.
+
+                elif msg_type == "heartbeat":
+                    pass  # Just keepalive
+
+            # Apply coalesced updates that have tokens again, all in the same commit
+            for ieee, state in limiter.drain():
+                await _apply_device_state(db, ieee, state, now)
+
+            if heartbeat_written or db.dirty or db.new:
+                await db.commit()
+
+            # Only acknowledge definitions once they are committed
+            if learned:
+                await _send_definition_hashes(websocket, "definitions_known", learned)
+            if missing:
+                await _send_definition_hashes(websocket, "definition_request", missing)
+
+            window = limiter.backpressure_update()
+            if window is not None:
+                logger.warning(f"Hub {hub_id} ingest throttled, requesting batch window of {window}ms")
+                await _send_batch_window(websocket, window)
 
     except WebSocketDisconnect:
         manager.disconnect(hub_id)
-        # Mark as offline if needed, or rely on last_seen
+        # Bulk update like the presence sweeper: a hub deleted while connected just matches no row
+        await db.execute(
+            update(Hub)
+            .where(Hub.id == hub_id)
+            .values(is_online=False)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+
+async def bump_hub_devices_revision(db: AsyncSession, hub_id: uuid.UUID):
+    """Invalidate cached device lists of a hub after a metadata change (name, zone, exposes, ...)."""
+    await db.execute(
+        update(Hub)
+        .where(Hub.id == hub_id)
+        .values(devices_revision=Hub.devices_revision + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def bump_hub_devices_revisions(db: AsyncSession, hub_ids):
+    """Bump the device list revision of every hub selected by `hub_ids`, a select of hub ids."""
+    await db.execute(
+        update(Hub)
+        .where(Hub.id.in_(hub_ids))
+        .values(devices_revision=Hub.devices_revision + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def hubs_of_zones(zone_ids):
+    """Select the ids of the hubs with devices in the given zones."""
+    return select(ZigbeeDevice.hub_id).where(ZigbeeDevice.zone_id.in_(zone_ids))
+
+
+async def _send_definition_hashes(websocket: WebSocket, msg_type: str, hashes, replace: bool = False):
+    await websocket.send_text(json.dumps({
+        "type": msg_type,
+        "payload": {"hashes": sorted(hashes), "replace": replace}
+    }))
+
+
+async def _send_batch_window(websocket: WebSocket, window_ms: int):
+    await websocket.send_text(json.dumps({
+        "type": "ingest_backpressure",
+        "payload": {"batch_window_ms": window_ms}
+    }))
+
+
+async def _intern_definitions(db: AsyncSession, devices_data: List[dict]):
+    """
+    Resolve each reported device to a definition hash, adding definitions
+    (and their capability index) we don't have yet. Devices that carry `exposes` are hashed here (older agents
+    send no hash); devices that only carry `definition_hash` must reference a
+    known definition.
+
+    Returns ({ieee: hash}, hashes added, hashes referenced but unknown).
+    """
+    hashes, definitions = {}, {}
+    for device_data in devices_data:
+        ieee = device_data.get("ieee_address")
+        if not ieee: continue
+        if "exposes" in device_data:
+            vendor, model, exposes = device_data.get("vendor"), device_data.get("model"), device_data["exposes"] or []
+            digest = definition_hash(vendor, model, exposes)
+            if device_data.get("definition_hash") not in (None, digest):
+                logger.warning(f"Definition hash mismatch for {ieee}, using {digest}")
+            if digest not in definitions:
+                definitions[digest] = DeviceModelDefinition(
+                    hash=digest, vendor=vendor, model=model, exposes=exposes,
+                    capabilities=[DeviceCapability(**c) for c in parse_capabilities(exposes).values()]
+                )
+            hashes[ieee] = digest
+        elif device_data.get("definition_hash"):
+            hashes[ieee] = device_data["definition_hash"]
+
+    referenced = set(hashes.values())
+    known = set((await db.scalars(
+        select(DeviceModelDefinition.hash).where(DeviceModelDefinition.hash.in_(referenced))
+    )).all()) if referenced else set()
+
+    learned = []
+    for digest, definition in definitions.items():
+        if digest in known:
+            continue
+        try:
+            async with db.begin_nested():
+                db.add(definition)
+        except IntegrityError:
+            # Another hub reported the same new model at the same time
+            continue
+        learned.append(digest)
+    missing = referenced - known - set(definitions)
+    return {ieee: digest for ieee, digest in hashes.items() if digest not in missing}, learned, sorted(missing)
+
+
+async def _apply_device_discovery(db: AsyncSession, hub: Hub, devices_data: List[dict], now: datetime):
+    """
+    Create or update the devices reported by a hub's zigbee2mqtt bridge.
+    Returns (definition hashes added, definition hashes the agent must send in full).
+    """
+    hashes, learned, missing = await _intern_definitions(db, devices_data)
+    renamed_zone_ids = set()
+    for device_data in devices_data:
+        ieee = device_data.get("ieee_address")
+        if not ieee: continue
+        
+        # Check if device exists
+        device = await db.scalar(select(ZigbeeDevice).where(ZigbeeDevice.ieee_address == ieee))
+        if not device:
+            device = ZigbeeDevice(
+                hub_id=hub.id,
+                ieee_address=ieee,
+                friendly_name=device_data.get("friendly_name"),
+                model=device_data.get("model"),
+                vendor=device_data.get("vendor"),
+                description=device_data.get("description"),
+                definition_hash=hashes.get(ieee),
+                is_online=True,
+                last_seen=now
+            )
+            db.add(device)
+        else:
+            if device.zone_id and (device.friendly_name, device.model, device.vendor, device.hub_id) != (
+                device_data.get("friendly_name"), device_data.get("model"), device_data.get("vendor"), hub.id
+            ):
+                renamed_zone_ids.add(device.zone_id)
+            # Update existing
+            device.friendly_name = device_data.get("friendly_name")
+            device.model = device_data.get("model")
+            device.vendor = device_data.get("vendor")
+            device.description = device_data.get("description")
+            if ieee in hashes:
+                # Unchanged hashes are no-ops, so reconnects don't rewrite the row
+                device.definition_hash = hashes[ieee]
+            device.is_online = True
+            device.last_seen = now
+            # Ensure it belongs to this hub (move if needed?)
+            if device.hub_id != hub.id:
+                await bump_hub_devices_revision(db, device.hub_id)
+                device.hub_id = hub.id
+
+    if devices_data:
+        await bump_hub_devices_revision(db, hub.id)
+
+    # Garden snapshots show assigned devices by name and model
+    if renamed_zone_ids:
+        await bump_garden_revisions(db, gardens_of_zones(renamed_zone_ids))
+    return learned, missing
+
+
+async def _apply_device_state(db: AsyncSession, ieee: str, state: Optional[dict], now: datetime):
+    """Merge a state report into the device row and record history. Caller commits."""
+    device = await db.scalar(select(ZigbeeDevice).where(ZigbeeDevice.ieee_address == ieee))
+    if not device:
+        return
+
+    record_device_report(device, now)
+    
+    # Update current state if provided
+    if state:
+        # Merge with existing state if needed, or replace. 
+        # Usually state updates are partial, so merge is better.
+        current_state = dict(device.state) if device.state else {}
+        current_state.update(state)
+        device.state = current_state
+
+    # Save history if tracked
+    if device.is_tracked and state:
+        db.add(DeviceStateHistory(
+            device_id=device.id,
+            state=state
+        ))
+
+
+@router.get("/hubs/ingest/stats")
+async def get_ingest_stats():
+    """Ingest admission counters (admitted, throttled, coalesced, ...) per hub since startup."""
+    return ingest_stats()
 
 @router.delete("/hubs/{hub_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_hub(hub_id: uuid.UUID, db: Session = Depends(get_db)):
+async def delete_hub(hub_id: uuid.UUID, db: AsyncSession = Depends(get_db)):
     """Delete a hub and its associated devices."""
-    hub = db.query(Hub).filter(Hub.id == hub_id).first()
+    hub = await db.get(Hub, hub_id)
     if not hub:
         raise HTTPException(status_code=404, detail="Hub not found")
     
@@ -224,17 +402,20 @@ def delete_hub(hub_id: uuid.UUID, db: Session = Depends(get_db)):
     # Let's trust SQLAlchemy cascade if set, otherwise manual.
     # Models review: Hub does not have cascade set in view_file earlier? 
     # Let's verify Hub model next if unsure, but standard delete is:
-    db.delete(hub)
-    db.commit()
+    await bump_garden_revisions(db, gardens_of_zones(
+        select(ZigbeeDevice.zone_id).where(ZigbeeDevice.hub_id == hub_id, ZigbeeDevice.zone_id.is_not(None))
+    ))
+    await db.delete(hub)
+    await db.commit()
 
 @router.get("/hubs/{hub_id}/automations", response_model=List[dict])
-def get_hub_automations(hub_id: uuid.UUID, db: Session = Depends(get_db)):
+async def get_hub_automations(hub_id: uuid.UUID, db: AsyncSession = Depends(get_db)):
     """Return all automations for this hub (including disabled ones).
     The hub agent and frontend both use this endpoint:
     - Frontend needs all automations to display and toggle enabled state
     - Hub agent filters enabled ones locally before evaluating
     """
-    automations = db.query(Automation).filter(Automation.hub_id == hub_id).all()
+    automations = (await db.scalars(select(Automation).where(Automation.hub_id == hub_id))).all()
     return [
         {
             "id": str(a.id),
@@ -248,19 +429,40 @@ def get_hub_automations(hub_id: uuid.UUID, db: Session = Depends(get_db)):
     ]
 
 @router.get("/hubs/{hub_id}/devices", response_model=List[ZigbeeDeviceResponse])
-def get_hub_devices(hub_id: uuid.UUID, db: Session = Depends(get_db)):
-    hub = db.query(Hub).filter(Hub.id == hub_id).first()
-    if not hub:
+async def get_hub_devices(hub_id: uuid.UUID, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    # Metadata edits bump devices_revision; every state report moves max(last_seen)
+    # and the presence sweeper changes the online count, so one aggregate row
+    # identifies the current device list.
+    validator = (await db.execute(
+        select(
+            Hub.devices_revision,
+            func.count(ZigbeeDevice.id),
+            func.max(ZigbeeDevice.last_seen),
+            func.count(ZigbeeDevice.id).filter(ZigbeeDevice.is_online.is_(True)),
+        )
+        .outerjoin(ZigbeeDevice, ZigbeeDevice.hub_id == Hub.id)
+        .where(Hub.id == hub_id)
+        .group_by(Hub.id, Hub.devices_revision)
+    )).first()
+    if validator is None:
         raise HTTPException(status_code=404, detail="Hub not found")
-        
-    devices = db.query(ZigbeeDevice).filter(ZigbeeDevice.hub_id == hub_id).all()
-    return devices
+    
+    etag = make_etag("hub-devices", hub_id, *validator)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_validators(response, etag)
+    
+    query, projected = select_fields(ZigbeeDevice, ZigbeeDeviceResponse, None)
+    result = await db.execute(query.where(ZigbeeDevice.hub_id == hub_id))
+    if projected:
+        return rows_response(ZigbeeDeviceResponse, result.all(), response)
+    return result.scalars().all()
 
 @router.post("/hubs/{hub_id}/command")
 async def send_hub_command(
     hub_id: uuid.UUID, 
     command: dict, 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Send a command to a device on the hub.
@@ -284,7 +486,7 @@ async def send_hub_command(
         raise HTTPException(status_code=400, detail="Invalid command format. need ieee_address.")
 
     # Lookup device to get friendly_name
-    device = db.query(ZigbeeDevice).filter(ZigbeeDevice.ieee_address == ieee, ZigbeeDevice.hub_id == hub_id).first()
+    device = await db.scalar(select(ZigbeeDevice).where(ZigbeeDevice.ieee_address == ieee, ZigbeeDevice.hub_id == hub_id))
     if not device:
         raise HTTPException(status_code=404, detail="Device not found on this hub")
 
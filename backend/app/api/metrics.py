@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from app.api.users import verify_global_admin
+from app.core.metrics import render_metrics, slow_request_profiles
+from app.models.user import User
+
+router = APIRouter(tags=["Metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Request and ingest metrics in Prometheus text format. Only registered with METRICS_ENABLED."""
+    return PlainTextResponse(render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@router.get("/metrics/slow-requests")
+async def get_slow_requests(admin_user: User = Depends(verify_global_admin)):
+    """
+    Profiles of sampled requests that were slower than metrics_slow_request_ms,
+    most recent first. METRICS_PROFILE_SAMPLE_RATE (default 0.01) sets the share
+    of requests profiled; raise it to catch rare slow requests sooner.
+    """
+    return slow_request_profiles()
@@ -1,11 +1,13 @@
 from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
+from app.core.pagination import MAX_PAGE_SIZE, select_fields, fetched_rows, select_page, page_response
 from app.models.user import User
 from app.schemas.user import UserResponse
-from app.core.security import get_current_user
+from app.core.security import get_current_user, invalidate_cached_user, revoke_user
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -21,24 +23,30 @@ def verify_global_admin(current_user: User = Depends(get_current_user)):
 
 
 @router.get("/", response_model=List[UserResponse])
-def get_users(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+async def get_users(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name,email"),
+    db: AsyncSession = Depends(get_db),
     admin_user: User = Depends(verify_global_admin)
 ):
     """
     List all users. Restricted to global admins.
     """
-    users = db.query(User).offset(skip).limit(limit).all()
-    return users
+    query, projected = select_fields(User, UserResponse, fields)
+    
+    result = await db.execute(select_page(query, User.id, cursor, limit))
+    rows = fetched_rows(result, projected)
+    return page_response(request, response, rows, limit, UserResponse)
 
 
 @router.put("/{user_id}/admin", response_model=UserResponse)
-def toggle_user_admin_status(
+async def toggle_user_admin_status(
     user_id: UUID,
     is_global_admin: bool,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     admin_user: User = Depends(verify_global_admin)
 ):
     """
@@ -51,7 +59,7 @@ def toggle_user_admin_status(
             detail="Cannot change your own admin status"
         )
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -59,15 +67,16 @@ def toggle_user_admin_status(
         )
 
     user.is_global_admin = is_global_admin
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
+    invalidate_cached_user(user.id)
     return user
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user(
+async def delete_user(
     user_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     admin_user: User = Depends(verify_global_admin)
 ):
     """
@@ -80,13 +89,14 @@ def delete_user(
             detail="Cannot delete your own account"
         )
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
 
-    db.delete(user)
-    db.commit()
+    await db.delete(user)
+    await db.commit()
+    revoke_user(user_id)
     return None
@@ -1,4 +1,24 @@
-# Core module exports
-from app.core.config import get_settings
-from app.core.database import get_db, Base
-from app.core.security import get_current_user, get_password_hash, verify_password, create_access_token
+# Core module exports, resolved on first access so that importing one core
+# module (e.g. app.core.config from a CLI tool) doesn't load the database
+# engine and the auth stack with it.
+import importlib
+
+_EXPORTS = {
+    "get_settings": "app.core.config",
+    "get_db": "app.core.database",
+    "Base": "app.core.database",
+    "get_current_user": "app.core.security",
+    "get_password_hash": "app.core.security",
+    "get_password_hash_async": "app.core.security",
+    "verify_password": "app.core.security",
+    "verify_password_async": "app.core.security",
+    "create_access_token": "app.core.security",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(_EXPORTS[name]), name)
@@ -0,0 +1,55 @@
+"""
+Caches behind garden authorization.
+
+Membership roles are cached per (user_id, garden_id), and beds map to their
+owning garden, so steady-state access checks on bed, zone and placement
+endpoints need no queries. Beds never move between gardens, so ownership
+entries only go stale on deletion.
+"""
+from uuid import UUID
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.core.security import on_user_revoked
+from app.models.garden import MemberRole
+
+settings = get_settings()
+
+MISS = object()
+NOT_A_MEMBER = object()
+
+_roles = TTLCache(max_size=settings.access_cache_max_entries, ttl=settings.access_cache_ttl_seconds)
+_bed_gardens = TTLCache(max_size=settings.access_cache_max_entries, ttl=settings.access_cache_ttl_seconds)
+
+
+def get_role(user_id: UUID, garden_id: UUID):
+    """Cached role, None for a cached non-member, or MISS."""
+    role = _roles.get((user_id, garden_id), MISS)
+    return None if role is NOT_A_MEMBER else role
+
+
+def set_role(user_id: UUID, garden_id: UUID, role: MemberRole | None):
+    _roles.set((user_id, garden_id), NOT_A_MEMBER if role is None else role)
+
+
+def invalidate_garden(garden_id: UUID):
+    """Forget everything about a deleted garden."""
+    _roles.pop_where(lambda key: key[1] == garden_id)
+    # Deletion is rare; dropping the ownership map beats tracking a reverse index
+    _bed_gardens.clear()
+
+
+@on_user_revoked
+def invalidate_user(user_id: UUID):
+    _roles.pop_where(lambda key: key[0] == user_id)
+
+
+def get_bed_garden(bed_id: UUID) -> UUID | None:
+    return _bed_gardens.get(bed_id)
+
+
+def set_bed_garden(bed_id: UUID, garden_id: UUID):
+    _bed_gardens.set(bed_id, garden_id)
+
+
+def forget_bed(bed_id: UUID):
+    _bed_gardens.pop(bed_id)
@@ -0,0 +1,104 @@
+"""
+Content-addressed blob storage.
+
+Blobs live on the local filesystem under their sha256, sharded by the first two
+hex pairs, so identical uploads are stored once and a hash always names the
+same bytes. That is what lets /blobs/{hash} be cached by clients forever.
+"""
+import base64
+import hashlib
+import io
+import logging
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Optional
+from urllib.parse import unquote_to_bytes
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+class BlobStore:
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:4] / digest
+
+    def put(self, data: bytes) -> str:
+        """Store `data` (once) and return its sha256."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write then rename, so readers never see a partial blob
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return digest
+
+    def exists(self, digest: str) -> bool:
+        return bool(HASH_PATTERN.match(digest)) and self.path(digest).is_file()
+
+
+blob_store = BlobStore(settings.blob_storage_path)
+
+
+def sniff_media_type(head: bytes) -> str:
+    for signature, media_type in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return media_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
+
+
+def decode_data_url(url: str) -> bytes:
+    """Bytes of a `data:[<media type>][;base64],<data>` URL. Raises ValueError if malformed."""
+    header, separator, data = url.partition(",")
+    if not header.startswith("data:") or not separator:
+        raise ValueError("Not a data URL")
+    if header.endswith(";base64"):
+        return base64.b64decode(data, validate=True)
+    return unquote_to_bytes(data)
+
+
+def store_image(data: bytes, thumbnail_size: int) -> tuple[str, str]:
+    """
+    Store an image and its thumbnail. Returns (image hash, thumbnail hash).
+    Raises ValueError, storing nothing, if Pillow can't read the image.
+    """
+    thumbnail = make_thumbnail(data, thumbnail_size)
+    if thumbnail is None:
+        raise ValueError("Not a readable image")
+    return blob_store.put(data), blob_store.put(thumbnail)
+
+
+def make_thumbnail(data: bytes, max_size: int) -> Optional[bytes]:
+    """WebP thumbnail fitting in max_size x max_size, or None if the image can't be read."""
+    from PIL import Image
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.thumbnail((max_size, max_size))
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA")
+            out = io.BytesIO()
+            image.save(out, format="WEBP", quality=80)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        logger.warning(f"Could not create thumbnail: {e}")
+        return None
+    return out.getvalue()
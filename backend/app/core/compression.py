@@ -0,0 +1,152 @@
+"""
+Negotiated response compression.
+
+JSON payloads (device lists, automations, snapshots) compress 10-20x, which
+matters to remote users on slow links. Responses are compressed with brotli or
+gzip, whichever the client prefers, once they reach a minimum size.
+
+Only complete responses are compressed: anything sent in several body chunks
+(file and streaming responses) and non-text media types (image blobs, icons)
+pass through untouched. Responses carrying an ETag, such as the crop catalogue
+and garden snapshots, are the same bytes for every request until their
+revision changes, so their compressed bytes are cached per ETag. When the
+client negotiated an encoding, these responses get a weak ETag (the bytes
+differ, the content doesn't), which etag_matches() still compares equal for
+conditional GETs. So do their 304s (conditional.not_modified marks them with
+Vary: Accept-Encoding), so a revalidating cache sees the same validator.
+"""
+import gzip
+import logging
+from collections import OrderedDict
+from typing import Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_TYPES = ("application/json", "application/javascript", "application/xml", "image/svg+xml")
+
+
+def is_compressible(content_type: str) -> bool:
+    """Whether responses of this type are compressed (and get weak ETags under an encoding)."""
+    media_type = content_type.split(";")[0].strip().lower()
+    return media_type.startswith("text/") or media_type.endswith("+json") or media_type in COMPRESSIBLE_TYPES
+
+
+def _weaken_etag(headers: MutableHeaders):
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        headers["ETag"] = f"W/{etag}"
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Best of br/gzip acceptable to the client, or None. Ties go to brotli."""
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip().lower()] = q
+
+    candidates = ["br", "gzip"] if brotli else ["gzip"]
+    scored = [(weights.get(coding, weights.get("*", 0.0)), coding) for coding in candidates]
+    q, coding = max(scored, key=lambda item: (item[0], item[1] == "br"))
+    return coding if q > 0 else None
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 5,
+        cache_entries: int = 256,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache_entries = cache_entries
+        self._cache = OrderedDict()  # (path, query, etag, encoding) -> bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                if message["status"] == 304:
+                    # Revalidation of a representation that varies by encoding (see not_modified)
+                    passthrough = True
+                    headers = MutableHeaders(scope=message)
+                    if encoding and "accept-encoding" in headers.get("vary", "").lower():
+                        _weaken_etag(headers)
+                    await send(message)
+                    return
+                # Hold the headers until the body shows whether to compress
+                start = message
+                return
+
+            passthrough = True
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start["headers"])
+            if message.get("more_body", False) or not self._eligible(headers):
+                await send(start)
+                await send(message)
+                return
+
+            headers.add_vary_header("Accept-Encoding")
+            if encoding:
+                # Weak whether or not this one is big enough to compress, like its 304s
+                etag = headers.get("etag")
+                _weaken_etag(headers)
+                if len(body) >= self.minimum_size:
+                    body = self._compress(body, encoding, (scope["path"], scope["query_string"], etag) if etag else None)
+                    headers["Content-Encoding"] = encoding
+                    headers["Content-Length"] = str(len(body))
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _eligible(self, headers: MutableHeaders) -> bool:
+        return "content-encoding" not in headers and is_compressible(headers.get("content-type", ""))
+
+    def _compress(self, body: bytes, encoding: str, cache_key: Optional[tuple]) -> bytes:
+        if cache_key is not None:
+            key = (*cache_key, encoding)
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+        if encoding == "br":
+            compressed = brotli.compress(body, mode=brotli.MODE_TEXT, quality=self.brotli_quality)
+        else:
+            compressed = gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+        if cache_key is not None and self.cache_entries > 0:
+            self._cache[key] = compressed
+            if len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+        return compressed
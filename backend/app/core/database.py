@@ -1,19 +1,66 @@
-from sqlalchemy import create_engine
+import zlib
+from contextlib import contextmanager
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import get_settings
 
 settings = get_settings()
 
-engine = create_engine(settings.database_url)
+# Async drivers for the sync URLs used in configuration
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def _async_url(url: str):
+    parsed = make_url(url)
+    return parsed.set(drivername=ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername))
+
+
+# Async engine used by the API
+async_engine = create_async_engine(
+    _async_url(settings.database_url),
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout_seconds,
+    pool_recycle=settings.db_pool_recycle_seconds,
+    pool_pre_ping=True,
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Sync engine, only for schema creation and the seed script
+engine = create_engine(settings.database_url, pool_pre_ping=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
 
-def get_db():
-    """Dependency for getting database session."""
-    db = SessionLocal()
-    try:
+async def get_db():
+    """Dependency for getting an async database session."""
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+@contextmanager
+def advisory_lock(name: str):
+    """
+    Hold a PostgreSQL session-level advisory lock for the block, so only one
+    process at a time runs it. Other databases run the block unguarded.
+    """
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+
+    key = zlib.crc32(name.encode())
+    with engine.connect() as connection:
+        connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": key})
+        connection.commit()  # Session-level: the lock outlives the transaction
+        try:
+            yield
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+            connection.commit()
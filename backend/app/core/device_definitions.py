@@ -0,0 +1,57 @@
+"""
+Device model definitions, identified by content.
+
+The hub agent computes the same hash (hub_agent/mqtt_handler.py), so after the
+first discovery it only sends the hash of definitions the backend already has.
+"""
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
+# zigbee2mqtt access bit for properties that can be set
+ACCESS_SET = 2
+
+
+def definition_hash(vendor: Optional[str], model: Optional[str], exposes: List[Any]) -> str:
+    """sha256 of the canonical JSON of (vendor, model, exposes)."""
+    canonical = json.dumps([vendor, model, exposes], sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _number(value) -> Optional[float]:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def parse_capabilities(exposes: List[Any], parent: str = "") -> Dict[str, dict]:
+    """
+    Flatten zigbee2mqtt exposes into {property path: capability}. Features of
+    specific types (switch, light, ...) are top-level properties; features of
+    composites are nested under the composite's property, e.g. "color.x".
+    """
+    capabilities = {}
+    for expose in exposes or []:
+        if not isinstance(expose, dict):
+            continue
+        if expose.get("type") == "composite":
+            prefix = ".".join(filter(None, [parent, expose.get("property")]))
+            nested = parse_capabilities(expose.get("features") or [], prefix)
+        elif expose.get("features"):
+            nested = parse_capabilities(expose["features"], parent)
+        else:
+            key = expose.get("property") or expose.get("name")
+            if not key or not expose.get("type"):
+                continue
+            path = f"{parent}.{key}" if parent else key
+            nested = {path: {
+                "property": path,
+                "name": expose.get("name"),
+                "type": expose["type"],
+                "unit": expose.get("unit"),
+                "access": expose.get("access") or 0,
+                "value_min": _number(expose.get("value_min")),
+                "value_max": _number(expose.get("value_max")),
+                "values": expose.get("values") if isinstance(expose.get("values"), list) else None,
+            }}
+        for path, capability in nested.items():
+            capabilities.setdefault(path, capability)
+    return capabilities
@@ -0,0 +1,66 @@
+"""
+Fast serialization for large responses.
+
+When an endpoint returns ORM rows with a response_model, FastAPI validates
+them into models, dumps the models to Python dicts and encodes those with the
+stdlib json module. `json_response` validates once, from attributes, and has
+pydantic-core write the JSON bytes directly, skipping the intermediate dicts
+and the second pass over the data.
+
+Enabled by the `fast_json_responses` setting. When it is off, endpoints get
+their data back unchanged and FastAPI serializes it as before. Endpoints keep
+their response_model either way, for validation and the OpenAPI schema.
+"""
+import json
+from functools import lru_cache
+from typing import Any, Optional
+import pydantic_core
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from app.core.config import get_settings
+
+settings = get_settings()
+
+
+@lru_cache(maxsize=None)
+def _adapter(annotation) -> TypeAdapter:
+    return TypeAdapter(annotation)
+
+
+def validate(annotation, data):
+    """`data` (ORM objects, rows, dicts or models) validated as `annotation`."""
+    return _adapter(annotation).validate_python(data, from_attributes=True)
+
+
+def dump_json(annotation, data) -> bytes:
+    """Validate `data` as `annotation` and serialize it to JSON."""
+    return _adapter(annotation).dump_json(validate(annotation, data))
+
+
+def _headers(response: Optional[Response]) -> dict:
+    # Headers set on the injected response (ETag, pagination) are not merged into returned responses
+    if response is None:
+        return {}
+    return {key: value for key, value in response.headers.items() if key != "content-length"}
+
+
+def json_response(annotation, data, response: Optional[Response] = None):
+    """`data` serialized as `annotation`, or `data` itself when the fast path is disabled."""
+    if not settings.fast_json_responses:
+        return data
+    return validated_json_response(annotation, data, response)
+
+
+def validated_json_response(annotation, data, response: Optional[Response] = None) -> Response:
+    """`data` validated and serialized as `annotation`, for data that doesn't match the endpoint's response_model."""
+    return Response(dump_json(annotation, data), media_type="application/json", headers=_headers(response))
+
+
+def raw_json_response(data: Any, response: Optional[Response] = None) -> Response:
+    """Data that needs no validation: dicts of columns (UUIDs, datetimes, ...) and validated models."""
+    if settings.fast_json_responses:
+        content = pydantic_core.to_json(data)
+    else:
+        content = json.dumps(jsonable_encoder(data)).encode()
+    return Response(content, media_type="application/json", headers=_headers(response))
@@ -0,0 +1,181 @@
+"""
+Admission control for hub state ingest.
+
+Each hub gets a token bucket for its whole `device_state_update` stream and one
+per device, so a single chatty sensor can't starve its hub and a flooding hub
+can't starve the others. Updates that arrive without a token are not dropped:
+they are merged into the latest pending state for that device and applied once
+tokens are available again. While a hub is being throttled the backend asks its
+agent to widen its batching window, and relaxes the window once it calms down.
+The current window is also sent whenever the agent connects, so a restart of
+either side can't leave the agent batching with a stale window.
+"""
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+from app.core.config import get_settings
+
+settings = get_settings()
+
+# Smallest window requested on the first throttle, doubled while throttling persists
+MIN_BATCH_WINDOW_MS = 250
+# Minimum time between two backpressure messages to the same hub
+BACKPRESSURE_COOLDOWN_SECONDS = 5.0
+# Quiet time after which the requested window is halved again
+BACKPRESSURE_RELAX_SECONDS = 60.0
+# How often device buckets that have refilled are dropped
+BUCKET_PRUNE_INTERVAL_SECONDS = 60.0
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, holding at most `burst`."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def has_token(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= 1.0
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+    def take(self):
+        self.tokens -= 1.0
+
+
+class HubIngestLimiter:
+    """Per-hub and per-device admission control with latest-state coalescing."""
+
+    def __init__(self):
+        self.hub_bucket = TokenBucket(settings.ingest_hub_rate, settings.ingest_hub_burst)
+        self.device_buckets: Dict[str, TokenBucket] = {}
+        self.pending: Dict[str, dict] = {}  # ieee_address -> coalesced state
+        self.batch_window_ms = 0
+        self.counters = {
+            "admitted": 0,
+            "throttled": 0,
+            "coalesced": 0,
+            "flushed": 0,
+            "backpressure_sent": 0,
+        }
+        self._last_throttle = 0.0
+        self._last_backpressure = 0.0
+        self._last_prune = time.monotonic()
+
+    def _take_tokens(self, ieee: str, now: float) -> bool:
+        device_bucket = self.device_buckets.get(ieee)
+        if device_bucket is None:
+            device_bucket = TokenBucket(settings.ingest_device_rate, settings.ingest_device_burst)
+            self.device_buckets[ieee] = device_bucket
+
+        if not (self.hub_bucket.has_token(now) and device_bucket.has_token(now)):
+            return False
+        self.hub_bucket.take()
+        device_bucket.take()
+        return True
+
+    def admit(self, ieee: str, state: Optional[dict]) -> bool:
+        """
+        Return True if the update may be applied now. Otherwise it is merged into
+        the pending state for the device and will come back out of `drain()`.
+        """
+        now = time.monotonic()
+
+        # Once a device has a pending state, newer updates must merge behind it
+        # so an older coalesced state never overwrites a newer one.
+        if ieee not in self.pending and self._take_tokens(ieee, now):
+            self.counters["admitted"] += 1
+            return True
+
+        self.counters["throttled"] += 1
+        self._last_throttle = now
+        if ieee in self.pending:
+            self.counters["coalesced"] += 1
+            self.pending[ieee].update(state or {})
+        else:
+            self.pending[ieee] = dict(state or {})
+        return False
+
+    def _prune_buckets(self, now: float):
+        """
+        Drop device buckets that have refilled. A new bucket starts full, so
+        this changes no decision, and limiters (kept across reconnects) don't
+        grow with every device a hub has ever reported.
+        """
+        if now - self._last_prune < BUCKET_PRUNE_INTERVAL_SECONDS:
+            return
+        self._last_prune = now
+        for ieee in [ieee for ieee, bucket in self.device_buckets.items() if ieee not in self.pending and bucket.is_full(now)]:
+            del self.device_buckets[ieee]
+
+    def drain(self) -> List[Tuple[str, dict]]:
+        """Pop the coalesced updates whose device and hub have tokens again."""
+        now = time.monotonic()
+        self._prune_buckets(now)
+        if not self.pending:
+            return []
+
+        ready = []
+        for ieee in list(self.pending):
+            if not self._take_tokens(ieee, now):
+                continue
+            ready.append((ieee, self.pending.pop(ieee)))
+
+        self.counters["flushed"] += len(ready)
+        return ready
+
+    def backpressure_update(self) -> Optional[int]:
+        """Return a new agent batching window (ms) to send, or None if unchanged."""
+        now = time.monotonic()
+        if now - self._last_backpressure < BACKPRESSURE_COOLDOWN_SECONDS:
+            return None
+
+        if now - self._last_throttle < BACKPRESSURE_COOLDOWN_SECONDS:
+            window = min(max(self.batch_window_ms * 2, MIN_BATCH_WINDOW_MS), settings.ingest_max_batch_window_ms)
+        elif self.batch_window_ms and now - self._last_throttle > BACKPRESSURE_RELAX_SECONDS:
+            window = self.batch_window_ms // 2
+            if window < MIN_BATCH_WINDOW_MS:
+                window = 0
+        else:
+            return None
+
+        if window == self.batch_window_ms:
+            return None
+        self.batch_window_ms = window
+        self._last_backpressure = now
+        self.counters["backpressure_sent"] += 1
+        return window
+
+    def stats(self) -> dict:
+        return {
+            **self.counters,
+            "pending": len(self.pending),
+            "device_buckets": len(self.device_buckets),
+            "batch_window_ms": self.batch_window_ms,
+        }
+
+
+# Limiters outlive connections so counters accumulate across reconnects
+_limiters: Dict[uuid.UUID, HubIngestLimiter] = {}
+
+
+def get_ingest_limiter(hub_id: uuid.UUID) -> HubIngestLimiter:
+    limiter = _limiters.get(hub_id)
+    if limiter is None:
+        limiter = HubIngestLimiter()
+        _limiters[hub_id] = limiter
+    return limiter
+
+
+def ingest_stats() -> Dict[str, dict]:
+    """Counters for every hub that has connected since startup."""
+    return {str(hub_id): limiter.stats() for hub_id, limiter in _limiters.items()}
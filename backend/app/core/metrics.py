@@ -0,0 +1,283 @@
+"""
+Request metrics in Prometheus text format.
+
+With METRICS_ENABLED, every HTTP request is recorded per route:
+
+- its latency;
+- the number and total time of the SQL statements it ran;
+- the size of the response body as sent, i.e. after compression.
+
+Routes are labelled by their template (e.g. /api/gardens/{garden_id}), so ids
+don't multiply the series. Everything is served on /metrics, along with the
+hub ingest counters.
+
+Statements are attributed to requests through a context variable set by the
+middleware. SQLAlchemy runs the async engine's events in the request's own
+context, so each request only counts its own queries.
+
+Requests slower than metrics_slow_request_ms are counted. A sample of
+requests (metrics_profile_sample_rate, 1% by default) runs under cProfile, and
+the slow ones keep their top functions by cumulative time for
+/metrics/slow-requests. The profiler sees everything the event loop runs while
+the request is in flight, other requests included, so the breakdown is
+approximate. Only one request is profiled at a time.
+
+Disabled, neither the middleware nor the engine listeners are installed, so
+requests pay nothing. Each worker process keeps its own numbers.
+"""
+import bisect
+import random
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import get_settings
+from app.core.ingest import ingest_stats
+
+settings = get_settings()
+
+PREFIX = "yieldassist_"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+PROFILE_TOP_FUNCTIONS = 25
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...]):
+        self.name, self.help, self.label_names = PREFIX + name, help, labels
+        self.values: Dict[tuple, float] = {}
+
+    def inc(self, labels: tuple, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_labels(self.label_names, labels)} {value}" for labels, value in self.values.items()]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: tuple, labels: Tuple[str, ...]):
+        self.name, self.help, self.buckets, self.label_names = PREFIX + name, help, buckets, labels
+        self.series: Dict[tuple, list] = {}  # labels -> [count per bucket (+Inf last), sum]
+
+    def observe(self, labels: tuple, value: float):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, series in self.series.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), series):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {series[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+ROUTE = ("method", "route")
+
+requests_total = Counter("http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+request_duration = Histogram("http_request_duration_seconds", "Time to respond, per route.", LATENCY_BUCKETS, ROUTE)
+request_statements = Histogram("http_request_sql_statements", "SQL statements run per request.", STATEMENT_BUCKETS, ROUTE)
+request_sql_duration = Histogram(
+    "http_request_sql_duration_seconds", "Time spent in SQL statements per request.", LATENCY_BUCKETS, ROUTE
+)
+response_size = Histogram("http_response_size_bytes", "Response body bytes as sent.", SIZE_BUCKETS, ROUTE)
+slow_requests_total = Counter("http_slow_requests_total", "Requests slower than metrics_slow_request_ms.", ROUTE)
+
+_in_flight = 0
+_slow_profiles = deque(maxlen=settings.metrics_slow_profiles_kept)
+_profiling = False
+
+
+class _RequestStats:
+    __slots__ = ("statements", "sql_seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.sql_seconds = 0.0
+
+
+_current_request: ContextVar[Optional[_RequestStats]] = ContextVar("request_metrics", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_request.get() is not None:
+        conn.info.setdefault("metrics_statement_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_request.get()
+    starts = conn.info.get("metrics_statement_start")
+    if stats is not None and starts:
+        stats.statements += 1
+        stats.sql_seconds += time.perf_counter() - starts.pop()
+
+
+def instrument_engine(engine: Engine):
+    """Count statements run on `engine` towards the request running them."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _start_profile():
+    global _profiling
+    if _profiling or random.random() >= settings.metrics_profile_sample_rate:
+        return None
+    import cProfile
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:  # Another profiler (e.g. a debugger) is active
+        return None
+    _profiling = True
+    return profiler
+
+
+def _stop_profile(profiler):
+    global _profiling
+    profiler.disable()
+    _profiling = False
+
+
+def _profile_summary(profiler) -> List[dict]:
+    import pstats
+
+    rows = sorted(pstats.Stats(profiler).stats.items(), key=lambda item: item[1][3], reverse=True)
+    return [
+        {
+            "function": f"{filename}:{line}({function})",
+            "calls": calls,
+            "own_ms": round(own * 1000, 3),
+            "cumulative_ms": round(cumulative * 1000, 3),
+        }
+        for (filename, line, function), (_, calls, own, cumulative, _) in rows[:PROFILE_TOP_FUNCTIONS]
+    ]
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        global _in_flight
+        status, size = 500, 0
+
+        async def send_measured(message: Message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        stats = _RequestStats()
+        token = _current_request.set(stats)
+        profiler = _start_profile()
+        _in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_measured)
+        finally:
+            elapsed = time.perf_counter() - start
+            _in_flight -= 1
+            _current_request.reset(token)
+            if profiler is not None:
+                _stop_profile(profiler)
+            _record(scope, status, elapsed, stats, size, profiler)
+
+
+def _route_template(scope: Scope) -> str:
+    # FastAPI keeps included routers nested, so the matched route's own path
+    # lacks the include prefix (/api); the full template is on its route context
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    return getattr(context, "path", None) or getattr(scope.get("route"), "path", None) or "unmatched"
+
+
+def _record(scope: Scope, status: int, elapsed: float, stats: _RequestStats, size: int, profiler):
+    labels = (scope["method"], _route_template(scope))
+    requests_total.inc((*labels, status))
+    request_duration.observe(labels, elapsed)
+    request_statements.observe(labels, stats.statements)
+    request_sql_duration.observe(labels, stats.sql_seconds)
+    response_size.observe(labels, size)
+
+    if elapsed * 1000 < settings.metrics_slow_request_ms:
+        return
+    slow_requests_total.inc(labels)
+    if profiler is not None:
+        _slow_profiles.append({
+            "method": labels[0],
+            "route": labels[1],
+            "path": scope["path"],
+            "status": status,
+            "at": datetime.utcnow().isoformat(),
+            "duration_ms": round(elapsed * 1000, 3),
+            "sql_statements": stats.statements,
+            "sql_ms": round(stats.sql_seconds * 1000, 3),
+            "profile": _profile_summary(profiler),
+        })
+
+
+def slow_request_profiles() -> List[dict]:
+    """Profiled slow requests, most recent first."""
+    return list(reversed(_slow_profiles))
+
+
+def _ingest_lines() -> List[str]:
+    """Hub ingest counters (see app.core.ingest), which are kept regardless of METRICS_ENABLED."""
+    events = Counter("hub_ingest_events_total", "Hub state updates by admission outcome.", ("hub", "outcome"))
+    gauges = {
+        "pending": ("hub_ingest_pending", "Coalesced state updates waiting to be written.", []),
+        "device_buckets": ("hub_ingest_device_buckets", "Per-device token buckets held by the hub's limiter.", []),
+    }
+    for hub_id, stats in ingest_stats().items():
+        for key, (name, _, samples) in gauges.items():
+            samples.append(f'{PREFIX}{name}{{hub="{hub_id}"}} {stats.pop(key)}')
+        stats.pop("batch_window_ms")
+        for outcome, count in stats.items():
+            events.inc((hub_id, outcome), count)
+    lines = events.render()
+    for name, help_text, samples in gauges.values():
+        lines += [f"# HELP {PREFIX}{name} {help_text}", f"# TYPE {PREFIX}{name} gauge", *samples]
+    return lines
+
+
+def render_metrics() -> str:
+    lines = [
+        f"# HELP {PREFIX}http_requests_in_flight Requests being handled.",
+        f"# TYPE {PREFIX}http_requests_in_flight gauge",
+        f"{PREFIX}http_requests_in_flight {_in_flight}",
+    ]
+    for metric in (requests_total, request_duration, request_statements, request_sql_duration, response_size, slow_requests_total):
+        lines += metric.render()
+    lines += _ingest_lines()
+    return "\n".join(lines) + "\n"
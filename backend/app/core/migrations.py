@@ -0,0 +1,79 @@
+"""
+Schema migrations.
+
+The schema is managed by Alembic (backend/alembic). The app upgrades the
+database to the latest revision when it starts; deployments that prefer to
+migrate as a separate step can run `alembic upgrade head` themselves and turn
+that off with RUN_MIGRATIONS_ON_STARTUP=false.
+
+Databases created by create_all before migrations existed have tables but no
+alembic_version. They are stamped at the baseline revision first, and the
+following revisions check what is already there.
+
+Alembic (with mako and pygments) takes longer to import than the rest of the
+startup work, so it is only loaded when there is something to migrate: the
+up-to-date check reads alembic_version with plain SQL.
+"""
+import hashlib
+import logging
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+from sqlalchemy import inspect, text
+from app.core.database import engine
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+VERSIONS_DIR = ALEMBIC_INI.parent / "alembic" / "versions"
+BASELINE_REVISION = "0001"
+
+
+def alembic_config(connection=None):
+    from alembic.config import Config
+
+    config = Config(str(ALEMBIC_INI))
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+@lru_cache
+def head_revision() -> str:
+    """The latest revision in backend/alembic/versions."""
+    from alembic.script import ScriptDirectory
+
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+@lru_cache
+def migrations_digest() -> str:
+    """Hash of the migration script names, which changes whenever a migration is added."""
+    names = sorted(path.name for path in VERSIONS_DIR.glob("*.py"))
+    return hashlib.sha256("\n".join(names).encode()).hexdigest()
+
+
+def current_revision(connection) -> Optional[str]:
+    """The revision the database is at, None if it isn't versioned (yet)."""
+    if not inspect(connection).has_table("alembic_version"):
+        return None
+    return connection.scalar(text("SELECT version_num FROM alembic_version"))
+
+
+def upgrade_database():
+    """Bring the database schema to the latest revision."""
+    from alembic import command
+
+    with engine.connect() as connection:
+        if current_revision(connection) == head_revision():
+            return
+        config = alembic_config(connection)
+        tables = set(inspect(connection).get_table_names())
+        # End the transaction the checks above began, so Alembic manages its own: each
+        # migration runs in a transaction (transaction_per_migration in alembic/env.py), and
+        # 0003 steps out of it with autocommit_block to build indexes concurrently
+        connection.commit()
+        if tables and "alembic_version" not in tables:
+            logger.info(f"Stamping unversioned schema at baseline revision {BASELINE_REVISION}")
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, "head")
@@ -0,0 +1,128 @@
+"""
+Keyset pagination and field projection for list endpoints.
+
+Pages are ordered by primary key and continue after the last id of the
+previous page, so every page is an index range scan no matter how deep the
+client goes (OFFSET has to walk and discard all earlier rows). Bodies stay
+plain JSON arrays; the cursor for the next page is sent in the X-Next-Cursor
+header, with a matching Link rel="next".
+
+`fields=` narrows both the SELECT and the response to the listed columns, so
+list views can skip heavy JSON columns they don't render.
+
+With the fast JSON path enabled, full listings are also selected as plain
+column rows: they already have the shape of the response, so no ORM instances
+are built for them. Rows are still validated and serialized through the
+response schema (or, for `fields=`, a schema of just those fields), so
+validators, aliases and computed fields apply as on the ORM path.
+"""
+import base64
+import binascii
+import uuid
+from functools import lru_cache
+from typing import List, Optional, Tuple, Type
+from fastapi import HTTPException, Request, Response
+from pydantic import BaseModel, create_model
+from sqlalchemy import Row, select
+from app.core.config import get_settings
+from app.core.fast_json import json_response, validate, validated_json_response
+
+settings = get_settings()
+
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(last_id: uuid.UUID) -> str:
+    return base64.urlsafe_b64encode(last_id.bytes).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> uuid.UUID:
+    try:
+        return uuid.UUID(bytes=base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> Optional[List[str]]:
+    """Validate a comma-separated `fields=` value against a response schema. Always includes id."""
+    if fields is None:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = sorted(set(requested) - set(schema.model_fields))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return ["id"] + [field for field in dict.fromkeys(requested) if field != "id"]
+
+
+def select_fields(model, schema: Type[BaseModel], fields: Optional[str]):
+    """
+    SELECT for a list of `model` rows returned as `schema`. Returns (query,
+    projected); read the result with `fetched_rows`.
+    """
+    columns = parse_fields(fields, schema)
+    if columns is None and settings.fast_json_responses:
+        columns = list(schema.model_fields)
+    if columns is None:
+        return select(model), False
+    return select(*(getattr(model, column) for column in columns)), True
+
+
+@lru_cache(maxsize=None)
+def projection_schema(schema: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """
+    `schema` itself when `fields` are all of its fields, otherwise a model of
+    just those fields, with their types, defaults and aliases. Validators that
+    need the other fields can't apply to a partial row; the list schemas used
+    with `fields=` have none.
+    """
+    if set(fields) == set(schema.model_fields):
+        return schema
+    return create_model(
+        f"{schema.__name__}Fields",
+        __config__=schema.model_config,
+        **{field: (schema.model_fields[field].annotation, schema.model_fields[field]) for field in fields},
+    )
+
+
+def _rows_annotation(schema: Type[BaseModel], rows):
+    return List[projection_schema(schema, tuple(rows[0]._fields) if rows else tuple(schema.model_fields))]
+
+
+def validate_rows(schema: Type[BaseModel], rows) -> list:
+    """Column rows of a projected query validated as `schema`, restricted to the columns they have."""
+    return validate(_rows_annotation(schema, rows), rows)
+
+
+def rows_response(schema: Type[BaseModel], rows, response: Optional[Response] = None) -> Response:
+    """Column rows of a projected query serialized as `schema`, restricted to the columns they have."""
+    return validated_json_response(_rows_annotation(schema, rows), rows, response)
+
+
+def fetched_rows(result, projected: bool):
+    """Column rows of a projected select_fields query, ORM objects otherwise. Both have attribute access."""
+    return result.all() if projected else result.scalars().all()
+
+
+def select_page(query, id_column, cursor: Optional[str], limit: Optional[int]):
+    """Order by id, start after the cursor and fetch one extra row to detect a next page."""
+    if cursor:
+        query = query.where(id_column > decode_cursor(cursor))
+    query = query.order_by(id_column)
+    return query.limit(limit + 1) if limit else query
+
+
+def page_response(request: Request, response: Response, rows, limit: Optional[int], schema: Type[BaseModel]):
+    """
+    Trim the look-ahead row and add next-page headers. Rows are ORM objects or
+    column rows of projected queries, both serialized as `schema`.
+    """
+    rows = list(rows)
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        cursor = encode_cursor(rows[-1].id)
+        response.headers["X-Next-Cursor"] = cursor
+        response.headers["Link"] = f'<{request.url.include_query_params(cursor=cursor)}>; rel="next"'
+
+    if rows and isinstance(rows[0], Row):
+        return rows_response(schema, rows, response)
+    return json_response(List[schema], rows, response)
@@ -0,0 +1,88 @@
+"""
+Device and hub presence tracking.
+
+Devices report at very different cadences (a soil sensor every hour, a plug
+every few seconds), so each device learns its typical report interval from the
+gaps between reports. A background sweeper marks devices that have missed
+several expected reports, and hubs that stopped sending heartbeats, offline
+with one bulk UPDATE per table.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Tuple
+from sqlalchemy import update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.models.hub import Hub
+from app.models.device_zigbee import ZigbeeDevice
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Weight of the newest gap in the learned interval (exponential moving average)
+REPORT_INTERVAL_SMOOTHING = 0.2
+# Gaps outside this range are bursts or outages, not the device's cadence
+MIN_LEARNED_GAP_SECONDS = 5
+MAX_LEARNED_GAP_SECONDS = 24 * 3600
+
+
+def record_device_report(device: ZigbeeDevice, now: datetime) -> None:
+    """Mark a device as seen and fold the gap since its last report into its learned interval."""
+    if device.last_seen is not None:
+        gap = (now - device.last_seen).total_seconds()
+        if MIN_LEARNED_GAP_SECONDS <= gap <= MAX_LEARNED_GAP_SECONDS:
+            if device.report_interval is None:
+                device.report_interval = gap
+            else:
+                device.report_interval += REPORT_INTERVAL_SMOOTHING * (gap - device.report_interval)
+
+    device.last_seen = now
+    device.is_online = True
+
+
+async def sweep_offline(db: AsyncSession, now: datetime | None = None) -> Tuple[int, int]:
+    """Mark overdue hubs and devices offline. Returns (hubs, devices) marked."""
+    now = now or datetime.utcnow()
+
+    hub_cutoff = now - timedelta(seconds=settings.hub_offline_after_seconds)
+    hubs = (await db.execute(
+        update(Hub)
+        .where(Hub.is_online.is_(True), Hub.last_seen < hub_cutoff)
+        .values(is_online=False)
+        .execution_options(synchronize_session=False)
+    )).rowcount
+
+    # A device is overdue once it has missed several of its expected reports.
+    # The fixed lower bound keeps the scan on the last_seen index; the per-row
+    # deadline then only has to be checked for rows already past that bound.
+    expected = func.coalesce(ZigbeeDevice.report_interval, settings.device_default_report_interval_seconds)
+    timeout = func.greatest(expected * settings.device_offline_missed_reports, settings.device_offline_min_seconds)
+    min_cutoff = now - timedelta(seconds=settings.device_offline_min_seconds)
+    devices = (await db.execute(
+        update(ZigbeeDevice)
+        .where(
+            ZigbeeDevice.is_online.is_(True),
+            ZigbeeDevice.last_seen < min_cutoff,
+            ZigbeeDevice.last_seen + func.make_interval(0, 0, 0, 0, 0, 0, timeout) < now,
+        )
+        .values(is_online=False)
+        .execution_options(synchronize_session=False)
+    )).rowcount
+
+    await db.commit()
+    return hubs, devices
+
+
+async def run_presence_sweeper():
+    """Background task: periodically mark overdue hubs and devices offline."""
+    while True:
+        await asyncio.sleep(settings.presence_sweep_interval_seconds)
+        try:
+            async with AsyncSessionLocal() as db:
+                hubs, devices = await sweep_offline(db)
+            if hubs or devices:
+                logger.info(f"Presence sweep marked {hubs} hub(s) and {devices} device(s) offline")
+        except Exception as e:
+            logger.error(f"Presence sweep failed: {e}")
@@ -0,0 +1,38 @@
+"""
+SQL statement counting for query budgets.
+
+Wraps the engine's `before_cursor_execute` event so a block of code can be
+checked against a fixed number of statements, e.g. to catch an endpoint that
+starts issuing one query per row:
+
+    with QueryCounter() as counter:
+        await get_garden(garden_id, current_user=user, db=db)
+    assert counter.count <= 2, counter.statements
+"""
+from typing import List
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.database import async_engine
+
+
+class QueryCounter:
+    """Records every SQL statement executed on `engine` while the block is active."""
+
+    def __init__(self, engine: Engine | None = None):
+        self.engine = engine if engine is not None else async_engine.sync_engine
+        self.statements: List[str] = []
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __enter__(self) -> "QueryCounter":
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
@@ -0,0 +1,38 @@
+"""
+Named revision counters.
+
+Collections without an owning row to carry a revision column (the crop
+catalogue) get a row in `revision_counters`, bumped in the same transaction as
+every write so validators derived from it change exactly when the data does.
+"""
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models.revision import RevisionCounter
+
+CROPS = "crops"
+
+
+async def get_revision(db: AsyncSession, name: str) -> int:
+    return await db.scalar(select(RevisionCounter.value).where(RevisionCounter.name == name)) or 0
+
+
+async def bump_revision(db: AsyncSession, name: str):
+    result = await db.execute(
+        update(RevisionCounter)
+        .where(RevisionCounter.name == name)
+        .values(value=RevisionCounter.value + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        # Counters are created at startup; this only covers a database seeded before they existed
+        db.add(RevisionCounter(name=name, value=1))
+
+
+def bump_revision_sync(db: Session, name: str):
+    """Same as `bump_revision`, for the seed script's sync session."""
+    counter = db.get(RevisionCounter, name)
+    if counter is None:
+        db.add(RevisionCounter(name=name, value=1))
+    else:
+        counter.value += 1
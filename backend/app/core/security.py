@@ -1,29 +1,84 @@
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from functools import lru_cache
+from typing import Callable, List, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from app.core.cache import TTLCache
 from app.core.config import get_settings
 from app.core.database import get_db
 from app.models.user import User
 
 settings = get_settings()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
+# bcrypt costs a few hundred ms of CPU per call. It runs on a small dedicated
+# pool (bcrypt releases the GIL) so sign-in bursts queue there instead of
+# blocking the event loop, and the queue itself is capped.
+_hash_executor = ThreadPoolExecutor(max_workers=settings.password_hash_workers, thread_name_prefix="password-hash")
+_hash_pending = 0
+
+# Authenticated users keyed by (user_id, token), so requests with a valid token
+# skip the user lookup. Entries live at most auth_cache_ttl_seconds, which bounds
+# how long another worker can keep serving a deleted or demoted user. They hold
+# the user's column values, not ORM instances: each request gets its own User in
+# its own session, so nothing it loads or changes is shared with other requests.
+_identity_cache = TTLCache(max_size=settings.auth_cache_max_entries, ttl=settings.auth_cache_ttl_seconds)
+_revocation_hooks: List[Callable[[uuid.UUID], None]] = []
+
+
+# passlib/bcrypt and jose/cryptography are imported on first use rather than at
+# startup: they are slow to load, and workers, the seed script and CLI tools
+# that never hash a password or touch a token shouldn't pay for them.
+@lru_cache
+def _pwd_context():
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return _pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return _pwd_context().hash(password)
+
+
+async def _run_password_hash(func, *args):
+    global _hash_pending
+    if _hash_pending >= settings.password_hash_max_pending:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-in attempts in progress, please retry",
+            headers={"Retry-After": "1"},
+        )
+    _hash_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, func, *args)
+    finally:
+        _hash_pending -= 1
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on the password hashing pool, for use in request handlers."""
+    return await _run_password_hash(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash on the password hashing pool, for use in request handlers."""
+    return await _run_password_hash(get_password_hash, password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+    from jose import jwt
+
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -36,8 +91,10 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> User:
+    from jose import JWTError, jwt
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -45,13 +102,45 @@ async def get_current_user(
     )
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        user_id: str = payload.get("sub")
-        if user_id is None:
+        sub: str = payload.get("sub")
+        if sub is None:
             raise credentials_exception
-    except JWTError:
+        user_id = uuid.UUID(sub)
+    except (JWTError, ValueError):
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == user_id).first()
+    cache_key = (user_id, token)
+    snapshot = _identity_cache.get(cache_key)
+    if snapshot is not None:
+        # Attach a fresh instance as if loaded, without querying
+        user = User(**dict(snapshot))
+        make_transient_to_detached(user)
+        return await db.merge(user, load=False)
+    
+    user = await db.get(User, user_id)
     if user is None:
         raise credentials_exception
+    
+    # Never cache past the token's own expiry
+    expires_in = payload["exp"] - time.time() if "exp" in payload else None
+    snapshot = tuple((column.key, getattr(user, column.key)) for column in User.__table__.columns)
+    _identity_cache.set(cache_key, snapshot, ttl=expires_in)
     return user
+
+
+def invalidate_cached_user(user_id: uuid.UUID):
+    """Drop cached identities for a user, e.g. after their admin flag changed."""
+    _identity_cache.pop_where(lambda key: key[0] == user_id)
+
+
+def on_user_revoked(hook: Callable[[uuid.UUID], None]) -> Callable[[uuid.UUID], None]:
+    """Register a callback run when a user is revoked (deleted). Usable as a decorator."""
+    _revocation_hooks.append(hook)
+    return hook
+
+
+def revoke_user(user_id: uuid.UUID):
+    """Forget everything cached about a deleted user in this worker."""
+    invalidate_cached_user(user_id)
+    for hook in _revocation_hooks:
+        hook(user_id)
@@ -0,0 +1,30 @@
+"""
+Database preparation when the app starts.
+
+Every worker process imports app.main, so this runs once per worker. The
+common case is a restart with nothing to do. When the stored seed fingerprint
+matches (it covers the schema revision), preparation costs a few queries, no
+writes, and doesn't load Alembic. Otherwise migrating and seeding run under a
+PostgreSQL advisory lock. The first worker does the work while the others
+wait, then find nothing left to do.
+"""
+from app.core.config import get_settings
+from app.core.database import SessionLocal, advisory_lock
+from app.core.migrations import upgrade_database
+from app.seed_crops import is_seeded, seed_database
+
+settings = get_settings()
+
+STARTUP_LOCK = "yieldassist:prepare_database"
+
+
+def prepare_database():
+    """Migrate (if enabled) and seed the database, skipping both when they are already done."""
+    with SessionLocal() as db:
+        # The seed fingerprint covers the schema revision, see app.seed_crops
+        if is_seeded(db):
+            return
+    with advisory_lock(STARTUP_LOCK):
+        if settings.run_migrations_on_startup:
+            upgrade_database()
+        seed_database()
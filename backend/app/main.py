@@ -1,20 +1,28 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.core.compression import CompressionMiddleware
 from app.core.config import get_settings
-from app.core.database import engine, Base
-from app.api import auth_router, gardens_router, beds_router, crops_router, users_router, hubs, devices, automations
-from app.seed_crops import seed_database
-
-# Import all models to ensure they're registered with Base before create_all
-from app.models import User, Garden, GardenMember, Bed, Zone, Crop, CropPlacement, Hub, ZigbeeDevice, Automation
+from app.core.database import async_engine
+from app.core.metrics import MetricsMiddleware, instrument_engine
+from app.core.presence import run_presence_sweeper
+from app.core.startup import prepare_database
+from app.api import auth_router, gardens_router, beds_router, crops_router, users_router, blobs_router, hubs, devices, automations, metrics
 
 settings = get_settings()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Migrate and seed the database, unless a previous start already did (see app.core.startup)
+prepare_database()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background presence sweeper marks silent hubs and devices offline
+    sweeper = asyncio.create_task(run_presence_sweeper())
+    yield
+    sweeper.cancel()
 
-# Seed database with admin user and default crops
-seed_database()
 
 app = FastAPI(
     title="YieldAssist API",
@@ -22,6 +30,7 @@ app = FastAPI(
     version="0.1.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # CORS middleware
@@ -31,17 +40,36 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Link"],  # Keyset pagination of list endpoints
 )
 
+# Compress JSON responses for clients that accept it
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_min_size,
+    gzip_level=settings.compression_gzip_level,
+    brotli_quality=settings.compression_brotli_quality,
+    cache_entries=settings.compression_cache_entries,
+)
+
+# Per-route latency, SQL and response size metrics on /metrics. Added last so
+# it wraps everything and measures bytes as sent.
+if settings.metrics_enabled:
+    instrument_engine(async_engine.sync_engine)
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth_router, prefix="/api")
 app.include_router(gardens_router, prefix="/api")
 app.include_router(beds_router, prefix="/api")
 app.include_router(crops_router, prefix="/api")
 app.include_router(users_router, prefix="/api")
+app.include_router(blobs_router, prefix="/api")
 app.include_router(hubs.router, prefix="/api")
 app.include_router(devices.router, prefix="/api")
 app.include_router(automations.router, prefix="/api")
+if settings.metrics_enabled:
+    app.include_router(metrics.router)
 
 
 @app.get("/")
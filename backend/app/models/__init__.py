@@ -5,8 +5,9 @@ from app.models.bed import Bed, Zone
 from app.models.crop import Crop, CropPlacement, CropStatus
 
 from app.models.hub import Hub, HubStatus
-from app.models.device_zigbee import ZigbeeDevice
+from app.models.device_zigbee import ZigbeeDevice, DeviceModelDefinition, DeviceCapability
 from app.models.automation import Automation
+from app.models.revision import RevisionCounter, AppMetadata
 
 __all__ = [
     "User",
@@ -21,5 +22,9 @@ __all__ = [
     "Hub",
     "HubStatus",
     "ZigbeeDevice",
+    "DeviceModelDefinition",
+    "DeviceCapability",
     "Automation",
+    "RevisionCounter",
+    "AppMetadata",
 ]
@@ -9,7 +9,7 @@ class Automation(Base):
     __tablename__ = "automations"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    hub_id = Column(UUID(as_uuid=True), ForeignKey("hubs.id"), nullable=False)
+    hub_id = Column(UUID(as_uuid=True), ForeignKey("hubs.id"), nullable=False, index=True)
     name = Column(String, nullable=False)
     description = Column(String, nullable=True)
     
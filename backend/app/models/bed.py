@@ -9,7 +9,7 @@ class Bed(Base):
     __tablename__ = "beds"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    garden_id = Column(UUID(as_uuid=True), ForeignKey("gardens.id"), nullable=False)
+    garden_id = Column(UUID(as_uuid=True), ForeignKey("gardens.id"), nullable=False, index=True)
     name = Column(String, nullable=False)
     width_cells = Column(Integer, nullable=False, default=4)  # in 25cm units
     height_cells = Column(Integer, nullable=False, default=8)  # in 25cm units
@@ -26,7 +26,7 @@ class Zone(Base):
     __tablename__ = "zones"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    bed_id = Column(UUID(as_uuid=True), ForeignKey("beds.id"), nullable=False)
+    bed_id = Column(UUID(as_uuid=True), ForeignKey("beds.id"), nullable=False, index=True)
     name = Column(String, nullable=False)
     cells = Column(JSON, default=list)  # Deprecated: keeping for backward compatibility
     color = Column(String, default="#4CAF50")
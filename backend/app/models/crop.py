@@ -1,9 +1,10 @@
+import hashlib
 import uuid
 from datetime import date
 from enum import Enum as PyEnum
 from sqlalchemy import Column, String, Integer, Boolean, Date, ForeignKey, Enum, JSON
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 from app.core.database import Base
 
 
@@ -20,6 +21,7 @@ class Crop(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, nullable=False)
     icon = Column(String, nullable=True) # Emoji or Base64 encoded image
+    icon_hash = Column(String(64), nullable=True)  # sha256 of image icons, served from /crops/{id}/icon
     cells_width = Column(Integer, nullable=False, default=1)  # Default cells width for placement
     cells_height = Column(Integer, nullable=False, default=1)  # Default cells height for placement
     per_cell = Column(Integer, nullable=False, default=1)  # Number of plants per cell
@@ -43,14 +45,20 @@ class Crop(Base):
     created_by_user = relationship("User", back_populates="created_crops")
     placements = relationship("CropPlacement", back_populates="crop")
 
+    @validates("icon")
+    def _hash_icon(self, key, icon):
+        # Emoji icons stay inline in crop lists; image data URLs are addressed by hash
+        self.icon_hash = hashlib.sha256(icon.encode()).hexdigest() if icon and icon.startswith("data:") else None
+        return icon
+
 
 class CropPlacement(Base):
     __tablename__ = "crop_placements"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    bed_id = Column(UUID(as_uuid=True), ForeignKey("beds.id"), nullable=False)
-    crop_id = Column(UUID(as_uuid=True), ForeignKey("crops.id"), nullable=False)
-    zone_id = Column(UUID(as_uuid=True), ForeignKey("zones.id"), nullable=True)  # Optional zone assignment
+    bed_id = Column(UUID(as_uuid=True), ForeignKey("beds.id"), nullable=False, index=True)
+    crop_id = Column(UUID(as_uuid=True), ForeignKey("crops.id"), nullable=False, index=True)
+    zone_id = Column(UUID(as_uuid=True), ForeignKey("zones.id"), nullable=True, index=True)  # Optional zone assignment
     position_x = Column(Integer, nullable=False)  # Top-left cell X
     position_y = Column(Integer, nullable=False)  # Top-left cell Y
     width_cells = Column(Integer, nullable=False, default=1)  # Area width in cells
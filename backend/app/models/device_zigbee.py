@@ -1,36 +1,77 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, String, Boolean, DateTime, Float, Integer, ForeignKey, Index, JSON
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
 
+class DeviceModelDefinition(Base):
+    """
+    A zigbee2mqtt device definition, stored once per distinct (vendor, model,
+    exposes) and keyed by its hash, so identical devices share one row.
+    """
+    __tablename__ = "device_model_definitions"
+
+    hash = Column(String(64), primary_key=True)
+    vendor = Column(String, nullable=True)
+    model = Column(String, nullable=True)
+    exposes = Column(JSON, nullable=False, default=list)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    capabilities = relationship("DeviceCapability", cascade="all, delete-orphan")
+
+
+class DeviceCapability(Base):
+    """
+    One property a definition exposes, flattened out of the nested exposes JSON
+    (composite properties as dotted paths) so devices can be found by what
+    they report or control without loading and walking exposes.
+    """
+    __tablename__ = "device_capabilities"
+
+    definition_hash = Column(String(64), ForeignKey("device_model_definitions.hash"), primary_key=True)
+    property = Column(String, primary_key=True, index=True)
+    name = Column(String, nullable=True)
+    type = Column(String, nullable=False)  # numeric, binary, enum, text, list
+    unit = Column(String, nullable=True)
+    access = Column(Integer, nullable=False, default=0)  # zigbee2mqtt bits: 1 state, 2 set, 4 get
+    value_min = Column(Float, nullable=True)
+    value_max = Column(Float, nullable=True)
+    values = Column(JSON, nullable=True)  # Allowed values of enums
+
+
 class ZigbeeDevice(Base):
     __tablename__ = "zigbee_devices"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    hub_id = Column(UUID(as_uuid=True), ForeignKey("hubs.id"), nullable=False)
-    zone_id = Column(UUID(as_uuid=True), ForeignKey("zones.id"), nullable=True)
+    hub_id = Column(UUID(as_uuid=True), ForeignKey("hubs.id"), nullable=False, index=True)
+    zone_id = Column(UUID(as_uuid=True), ForeignKey("zones.id"), nullable=True, index=True)
     ieee_address = Column(String, nullable=False, unique=True)
     friendly_name = Column(String, nullable=True)
     model = Column(String, nullable=True)
     vendor = Column(String, nullable=True)
     description = Column(String, nullable=True)
-    exposes = Column(JSON, default=list)
-    is_online = Column(Boolean, default=False)
+    definition_hash = Column(String(64), ForeignKey("device_model_definitions.hash"), nullable=True, index=True)
+    is_online = Column(Boolean, default=False, index=True)
     is_tracked = Column(Boolean, default=False)
     state = Column(JSON, default={})
-    last_seen = Column(DateTime, nullable=True)
+    last_seen = Column(DateTime, nullable=True, index=True)
+    report_interval = Column(Float, nullable=True)  # Learned seconds between reports
 
     # Relationships
     hub = relationship("Hub", back_populates="zigbee_devices")
     zone = relationship("Zone", back_populates="zigbee_devices")
+    definition = relationship("DeviceModelDefinition")
     history = relationship("DeviceStateHistory", back_populates="device", cascade="all, delete-orphan")
 
 
 class DeviceStateHistory(Base):
     __tablename__ = "device_state_history"
+    __table_args__ = (
+        # A device's history, in time order
+        Index("ix_device_state_history_device_id_timestamp", "device_id", "timestamp"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     device_id = Column(UUID(as_uuid=True), ForeignKey("zigbee_devices.id"), nullable=False)
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 from enum import Enum as PyEnum
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -20,9 +20,13 @@ class Garden(Base):
     name = Column(String, nullable=False)
     width_meters = Column(Integer, nullable=False, default=10)
     height_meters = Column(Integer, nullable=False, default=10)
-    preview_image = Column(String, nullable=True)  # Base64 or URL for garden preview
+    preview_image = Column(String, nullable=True)  # External preview URL; uploads go to the blob store
+    preview_hash = Column(String(64), nullable=True)  # Blob hash of the uploaded preview
+    preview_thumb_hash = Column(String(64), nullable=True)  # Blob hash of its thumbnail
     created_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Bumped on every change to the garden's layout, beds, zones, placements or assigned devices
+    revision = Column(Integer, nullable=False, default=0, server_default="0")
     
     # Relationships
     members = relationship("GardenMember", back_populates="garden", cascade="all, delete-orphan")
@@ -31,10 +35,14 @@ class Garden(Base):
 
 class GardenMember(Base):
     __tablename__ = "garden_members"
+    __table_args__ = (
+        # Role checks look up a user's membership of one garden
+        Index("ix_garden_members_garden_id_user_id", "garden_id", "user_id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     garden_id = Column(UUID(as_uuid=True), ForeignKey("gardens.id"), nullable=False)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
     role = Column(Enum(MemberRole), default=MemberRole.EDITOR)
     invited_at = Column(DateTime, default=datetime.utcnow)
     accepted_at = Column(DateTime, nullable=True)
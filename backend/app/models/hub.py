@@ -1,7 +1,6 @@
 import uuid
-from datetime import datetime
 from enum import Enum as PyEnum
-from sqlalchemy import Column, String, DateTime, ForeignKey, Enum, Boolean, JSON
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Enum, Boolean, JSON
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -21,18 +20,12 @@ class Hub(Base):
     name = Column(String, nullable=True)
     ip_address = Column(String, nullable=True)
     status = Column(Enum(HubStatus), default=HubStatus.PENDING, nullable=False)
-    last_seen = Column(DateTime, nullable=True)
+    last_seen = Column(DateTime, nullable=True, index=True)
+    is_online = Column(Boolean, default=False, nullable=False, index=True)  # Maintained by the presence sweeper
     user_email = Column(String, nullable=True)
     access_token = Column(String, nullable=True)  # Store generated token for validation
+    devices_revision = Column(Integer, nullable=False, default=0, server_default="0")  # Bumped when device metadata changes
     
     # Relationships
     zigbee_devices = relationship("ZigbeeDevice", back_populates="hub", cascade="all, delete-orphan")
     automations = relationship("Automation", back_populates="hub", cascade="all, delete-orphan")
-
-    @property
-    def is_online(self):
-        if not self.last_seen:
-            return False
-        # Consider online if seen within last 2 minutes
-        delta = datetime.utcnow() - self.last_seen
-        return delta.total_seconds() < 120
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, Integer
+from app.core.database import Base
+
+
+class RevisionCounter(Base):
+    """Named change counters for collections that have no owning row, e.g. the crop catalogue."""
+    __tablename__ = "revision_counters"
+
+    name = Column(String, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+
+class AppMetadata(Base):
+    """Key/value facts about the database itself, e.g. which seed data it holds."""
+    __tablename__ = "app_metadata"
+
+    key = Column(String, primary_key=True)
+    value = Column(String, nullable=False)
@@ -6,6 +6,7 @@ from app.schemas.garden import (
     GardenResponse,
     GardenListItem,
     GardenMemberResponse,
+    GardenSnapshot,
 )
 from app.schemas.bed import (
     BedCreate,
@@ -19,9 +20,11 @@ from app.schemas.crop import (
     CropCreate,
     CropUpdate,
     CropResponse,
+    CropListItem,
     CropPlacementCreate,
     CropPlacementUpdate,
     CropPlacementResponse,
+    CropPlacementSummary,
 )
 
 __all__ = [
@@ -34,6 +37,7 @@ __all__ = [
     "GardenResponse",
     "GardenListItem",
     "GardenMemberResponse",
+    "GardenSnapshot",
     "BedCreate",
     "BedUpdate",
     "BedResponse",
@@ -43,7 +47,9 @@ __all__ = [
     "CropCreate",
     "CropUpdate",
     "CropResponse",
+    "CropListItem",
     "CropPlacementCreate",
     "CropPlacementUpdate",
     "CropPlacementResponse",
+    "CropPlacementSummary",
 ]
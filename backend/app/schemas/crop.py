@@ -1,7 +1,7 @@
 from datetime import date
 from typing import Optional, Dict, Any
 from uuid import UUID
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
 from app.models.crop import CropStatus
 
 
@@ -52,11 +52,22 @@ class CropResponse(CropBase):
     created_by: Optional[UUID] = None
     is_public: bool
     is_approved: bool
+    icon_hash: Optional[str] = None
 
     class Config:
         from_attributes = True
 
 
+class CropListItem(CropResponse):
+    """Crop as embedded in lists: image icons are left out, fetch them from /crops/{id}/icon."""
+
+    @model_validator(mode="after")
+    def _drop_image_icon(self):
+        if self.icon_hash:
+            self.icon = None
+        return self
+
+
 class CropPlacementBase(BaseModel):
     position_x: int
     position_y: int
@@ -86,12 +97,22 @@ class CropPlacementUpdate(BaseModel):
     status: Optional[CropStatus] = None
 
 
+class CropPlacementSummary(CropPlacementBase):
+    """Placement without its nested crop, for payloads that list crops separately."""
+    id: UUID
+    bed_id: UUID
+    crop_id: UUID
+
+    class Config:
+        from_attributes = True
+
+
 class CropPlacementResponse(CropPlacementBase):
     id: UUID
     bed_id: UUID
     crop_id: UUID
     zone_id: Optional[UUID] = None
-    crop: CropResponse
+    crop: CropListItem
 
     class Config:
         from_attributes = True
@@ -9,8 +9,7 @@ class ZigbeeDeviceBase(BaseModel):
     model: Optional[str] = None
     vendor: Optional[str] = None
     description: Optional[str] = None
-    exposes: List[Any] = []
-    exposes: List[Any] = []
+    definition_hash: Optional[str] = None
     is_online: bool = False
     is_tracked: bool = False
     state: Optional[dict] = {}
@@ -33,6 +32,43 @@ class ZigbeeDeviceResponse(ZigbeeDeviceBase):
     hub_id: UUID4
     zone_id: Optional[UUID4]
     last_seen: Optional[datetime]
+    report_interval: Optional[float] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ZigbeeDeviceSummary(BaseModel):
+    """Identity and placement of a device, without its live state."""
+    id: UUID4
+    hub_id: UUID4
+    zone_id: Optional[UUID4]
+    ieee_address: str
+    friendly_name: Optional[str] = None
+    model: Optional[str] = None
+    vendor: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class DeviceModelDefinitionResponse(BaseModel):
+    hash: str
+    vendor: Optional[str] = None
+    model: Optional[str] = None
+    exposes: List[Any] = []
 
     class Config:
         from_attributes = True
+
+
+class DeviceCapabilityResponse(BaseModel):
+    device_id: UUID4
+    property: str
+    name: Optional[str] = None
+    type: str
+    unit: Optional[str] = None
+    access: int = 0
+    value_min: Optional[float] = None
+    value_max: Optional[float] = None
+    values: Optional[List[Any]] = None
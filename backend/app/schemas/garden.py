@@ -3,13 +3,16 @@ from typing import Optional, List
 from uuid import UUID
 from pydantic import BaseModel
 from app.models.garden import MemberRole
+from app.schemas.bed import BedResponse, ZoneResponse
+from app.schemas.crop import CropListItem, CropPlacementSummary
+from app.schemas.device_zigbee import ZigbeeDeviceSummary
 
 
 class GardenBase(BaseModel):
     name: str
     width_meters: int = 10
     height_meters: int = 10
-    preview_image: Optional[str] = None
+    preview_image: Optional[str] = None  # Image URL; requests may upload a data URL instead
 
 
 class GardenCreate(GardenBase):
@@ -40,6 +43,7 @@ class GardenResponse(GardenBase):
     id: UUID
     created_by: UUID
     created_at: datetime
+    preview_thumbnail: Optional[str] = None
     members: List[GardenMemberResponse] = []
 
     class Config:
@@ -49,7 +53,22 @@ class GardenResponse(GardenBase):
 class GardenListItem(GardenBase):
     id: UUID
     created_at: datetime
+    preview_thumbnail: Optional[str] = None
     role: MemberRole  # User's role in this garden
 
     class Config:
         from_attributes = True
+
+
+class GardenSnapshot(BaseModel):
+    """Everything the planner needs for one garden, normalized by id."""
+    id: UUID
+    name: str
+    width_meters: int
+    height_meters: int
+    revision: int
+    beds: List[BedResponse] = []
+    zones: List[ZoneResponse] = []
+    placements: List[CropPlacementSummary] = []
+    crops: List[CropListItem] = []  # Only crops referenced by placements
+    devices: List[ZigbeeDeviceSummary] = []  # Devices assigned to the garden's zones
@@ -14,6 +14,8 @@ class UserCreate(UserBase):
 
 
 class UserResponse(UserBase):
+    # Checked on the way in; the configured admin address (e.g. admin@yieldassist.local) needn't pass
+    email: str
     id: UUID
     is_global_admin: bool
     created_at: datetime
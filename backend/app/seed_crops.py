@@ -1,8 +1,16 @@
 """
 Seed data for common vegetables and crops.
 Run with: python -m app.seed_crops
+
+Startup only seeds when something the seed depends on changed: the database
+records a fingerprint of the seed crops, the admin account and the schema
+revision, and seeding is skipped while it matches. Running this module seeds
+unconditionally.
 """
+import hashlib
+import json
 from app.core.database import SessionLocal
+from app.core.revisions import CROPS, bump_revision_sync
 from app.models.crop import Crop
 
 # Spacing values: spacing_cm = in-row (between plants), row_spacing_cm = between rows
@@ -265,19 +273,62 @@ SEED_CROPS = [
 ]
 
 
-def seed_database():
-    """Seed the database with default admin user and initial crops."""
+SEED_FINGERPRINT_KEY = "seed_fingerprint"
+
+
+def seed_fingerprint(db) -> str:
+    """
+    Hash of everything seeding depends on. The schema (the migrations there are
+    and the revision the database is at) is part of it because migrations can
+    add crop columns that the seed fills in.
+    """
+    from app.core.config import get_settings
+    from app.core.migrations import current_revision, migrations_digest
+
+    settings = get_settings()
+    payload = {
+        "crops": SEED_CROPS,
+        "admin": settings.admin_email,
+        "migrations": migrations_digest(),
+        "schema": current_revision(db.connection()),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+def is_seeded(db) -> bool:
+    """Whether the database holds this seed, for a fully migrated schema. Checked without loading Alembic."""
+    from sqlalchemy import inspect
+    from app.core.migrations import current_revision
+    from app.models.revision import AppMetadata
+
+    connection = db.connection()
+    # Databases at a revision before app_metadata existed need migrating first
+    if current_revision(connection) is None or not inspect(connection).has_table(AppMetadata.__tablename__):
+        return False
+    stored = db.get(AppMetadata, SEED_FINGERPRINT_KEY)
+    return stored is not None and stored.value == seed_fingerprint(db)
+
+
+def seed_database(force: bool = False):
+    """Seed the database with default admin user and initial crops, unless it already holds this seed."""
     from app.core.config import get_settings
     from app.models.user import User
-    from app.core.security import get_password_hash
+    from app.core.migrations import current_revision, head_revision
+    from app.models.revision import AppMetadata
     
     settings = get_settings()
     
     db = SessionLocal()
     try:
+        if not force and is_seeded(db):
+            print("ℹ️  Seed data up to date")
+            return
+        
         # Create admin user if not exists
         existing_admin = db.query(User).filter(User.email == settings.admin_email).first()
         if not existing_admin and settings.admin_email and settings.admin_password:
+            from app.core.security import get_password_hash
+            
             admin_user = User(
                 email=settings.admin_email,
                 password_hash=get_password_hash(settings.admin_password),
@@ -290,19 +341,32 @@ def seed_database():
         else:
             print(f"ℹ️  Admin user already exists or not configured: {settings.admin_email}")
         
-        # Seed crops
+        # Seed crops, loading all existing ones in one query and only writing what differs
+        existing_crops = {}
+        for crop in db.query(Crop).filter(Crop.name.in_([crop_data["name"] for crop_data in SEED_CROPS])):
+            existing_crops.setdefault(crop.name, crop)
+        crops_changed = False
         for crop_data in SEED_CROPS:
-            existing = db.query(Crop).filter(Crop.name == crop_data["name"]).first()
+            existing = existing_crops.get(crop_data["name"])
             if not existing:
                 crop = Crop(**crop_data)
                 db.add(crop)
+                crops_changed = True
                 print(f"✅ Added crop: {crop_data['name']}")
-            else:
-                # Update existing crop with new fields
-                for key, value in crop_data.items():
+                continue
+            changes = {key: value for key, value in crop_data.items() if getattr(existing, key) != value}
+            if changes:
+                for key, value in changes.items():
                     setattr(existing, key, value)
+                crops_changed = True
                 print(f"↻  Updated crop: {crop_data['name']}")
         
+        # Cached crop lists must revalidate when seeding changed the catalogue
+        if crops_changed:
+            bump_revision_sync(db, CROPS)
+        # Only a fully migrated database counts as seeded, so a later start still migrates it
+        if current_revision(db.connection()) == head_revision():
+            db.merge(AppMetadata(key=SEED_FINGERPRINT_KEY, value=seed_fingerprint(db)))
         db.commit()
         print("✅ Database seeding complete!")
         
@@ -311,4 +375,4 @@ def seed_database():
 
 
 if __name__ == "__main__":
-    seed_database()
+    seed_database(force=True)
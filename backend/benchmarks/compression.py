@@ -0,0 +1,93 @@
+"""
+Transfer size and server time with response compression.
+
+Builds the same representative garden and hub as conditional_get.py, plus a
+set of automations, and fetches the large read endpoints with each
+Accept-Encoding the SPA may send: identity (before), gzip and br (after).
+Prints the bytes on the wire, the ratio to identity and mean latency.
+ETagged responses are served from the compressed-bytes cache after the
+first request, so their latency shows the cached cost.
+
+Runs the app in-process over ASGI (needs httpx). Point DATABASE_URL at a
+scratch database; importing the app creates the schema and seeds crops.
+
+Run from backend/:
+    python -m benchmarks.compression --beds 12 --devices 40
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from app.main import app
+from app.core.database import AsyncSessionLocal
+from app.core.security import create_access_token
+from app.models import Automation
+from benchmarks.conditional_get import _seed
+
+ENCODINGS = ("identity", "gzip", "br")
+
+
+async def _seed_automations(hub_id, count):
+    async with AsyncSessionLocal() as db:
+        for a in range(count):
+            db.add(Automation(
+                hub_id=hub_id, name=f"Water bed {a}", description="Water when the soil is dry",
+                triggers=[{"type": "state", "device_id": f"0x{a:016x}", "entity": "soil_moisture", "operator": "<", "value": 30}],
+                conditions=[{"type": "time", "after": "06:00:00", "before": "20:00:00"}],
+                actions=[
+                    {"type": "device_command", "device_id": f"0x{a + 1:016x}", "command": {"state": "ON"}},
+                    {"type": "delay", "seconds": 300},
+                    {"type": "device_command", "device_id": f"0x{a + 1:016x}", "command": {"state": "OFF"}},
+                ],
+            ))
+        await db.commit()
+
+
+async def _measure(client, url, headers, encoding, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        response = await client.get(url, headers={**headers, "Accept-Encoding": encoding})
+        samples.append(time.perf_counter() - start)
+        response.raise_for_status()
+    assert response.headers.get("content-encoding", "identity") in (encoding, "identity"), response.headers
+    return int(response.headers["content-length"]), statistics.mean(samples) * 1000
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--beds", type=int, default=12)
+    parser.add_argument("--devices", type=int, default=40)
+    parser.add_argument("--automations", type=int, default=30)
+    parser.add_argument("--rounds", type=int, default=50, help="requests per measurement")
+    args = parser.parse_args()
+
+    user_id, garden_id, hub_id = await _seed(args.beds, args.devices)
+    await _seed_automations(hub_id, args.automations)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+    endpoints = [
+        "/api/crops/",
+        f"/api/gardens/{garden_id}/snapshot",
+        f"/api/crops/placements/garden/{garden_id}",
+        f"/api/hubs/{hub_id}/devices",
+        f"/api/devices?hub={hub_id}",
+        f"/api/hubs/{hub_id}/automations",
+    ]
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{'endpoint':34} {'encoding':>8} {'bytes':>8} {'ratio':>6} {'ms':>7}")
+        for url in endpoints:
+            label = url.replace(str(garden_id), "{id}").replace(str(hub_id), "{id}")
+            identity = None
+            for encoding in ENCODINGS:
+                size, ms = await _measure(client, url, headers, encoding, args.rounds)
+                identity = identity or size
+                print(f"{label:34} {encoding:>8} {size:8d} {identity / size:5.1f}x {ms:7.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,129 @@
+"""
+Bytes and latency saved by conditional GETs.
+
+Builds a representative garden (beds with zones and placements, a hub with
+devices carrying exposes and state) and fetches each read endpoint the way the
+SPA does on navigation: once cold, then repeatedly with the ETag it got back.
+Prints response size and mean latency for full responses versus 304s.
+
+Runs the app in-process over ASGI (needs httpx). Point DATABASE_URL at a
+scratch database; importing the app creates the schema and seeds crops.
+
+Run from backend/:
+    python -m benchmarks.conditional_get --beds 12 --devices 40
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from datetime import datetime
+
+import httpx
+
+from app.main import app
+from app.core.database import AsyncSessionLocal
+from app.core.device_definitions import definition_hash
+from app.core.security import create_access_token
+from app.models import User, Garden, GardenMember, MemberRole, Bed, Zone, Crop, CropPlacement, Hub, HubStatus, ZigbeeDevice, DeviceModelDefinition
+from sqlalchemy import select
+
+EXPOSES = [
+    {"type": "numeric", "name": "soil_moisture", "property": "soil_moisture", "access": 1, "unit": "%", "value_min": 0, "value_max": 100},
+    {"type": "numeric", "name": "temperature", "property": "temperature", "access": 1, "unit": "°C"},
+    {"type": "numeric", "name": "battery", "property": "battery", "access": 1, "unit": "%"},
+    {"type": "numeric", "name": "linkquality", "property": "linkquality", "access": 1, "unit": "lqi"},
+]
+
+
+async def _seed(beds, devices):
+    tag = uuid.uuid4().hex[:8]
+    async with AsyncSessionLocal() as db:
+        user = User(email=f"bench-{tag}@example.com", name="Bench", password_hash="x")
+        db.add(user)
+        await db.flush()
+        garden = Garden(name=f"Bench {tag}", width_meters=20, height_meters=15, created_by=user.id)
+        db.add(garden)
+        await db.flush()
+        db.add(GardenMember(garden_id=garden.id, user_id=user.id, role=MemberRole.ADMIN))
+
+        crops = (await db.scalars(select(Crop).limit(12))).all()
+        zones = []
+        for b in range(beds):
+            bed = Bed(garden_id=garden.id, name=f"Bed {b}", width_cells=4, height_cells=8, position_x=b * 2)
+            db.add(bed)
+            await db.flush()
+            bed_zones = [Zone(bed_id=bed.id, name=f"Zone {z}", color="#4CAF50") for z in range(3)]
+            db.add_all(bed_zones)
+            await db.flush()
+            zones.extend(bed_zones)
+            for p in range(8):
+                db.add(CropPlacement(
+                    bed_id=bed.id, crop_id=crops[p % len(crops)].id, zone_id=bed_zones[p % 3].id,
+                    position_x=p % 4, position_y=p // 4 * 2, width_cells=1, height_cells=2,
+                ))
+
+        hub = Hub(name=f"bench-{tag}", status=HubStatus.APPROVED, is_online=True, last_seen=datetime.utcnow())
+        db.add(hub)
+        digest = definition_hash("TuYa", "TS0601_soil", EXPOSES)
+        if not await db.get(DeviceModelDefinition, digest):
+            db.add(DeviceModelDefinition(hash=digest, vendor="TuYa", model="TS0601_soil", exposes=EXPOSES))
+        await db.flush()
+        for d in range(devices):
+            db.add(ZigbeeDevice(
+                hub_id=hub.id, zone_id=zones[d % len(zones)].id, ieee_address=f"0x{tag}{d:08x}",
+                friendly_name=f"Sensor {d}", model="TS0601_soil", vendor="TuYa",
+                description="Soil moisture sensor", definition_hash=digest, is_online=True, last_seen=datetime.utcnow(),
+                state={"soil_moisture": 41, "temperature": 18.5, "battery": 87, "linkquality": 120},
+            ))
+        await db.commit()
+        return user.id, garden.id, hub.id
+
+
+async def _measure(client, url, headers, rounds):
+    first = await client.get(url, headers=headers)
+    first.raise_for_status()
+    etag = first.headers["etag"]
+
+    async def timed(extra):
+        samples = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            response = await client.get(url, headers={**headers, **extra})
+            samples.append(time.perf_counter() - start)
+        return response, statistics.mean(samples) * 1000
+
+    full, full_ms = await timed({})
+    revalidated, revalidated_ms = await timed({"If-None-Match": etag})
+    assert revalidated.status_code == 304, (url, revalidated.status_code)
+    return len(full.content), full_ms, len(revalidated.content), revalidated_ms
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--beds", type=int, default=12)
+    parser.add_argument("--devices", type=int, default=40)
+    parser.add_argument("--rounds", type=int, default=100, help="requests per measurement")
+    args = parser.parse_args()
+
+    user_id, garden_id, hub_id = await _seed(args.beds, args.devices)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+    endpoints = [
+        "/api/crops/",
+        f"/api/gardens/{garden_id}",
+        f"/api/gardens/{garden_id}/snapshot",
+        f"/api/beds/garden/{garden_id}",
+        f"/api/hubs/{hub_id}/devices",
+    ]
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{'endpoint':34} {'200 bytes':>10} {'200 ms':>8} {'304 bytes':>10} {'304 ms':>8}")
+        for url in endpoints:
+            size, full_ms, size_304, ms_304 = await _measure(client, url, headers, args.rounds)
+            label = url.replace(str(garden_id), "{id}").replace(str(hub_id), "{id}")
+            print(f"{label:34} {size:10d} {full_ms:8.2f} {size_304:10d} {ms_304:8.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+"""
+Throughput of GET /devices with and without the fast JSON path.
+
+Seeds a hub with N devices (a handful of interned definitions, realistic
+state) and fetches the full device list repeatedly, first with
+`fast_json_responses` off (FastAPI validates, converts to dicts and encodes
+with the stdlib json module) and then on (one validation, JSON written by
+pydantic-core). Checks both produce the same JSON and prints requests/s.
+
+Runs the app in-process over ASGI (needs httpx). Point DATABASE_URL at a
+scratch database; importing the app creates the schema and seeds crops.
+
+Run from backend/:
+    python -m benchmarks.device_list --devices 1000
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime
+
+import httpx
+
+from app.main import app
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.core.device_definitions import definition_hash, parse_capabilities
+from app.models import Hub, HubStatus, ZigbeeDevice, DeviceModelDefinition, DeviceCapability
+
+settings = get_settings()
+
+MODELS = [
+    ("TuYa", "TS0601_soil", [
+        {"type": "numeric", "name": "soil_moisture", "property": "soil_moisture", "access": 1, "unit": "%", "value_min": 0, "value_max": 100},
+        {"type": "numeric", "name": "temperature", "property": "temperature", "access": 1, "unit": "°C"},
+        {"type": "numeric", "name": "battery", "property": "battery", "access": 1, "unit": "%"},
+    ]),
+    ("IKEA", "E1603", [
+        {"type": "switch", "features": [{"type": "binary", "name": "state", "property": "state", "access": 7, "value_on": "ON", "value_off": "OFF"}]},
+        {"type": "enum", "name": "power_on_behavior", "property": "power_on_behavior", "access": 7, "values": ["off", "on", "toggle", "previous"]},
+    ]),
+    ("Xiaomi", "WSDCGQ11LM", [
+        {"type": "numeric", "name": "temperature", "property": "temperature", "access": 1, "unit": "°C"},
+        {"type": "numeric", "name": "humidity", "property": "humidity", "access": 1, "unit": "%"},
+        {"type": "numeric", "name": "pressure", "property": "pressure", "access": 1, "unit": "hPa"},
+    ]),
+]
+
+
+async def _seed(count):
+    tag = uuid.uuid4().hex[:8]
+    async with AsyncSessionLocal() as db:
+        hub = Hub(name=f"bench-{tag}", status=HubStatus.APPROVED, is_online=True, last_seen=datetime.utcnow())
+        db.add(hub)
+        hashes = []
+        for vendor, model, exposes in MODELS:
+            digest = definition_hash(vendor, model, exposes)
+            hashes.append((digest, model, vendor))
+            if not await db.get(DeviceModelDefinition, digest):
+                db.add(DeviceModelDefinition(
+                    hash=digest, vendor=vendor, model=model, exposes=exposes,
+                    capabilities=[DeviceCapability(**c) for c in parse_capabilities(exposes).values()],
+                ))
+        await db.flush()
+        for d in range(count):
+            digest, model, vendor = hashes[d % len(hashes)]
+            db.add(ZigbeeDevice(
+                hub_id=hub.id, ieee_address=f"0x{tag}{d:08x}", friendly_name=f"Device {d}",
+                model=model, vendor=vendor, definition_hash=digest, is_online=True, last_seen=datetime.utcnow(),
+                state={"temperature": 18.5, "humidity": 61, "battery": 87, "linkquality": 120, "state": "ON"},
+            ))
+        await db.commit()
+        return hub.id
+
+
+async def _throughput(client, url, seconds):
+    requests, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        (await client.get(url)).raise_for_status()
+        requests += 1
+    return requests / (time.perf_counter() - start)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=1000)
+    parser.add_argument("--seconds", type=float, default=5.0, help="duration of each measurement")
+    args = parser.parse_args()
+
+    hub_id = await _seed(args.devices)
+    url = f"/api/devices?hub={hub_id}"
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        results = {}
+        for fast in (False, True):
+            settings.fast_json_responses = fast
+            body = (await client.get(url)).json()
+            assert len(body) == args.devices, len(body)
+            results[fast] = body, await _throughput(client, url, args.seconds)
+
+    assert results[False][0] == results[True][0], "fast path changed the response"
+    slow, fast = results[False][1], results[True][1]
+    print(f"GET /devices with {args.devices} devices")
+    print(f"{'response_model':16} {slow:8.1f} req/s")
+    print(f"{'fast_json':16} {fast:8.1f} req/s  ({fast / slow:.2f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+"""
+Login latency under concurrent sign-ins.
+
+Simulates a burst of logins (e.g. a class signing in at once) while a probe
+coroutine stands in for everything else the worker serves (hub ingest, page
+loads): it sleeps 10 ms in a loop and records how late it wakes up. Runs the
+burst twice, once verifying passwords inline on the event loop and once on the
+password hashing pool, and prints login and probe latency percentiles.
+
+Run from backend/:
+    python -m benchmarks.login_concurrency --logins 30
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.core.security import get_password_hash, verify_password, verify_password_async
+
+PROBE_INTERVAL = 0.01
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def _login_inline(password, hashed):
+    verify_password(password, hashed)
+
+
+async def _login_offloaded(password, hashed):
+    await verify_password_async(password, hashed)
+
+
+async def _run_burst(login, logins, password, hashed):
+    lags = []
+    done = asyncio.Event()
+
+    async def probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(PROBE_INTERVAL)
+            lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+    # All logins arrive together, so latency includes time spent waiting in line
+    async def timed_login():
+        await login(password, hashed)
+        return time.perf_counter() - started
+
+    probe_task = asyncio.create_task(probe())
+    await asyncio.sleep(PROBE_INTERVAL * 2)
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(timed_login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await probe_task
+    return latencies, lags, elapsed
+
+
+def _report(name, latencies, lags, elapsed):
+    ms = lambda seconds: f"{seconds * 1000:8.1f} ms"
+    print(f"{name}")
+    print(f"  burst wall time     {ms(elapsed)}")
+    print(f"  login p50 / p99     {ms(statistics.median(latencies))} / {ms(_percentile(latencies, 99))}")
+    print(f"  probe lag p50 / max {ms(statistics.median(lags))} / {ms(max(lags))}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=30, help="concurrent logins in the burst")
+    args = parser.parse_args()
+
+    password = "correct horse battery staple"
+    hashed = get_password_hash(password)
+
+    for name, login in (("inline (event loop)", _login_inline), ("offloaded (hash pool)", _login_offloaded)):
+        latencies, lags, elapsed = await _run_burst(login, args.logins, password, hashed)
+        _report(f"{name}, {args.logins} concurrent logins", latencies, lags, elapsed)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
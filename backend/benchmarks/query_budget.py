@@ -0,0 +1,133 @@
+"""
+SQL statement budgets for the garden read endpoints.
+
+Builds a garden shared by many members, with beds, zones and placements, then
+calls each read endpoint and checks how many statements it ran. Budgets are
+fixed: they must not grow with the number of members, gardens, beds or
+placements, so any endpoint that regresses to a query per row fails the run
+with a non-zero exit code and the offending statements.
+
+Access caches are cleared before every call, so each budget includes the
+membership check an endpoint pays on a cold cache. Point DATABASE_URL at a
+scratch database; the data is created fresh and removed afterwards.
+
+Run from backend/:
+    python -m benchmarks.query_budget --members 25 --beds 10
+"""
+import argparse
+import asyncio
+import sys
+import uuid
+
+from fastapi import Response
+from sqlalchemy import delete
+from starlette.requests import Request
+
+from app.core import access_cache
+from app.core.database import AsyncSessionLocal
+from app.core.migrations import upgrade_database
+from app.core.querycount import QueryCounter
+from app.models import User, Garden, GardenMember, MemberRole, Bed, Zone, Crop, CropPlacement
+from app.api.gardens import list_gardens, get_garden, get_garden_snapshot
+from app.api.beds import list_beds, list_zones
+from app.api.crops import list_crop_placements, list_garden_placements
+
+# endpoint -> maximum SQL statements per call
+BUDGETS = {
+    "GET /gardens": 1,
+    "GET /gardens/{id}": 3,
+    "GET /gardens/{id}/snapshot": 7,
+    "GET /beds/garden/{id}": 3,
+    "GET /beds/{id}/zones": 3,
+    "GET /crops/placements/bed/{id}": 4,
+    "GET /crops/placements/garden/{id}": 3,
+}
+
+
+def _request():
+    return Request({"type": "http", "headers": []})
+
+
+async def _seed(db, members, beds, gardens):
+    tag = uuid.uuid4().hex[:8]
+    users = [User(email=f"budget-{tag}-{i}@example.com", name=f"Member {i}", password_hash="x") for i in range(members)]
+    db.add_all(users)
+    await db.flush()
+
+    owned = [Garden(name=f"Budget {tag} {i}", created_by=users[0].id) for i in range(gardens)]
+    db.add_all(owned)
+    await db.flush()
+    garden = owned[0]
+    for g in owned:
+        db.add_all(GardenMember(garden_id=g.id, user_id=user.id, role=MemberRole.ADMIN if i == 0 else MemberRole.VIEWER)
+                   for i, user in enumerate(users))
+
+    crop = Crop(name=f"Budget crop {tag}")
+    db.add(crop)
+    garden_beds = [Bed(garden_id=garden.id, name=f"Bed {i}") for i in range(beds)]
+    db.add_all(garden_beds)
+    await db.flush()
+    for bed in garden_beds:
+        db.add_all(Zone(bed_id=bed.id, name=f"Zone {i}") for i in range(3))
+        db.add_all(CropPlacement(bed_id=bed.id, crop_id=crop.id, position_x=i, position_y=0) for i in range(4))
+    await db.commit()
+    return users, owned, garden_beds, crop
+
+
+async def _cleanup(db, users, gardens, crop):
+    for garden in gardens:
+        await db.delete(await db.get(Garden, garden.id))
+    await db.flush()
+    await db.execute(delete(Crop).where(Crop.id == crop.id))
+    await db.execute(delete(User).where(User.id.in_([user.id for user in users])))
+    await db.commit()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, default=25, help="members in each garden")
+    parser.add_argument("--gardens", type=int, default=5, help="gardens shared by those members")
+    parser.add_argument("--beds", type=int, default=10, help="beds in the measured garden")
+    args = parser.parse_args()
+
+    upgrade_database()
+    async with AsyncSessionLocal() as db:
+        users, gardens, beds, crop = await _seed(db, args.members, args.beds, args.gardens)
+
+    user, garden, bed = users[0], gardens[0], beds[0]
+    calls = {
+        "GET /gardens": lambda db: list_gardens(current_user=user, db=db),
+        "GET /gardens/{id}": lambda db: get_garden(garden.id, _request(), Response(), current_user=user, db=db),
+        "GET /gardens/{id}/snapshot": lambda db: get_garden_snapshot(garden.id, _request(), Response(), current_user=user, db=db),
+        "GET /beds/garden/{id}": lambda db: list_beds(garden.id, _request(), Response(), current_user=user, db=db),
+        "GET /beds/{id}/zones": lambda db: list_zones(bed.id, current_user=user, db=db),
+        "GET /crops/placements/bed/{id}": lambda db: list_crop_placements(bed.id, current_user=user, db=db),
+        "GET /crops/placements/garden/{id}": lambda db: list_garden_placements(garden.id, current_user=user, db=db),
+    }
+
+    failures = []
+    try:
+        for name, call in calls.items():
+            access_cache.invalidate_user(user.id)
+            access_cache.invalidate_garden(garden.id)
+            async with AsyncSessionLocal() as db:
+                with QueryCounter() as counter:
+                    await call(db)
+            budget = BUDGETS[name]
+            verdict = "ok" if counter.count <= budget else "OVER BUDGET"
+            print(f"{name:36} {counter.count:3d} / {budget:<3d} {verdict}")
+            if counter.count > budget:
+                failures.append((name, counter.statements))
+    finally:
+        async with AsyncSessionLocal() as db:
+            await _cleanup(db, users, gardens, crop)
+
+    for name, statements in failures:
+        print(f"\n{name} ran {len(statements)} statements:")
+        for statement in statements:
+            print(f"  {' '.join(statement.split())}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,148 @@
+"""
+Cold and warm start time of the API, up to its first request.
+
+Starts fresh interpreter processes that import app.main, the way each uvicorn
+worker does. For each one it reports:
+
+- how long the import took;
+- how many SQL statements the import ran against the sync engine (migrations
+  and seeding);
+- how long the first authenticated request (GET /api/crops/) then took.
+
+The first request pays for whatever loads lazily on first use. The first
+start creates the schema and seeds. Restarts should find both up to date and
+skip them. A forced reseed (`python -m app.seed_crops`) is timed for
+comparison.
+
+--budget-ms fails the run (exit status 1) when the mean restart
+time-to-first-request exceeds it, for use as a regression check. --profile
+prints where import time goes, by package.
+
+Uses a temporary SQLite database unless --database-url is given; point that at
+a scratch database, since the first start migrates and seeds it.
+
+Run from backend/:
+    python -m benchmarks.startup --restarts 5 --budget-ms 1500 --profile 15
+"""
+import argparse
+import collections
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+START = """
+import json, time
+start = time.perf_counter()
+from app.core.database import engine
+from app.core.querycount import QueryCounter
+with QueryCounter(engine) as counter:
+    {body}
+imported = time.perf_counter()
+{request}
+print(json.dumps({{"import": imported - start, "request": time.perf_counter() - imported, "queries": counter.count}}))
+"""
+
+FIRST_REQUEST = """
+import asyncio, os, httpx
+async def first_request():
+    transport = httpx.ASGITransport(app=app.main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.get("/api/crops/", headers={"Authorization": f"Bearer {os.environ['BENCH_TOKEN']}"})
+        response.raise_for_status()
+asyncio.run(first_request())
+"""
+
+
+def _run(body, env, request="", python_args=()):
+    result = subprocess.run(
+        [sys.executable, *python_args, "-c", START.format(body=body, request=request)],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def _start(env):
+    return _run("import app.main", env, FIRST_REQUEST)[0]
+
+
+def _report(label, samples, requested=True):
+    """Print mean times of `samples`; returns mean time-to-first-request in ms."""
+    import_ms = statistics.mean(sample["import"] for sample in samples) * 1000
+    queries = max(sample["queries"] for sample in samples)
+    if not requested:
+        print(f"{label:16} {import_ms:10.1f} {'':>11} {'':>10} {queries:9d}")
+        return None
+    request_ms = statistics.mean(sample["request"] for sample in samples) * 1000
+    print(f"{label:16} {import_ms:10.1f} {request_ms:11.1f} {import_ms + request_ms:10.1f} {queries:9d}")
+    return import_ms + request_ms
+
+
+def _profile(env, top):
+    """Self import time per top-level package (per app module) from -X importtime."""
+    _, stderr = _run("import app.main", env, python_args=("-X", "importtime"))
+    totals = collections.Counter()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        package = ".".join(name.split(".")[:2]) if name.startswith("app.") else name.split(".")[0]
+        totals[package] += int(self_us)
+    print(f"\n{'package':32} {'import ms':>10}")
+    for package, micros in totals.most_common(top):
+        print(f"{package:32} {micros / 1000:10.1f}")
+
+
+def _token(env):
+    """Token for the seeded admin, created in a subprocess so this process keeps its own settings."""
+    script = (
+        "from app.core.database import SessionLocal; from app.core.security import create_access_token; "
+        "from app.core.config import get_settings; from app.models import User; "
+        "db = SessionLocal(); admin = db.query(User).filter(User.email == get_settings().admin_email).one(); "
+        "print(create_access_token({'sub': str(admin.id)}))"
+    )
+    result = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True, check=True)
+    return result.stdout.strip().splitlines()[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--restarts", type=int, default=5, help="warm starts to measure")
+    parser.add_argument("--database-url", help="scratch database (default: a temporary SQLite file)")
+    parser.add_argument("--budget-ms", type=float, help="fail if mean restart time-to-first-request exceeds this")
+    parser.add_argument("--profile", type=int, metavar="N", help="print the N packages taking longest to import")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "DATABASE_URL": args.database_url or f"sqlite:///{tmp}/startup.db",
+            "BLOB_STORAGE_PATH": os.environ.get("BLOB_STORAGE_PATH", f"{tmp}/blobs"),
+            "ADMIN_PASSWORD": os.environ.get("ADMIN_PASSWORD", "startup-bench"),
+            "PYTHONPATH": os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")])),
+        }
+        first_start = _run("import app.main", env)[0]
+        env["BENCH_TOKEN"] = _token(env)
+
+        print(f"{'start':16} {'import ms':>10} {'request ms':>11} {'first ms':>10} {'queries':>9}")
+        _report("first start", [first_start], requested=False)
+        restart_ms = _report("restart", [_start(env) for _ in range(args.restarts)])
+        _report("forced reseed", [
+            _run("from app.seed_crops import seed_database; seed_database(force=True)", env)[0]
+            for _ in range(args.restarts)
+        ], requested=False)
+
+        if args.profile:
+            _profile(env, args.profile)
+
+    if args.budget_ms is not None:
+        over = restart_ms > args.budget_ms
+        print(f"\nrestart time-to-first-request {restart_ms:.1f} ms, budget {args.budget_ms:.0f} ms: {'FAIL' if over else 'ok'}")
+        sys.exit(1 if over else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
 import axios from 'axios'
 
-const API_URL = import.meta.env.VITE_API_URL ?? ''
+export const API_URL = import.meta.env.VITE_API_URL ?? ''
+
+// Server-relative URLs in API responses (e.g. /api/blobs/...) live on the API host
+export const apiUrl = (path: string) => (path.startsWith('/api/') ? `${API_URL}${path}` : path)
 
 export const api = axios.create({
     baseURL: API_URL,
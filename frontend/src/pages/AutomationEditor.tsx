@@ -476,6 +476,19 @@ function StateTriggerFields({ trigger, devices, onChange }: { trigger: StateTrig
                     <DynamicValueInput value={trigger.value} expose={expose} onChange={v => onChange({ ...trigger, value: v })} />
                 </div>
             </div>
+            <div>
+                <label className="block text-xs text-gray-500 dark:text-gray-400 mb-1">Fire</label>
+                <select value={trigger.mode ?? 'edge'} onChange={e => onChange({ ...trigger, mode: e.target.value as StateTrigger['mode'] })} className="w-full px-3 py-2 rounded-lg border border-gray-300 dark:border-gray-600 bg-white dark:bg-dark-surface text-sm text-gray-900 dark:text-gray-100">
+                    <option value="edge">When it starts to match</option>
+                    <option value="level">On every matching report</option>
+                </select>
+            </div>
+            {(trigger.mode ?? 'edge') === 'edge' && ['<', '<=', '>', '>='].includes(trigger.operator) && (
+                <div>
+                    <label className="block text-xs text-gray-500 dark:text-gray-400 mb-1">Hysteresis (Optional)</label>
+                    <input type="number" min={0} value={trigger.hysteresis ?? ''} onChange={e => onChange({ ...trigger, hysteresis: e.target.value === '' ? undefined : Number(e.target.value) })} className="w-full px-3 py-2 rounded-lg border border-gray-300 dark:border-gray-600 bg-white dark:bg-dark-surface text-sm text-gray-900 dark:text-gray-100 placeholder-gray-400" placeholder="0" />
+                </div>
+            )}
         </div>
     )
 }
@@ -241,7 +241,7 @@ function GardenCard({ garden, onUpdate, onDelete }: GardenCardProps) {
                 >
                     {garden.preview_image ? (
                         <img
-                            src={garden.preview_image}
+                            src={garden.preview_thumbnail || garden.preview_image}
                             alt={garden.name}
                             className="w-full h-full object-cover"
                         />
@@ -1,6 +1,7 @@
 import { useEffect, useState, useRef } from 'react'
 import { useParams, Link } from 'react-router-dom'
 import { api } from "../api/client";
+import { withExposes } from '../store/deviceStore'
 import { ArrowLeft, RefreshCw, Cpu, Activity, Signal, Eye, EyeOff, MoreHorizontal, X, Power, Save } from 'lucide-react'
 
 interface ZigbeeDevice {
@@ -10,6 +11,7 @@ interface ZigbeeDevice {
     model: string
     vendor: string
     description: string
+    definition_hash?: string | null
     exposes: any[]
     is_online: boolean
     is_tracked: boolean
@@ -38,11 +40,12 @@ export default function ZigbeeDevicesPage() {
         setError(null)
         try {
             const response = await api.get(`/api/hubs/${hubId}/devices`)
-            setDevices(response.data)
+            const data: ZigbeeDevice[] = await withExposes(response.data)
+            setDevices(data)
 
             // Check against ref to see if device is still selected/open
             if (selectedDeviceIdRef.current) {
-                const updated = response.data.find((d: ZigbeeDevice) => d.id === selectedDeviceIdRef.current)
+                const updated = data.find((d: ZigbeeDevice) => d.id === selectedDeviceIdRef.current)
                 if (updated) setSelectedDevice(updated)
             }
         } catch (err: any) {
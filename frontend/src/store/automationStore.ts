@@ -8,6 +8,8 @@ export interface StateTrigger {
     entity: string
     operator: '>' | '<' | '==' | '!=' | '>=' | '<='
     value: number | string | boolean
+    mode?: 'edge' | 'level' // edge (default): fire when the comparison starts to hold; level: on every matching report
+    hysteresis?: number // edge mode, < <= > >=: how far back past the value before it can fire again
 }
 
 export interface TimeTrigger {
@@ -1,10 +1,12 @@
 import { create } from 'zustand'
 import { api } from '../api/client'
+import { withIconUrl } from '../utils/cropUtils'
 
 export interface Crop {
     id: string
     name: string
     icon?: string
+    icon_hash?: string | null
     cells_width: number
     cells_height: number
     per_cell: number
@@ -31,6 +33,11 @@ export interface CropPlacement {
     crop: Crop
 }
 
+const withPlacementIconUrl = (placement: CropPlacement): CropPlacement => ({
+    ...placement,
+    crop: withIconUrl(placement.crop),
+})
+
 interface CropState {
     crops: Crop[]
     placements: CropPlacement[]
@@ -68,7 +75,7 @@ export const useCropStore = create<CropState>((set, get) => ({
         set({ isLoading: true, error: null })
         try {
             const response = await api.get('/api/crops/', { params: { include_private: true } })
-            set({ crops: response.data, isLoading: false })
+            set({ crops: response.data.map(withIconUrl), isLoading: false })
         } catch (error: any) {
             set({ error: error.message, isLoading: false })
         }
@@ -78,7 +85,7 @@ export const useCropStore = create<CropState>((set, get) => ({
         set({ isLoading: true, error: null })
         try {
             const response = await api.get(`/api/crops/placements/bed/${bedId}`)
-            set({ placements: response.data, isLoading: false })
+            set({ placements: response.data.map(withPlacementIconUrl), isLoading: false })
         } catch (error: any) {
             set({ error: error.message, isLoading: false })
         }
@@ -88,7 +95,7 @@ export const useCropStore = create<CropState>((set, get) => ({
         set({ isLoading: true, error: null })
         try {
             const response = await api.get(`/api/crops/placements/garden/${gardenId}`)
-            set({ gardenPlacements: response.data, isLoading: false })
+            set({ gardenPlacements: response.data.map(withPlacementIconUrl), isLoading: false })
         } catch (error: any) {
             set({ error: error.message, isLoading: false })
         }
@@ -98,11 +105,12 @@ export const useCropStore = create<CropState>((set, get) => ({
         set({ isLoading: true, error: null })
         try {
             const response = await api.post('/api/crops/placements', data)
+            const placement = withPlacementIconUrl(response.data)
             set((state) => ({
-                placements: [...state.placements, response.data],
+                placements: [...state.placements, placement],
                 isLoading: false,
             }))
-            return response.data
+            return placement
         } catch (error: any) {
             set({ error: error.message, isLoading: false })
             throw error
@@ -114,7 +122,7 @@ export const useCropStore = create<CropState>((set, get) => ({
         try {
             const response = await api.patch(`/api/crops/placements/${id}`, data)
             set((state) => ({
-                placements: state.placements.map((p) => (p.id === id ? { ...p, ...response.data } : p)),
+                placements: state.placements.map((p) => (p.id === id ? { ...p, ...withPlacementIconUrl(response.data) } : p)),
                 isLoading: false,
             }))
         } catch (error: any) {
@@ -142,7 +150,7 @@ export const useCropStore = create<CropState>((set, get) => ({
             // Also refetch from server to ensure sync
             if (placementToDelete.bed_id) {
                 const response = await api.get(`/api/crops/placements/bed/${placementToDelete.bed_id}`)
-                set({ placements: response.data })
+                set({ placements: response.data.map(withPlacementIconUrl) })
             }
         } catch (error: any) {
             set({ error: error.message, isLoading: false })
@@ -166,7 +174,13 @@ export const useCropStore = create<CropState>((set, get) => ({
     updateCrop: async (id: string, data: Partial<Crop>) => {
         set({ isLoading: true, error: null })
         try {
-            const response = await api.patch(`/api/crops/${id}`, data)
+            // An untouched image icon is only the endpoint URL here, not the image itself
+            const current = get().crops.find((c) => c.id === id)
+            const payload = { ...data }
+            if (current?.icon_hash && payload.icon === current.icon) {
+                delete payload.icon
+            }
+            const response = await api.patch(`/api/crops/${id}`, payload)
             set((state) => ({
                 crops: state.crops.map((c) => (c.id === id ? response.data : c)),
                 isLoading: false,
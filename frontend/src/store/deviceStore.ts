@@ -10,11 +10,37 @@ export interface ZigbeeDevice {
     model?: string
     vendor?: string
     description?: string
+    definition_hash?: string | null
     exposes: any[]
     is_online: boolean
     last_seen?: string
 }
 
+export interface DeviceDefinition {
+    hash: string
+    vendor?: string
+    model?: string
+    exposes: any[]
+}
+
+// Definitions are content-addressed, so each one is fetched once per session
+const definitionCache: Record<string, DeviceDefinition> = {}
+
+export async function withExposes<T extends { definition_hash?: string | null }>(devices: T[]): Promise<(T & { exposes: any[] })[]> {
+    const missing = [...new Set(devices.map((d) => d.definition_hash))]
+        .filter((hash): hash is string => !!hash && !(hash in definitionCache))
+    if (missing.length > 0) {
+        const response = await api.get('/api/devices/definitions', { params: { hashes: missing.join(',') } })
+        for (const definition of response.data as DeviceDefinition[]) {
+            definitionCache[definition.hash] = definition
+        }
+    }
+    return devices.map((d) => ({
+        ...d,
+        exposes: (d.definition_hash && definitionCache[d.definition_hash]?.exposes) || []
+    }))
+}
+
 interface DeviceStore {
     devices: ZigbeeDevice[]
     isLoading: boolean
@@ -33,7 +59,7 @@ export const useDeviceStore = create<DeviceStore>((set, get) => ({
         try {
             const response = await api.get('/api/devices')
             const data = Array.isArray(response.data) ? response.data : []
-            set({ devices: data, isLoading: false })
+            set({ devices: await withExposes(data), isLoading: false })
         } catch (error: any) {
             set({ error: error.message, isLoading: false })
         }
@@ -42,8 +68,9 @@ export const useDeviceStore = create<DeviceStore>((set, get) => ({
     updateDevice: async (id, data) => {
         try {
             const response = await api.put(`/api/devices/${id}`, data)
+            const [updated] = await withExposes([response.data])
             set((state) => ({
-                devices: state.devices.map((d) => (d.id === id ? { ...d, ...response.data } : d))
+                devices: state.devices.map((d) => (d.id === id ? { ...d, ...updated } : d))
             }))
         } catch (error: any) {
             set({ error: error.message })
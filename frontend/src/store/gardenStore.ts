@@ -1,5 +1,5 @@
 import { create } from 'zustand'
-import { api } from '../api/client'
+import { api, apiUrl } from '../api/client'
 
 export interface Garden {
     id: string
@@ -7,6 +7,7 @@ export interface Garden {
     width_meters: number
     height_meters: number
     preview_image?: string
+    preview_thumbnail?: string
     created_at: string
     role: 'admin' | 'editor' | 'viewer'
 }
@@ -29,6 +30,12 @@ export interface Zone {
     color: string
 }
 
+const withPreviewUrls = <T extends { preview_image?: string; preview_thumbnail?: string }>(garden: T): T => ({
+    ...garden,
+    preview_image: garden.preview_image ? apiUrl(garden.preview_image) : garden.preview_image,
+    preview_thumbnail: garden.preview_thumbnail ? apiUrl(garden.preview_thumbnail) : garden.preview_thumbnail,
+})
+
 interface GardenState {
     gardens: Garden[]
     currentGarden: Garden | null
@@ -63,7 +70,7 @@ export const useGardenStore = create<GardenState>((set, get) => ({
         set({ isLoading: true, error: null })
         try {
             const response = await api.get('/api/gardens/')
-            set({ gardens: response.data, isLoading: false })
+            set({ gardens: response.data.map(withPreviewUrls), isLoading: false })
         } catch (error: any) {
             set({ error: error.message, isLoading: false })
         }
@@ -73,7 +80,7 @@ export const useGardenStore = create<GardenState>((set, get) => ({
         set({ isLoading: true, error: null })
         try {
             const response = await api.get(`/api/gardens/${id}`)
-            set({ currentGarden: response.data, isLoading: false })
+            set({ currentGarden: withPreviewUrls(response.data), isLoading: false })
         } catch (error: any) {
             set({ error: error.message, isLoading: false })
         }
@@ -83,7 +90,7 @@ export const useGardenStore = create<GardenState>((set, get) => ({
         set({ isLoading: true, error: null })
         try {
             const response = await api.post('/api/gardens/', data)
-            const newGarden = { ...response.data, role: 'admin' as const }
+            const newGarden = { ...withPreviewUrls(response.data), role: 'admin' as const }
             set((state) => ({
                 gardens: [...state.gardens, newGarden],
                 isLoading: false
@@ -99,9 +106,10 @@ export const useGardenStore = create<GardenState>((set, get) => ({
         set({ isLoading: true, error: null })
         try {
             const response = await api.patch(`/api/gardens/${id}`, data)
+            const updated = withPreviewUrls(response.data)
             set((state) => ({
-                gardens: state.gardens.map((g) => (g.id === id ? { ...g, ...response.data } : g)),
-                currentGarden: state.currentGarden?.id === id ? { ...state.currentGarden, ...response.data } : state.currentGarden,
+                gardens: state.gardens.map((g) => (g.id === id ? { ...g, ...updated } : g)),
+                currentGarden: state.currentGarden?.id === id ? { ...state.currentGarden, ...updated } : state.currentGarden,
                 isLoading: false,
             }))
         } catch (error: any) {
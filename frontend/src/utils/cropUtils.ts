@@ -1,3 +1,4 @@
+import { API_URL } from '../api/client'
 
 // Crop emoji mapping (fallback)
 export const CROP_EMOJIS: Record<string, string> = {
@@ -20,8 +21,20 @@ export const CROP_EMOJIS: Record<string, string> = {
 }
 
 interface CropLike {
+    id?: string
     name: string
-    icon?: string
+    icon?: string | null
+    icon_hash?: string | null
+}
+
+// Crop lists leave image icons out and only carry their hash; point the icon
+// at the content-addressed endpoint so the browser caches it once per image
+export const withIconUrl = <T extends CropLike>(crop: T): T => {
+    if (!crop.icon_hash || !crop.id || crop.icon) {
+        return crop
+    }
+    const url = new URL(`${API_URL}/api/crops/${crop.id}/icon?v=${crop.icon_hash}`, window.location.href)
+    return { ...crop, icon: url.href }
 }
 
 export const getCropEmoji = (crop: CropLike | string): string => {
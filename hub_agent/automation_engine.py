@@ -4,6 +4,7 @@ import logging
 import os
 from typing import Dict, List, Any, Optional
 from datetime import datetime
+from clock import SystemClock
 
 logger = logging.getLogger("HubAgent.AutomationEngine")
 
@@ -32,37 +33,80 @@ class AutomationEngine:
     - Sequential actions with control flow (choose, if-then, delay, condition)
     - Async action execution with real delay support
     - Per-automation cooldown to prevent retriggering
+    - State triggers fire when their comparison starts to hold, optionally
+      with a hysteresis band ("mode": "level" fires on every matching report)
+
+    Time comes from `clock` (the system clock by default); replays pass a
+    clock.VirtualClock so delays and time triggers run on recorded time.
     """
 
-    def __init__(self):
+    def __init__(self, clock=None):
+        self._clock = clock or SystemClock()
         self._rules = []
         self._device_states = {}  # Cache of last known device states
         self._mqtt_client = None
         self._event_loop = None
         self._running_automations = set()  # IDs of currently executing automations
+        self._matched_triggers = set()  # (rule ID, trigger index) of edge state triggers currently holding
+        self._rules_by_device = {}  # device ID -> rules with state triggers on it, in rule order
         
     def set_mqtt_client(self, mqtt_client):
         """Set MQTT client for publishing commands directly."""
         self._mqtt_client = mqtt_client
 
-    def set_event_loop(self, loop):
-        """Set the asyncio event loop for scheduling async action execution."""
+    def set_event_loop(self, loop, monitor_time_triggers=True):
+        """
+        Set the asyncio event loop for scheduling async action execution.
+        Replays drive time triggers themselves (monitor_time_triggers=False).
+        """
         self._event_loop = loop
         # Start time trigger monitor task
-        loop.create_task(self._monitor_time_triggers())
+        if monitor_time_triggers:
+            loop.create_task(self._monitor_time_triggers())
 
-    def load(self, automations):
+    def load(self, automations, save=True):
         """
         Load (or replace) automation rules and persist to disk.
         Only enabled automations are kept for evaluation.
 
         Args:
             automations: list of automation dicts from the backend.
+            save: also write them to the local file.
         """
         all_rules = automations or []
-        self._rules = [r for r in all_rules if r.get("enabled", True)]
+        self._set_rules([r for r in all_rules if r.get("enabled", True)])
         logger.info(f"Loaded {len(self._rules)} enabled automation(s) (of {len(all_rules)} total)")
-        self.save_to_disk()
+        if save:
+            self.save_to_disk()
+
+    def _set_rules(self, rules):
+        """
+        Replace the rules. State triggers that are unchanged keep whether they
+        currently hold, so re-syncing rules doesn't fire them again.
+        """
+        def triggers_by_key(rules):
+            return {
+                (self._rule_id(rule), index): trigger
+                for rule in rules for index, trigger in enumerate(rule.get("triggers", []))
+            }
+
+        previous, current = triggers_by_key(self._rules), triggers_by_key(rules)
+        self._matched_triggers = {key for key in self._matched_triggers if previous.get(key) == current.get(key)}
+        self._rules = rules
+
+        # A state update only needs the rules triggered by its device
+        self._rules_by_device = {}
+        for rule in rules:
+            devices = dict.fromkeys(
+                trigger.get("device_id") for trigger in rule.get("triggers", [])
+                if trigger.get("type") in ("state", "device_state_changed")
+            )
+            for device_id in devices:
+                self._rules_by_device.setdefault(device_id, []).append(rule)
+
+    @staticmethod
+    def _rule_id(rule: dict) -> str:
+        return rule.get("id", rule.get("name", "unknown"))
 
     def save_to_disk(self):
         """Persist current rules to local JSON file."""
@@ -81,7 +125,7 @@ class AutomationEngine:
             return False
         try:
             with open(AUTOMATIONS_FILE, "r") as f:
-                self._rules = json.load(f)
+                self._set_rules(json.load(f))
             logger.info(f"Loaded {len(self._rules)} automation(s) from local file")
             return True
         except Exception as e:
@@ -108,15 +152,15 @@ class AutomationEngine:
         async def _loop():
             while True:
                 try:
-                    now = datetime.now()
+                    now = self._clock.now()
                     self._check_time_triggers(now)
                     
                     # Calculate sleep time to align with next second
                     to_sleep = 1.0 - (now.microsecond / 1_000_000)
-                    await asyncio.sleep(to_sleep)
+                    await self._clock.sleep(to_sleep)
                 except Exception as e:
                     logger.error(f"Error in time trigger monitor: {e}")
-                    await asyncio.sleep(1)
+                    await self._clock.sleep(1)
         return _loop()
 
     def _check_time_triggers(self, now: datetime):
@@ -210,19 +254,21 @@ class AutomationEngine:
 
     def _evaluate_on_state_change(self, ieee_address: str, state: dict):
         """
-        Evaluate all automations when a device state changes.
+        Evaluate the automations triggered by a device when its state changes.
         Triggered automations are scheduled for async execution.
         """
-        for rule in self._rules:
+        for rule in self._rules_by_device.get(ieee_address, ()):
             try:
                 rule_id = rule.get("id", rule.get("name", "unknown"))
                 
-                # Skip if this automation is already running (cooldown)
-                if rule_id in self._running_automations:
+                # Check if any trigger matches this state change (OR logic).
+                # Checked even while the rule runs, so held edge triggers can re-arm.
+                crossed = []
+                if not self._check_triggers(rule, rule_id, ieee_address, state, crossed):
                     continue
                 
-                # Check if any trigger matches this state change (OR logic)
-                if not self._check_triggers(rule, ieee_address, state):
+                # Skip if this automation is already running (cooldown)
+                if rule_id in self._running_automations:
                     continue
                 
                 # Check if all conditions are satisfied (AND logic)
@@ -232,6 +278,10 @@ class AutomationEngine:
                 
                 logger.info(f"Automation '{rule.get('name')}' triggered and conditions met — scheduling execution")
                 
+                # Edge triggers are only held once they have run the rule, so a crossing
+                # that came while the rule ran or its conditions failed fires on the next report
+                self._matched_triggers.update(crossed)
+                
                 # Schedule async action execution on the event loop
                 self._schedule_actions(rule_id, rule.get("name", "?"), rule.get("actions", []))
                 
@@ -252,22 +302,27 @@ class AutomationEngine:
             self._event_loop
         )
     
-    def _check_triggers(self, rule: dict, ieee_address: str, state: dict) -> bool:
-        """Check if any trigger matches (OR logic)."""
+    def _check_triggers(self, rule: dict, rule_id: str, ieee_address: str, state: dict, crossed: List[tuple]) -> bool:
+        """Check if any trigger matches (OR logic). Matching edge triggers are added to `crossed`."""
         triggers = rule.get("triggers", [])
+        matched = False
         
-        for trigger in triggers:
+        # Every trigger is checked, so each edge trigger tracks its own crossings
+        for index, trigger in enumerate(triggers):
+            # Most triggers are on other devices: skip them before any further work
+            if trigger.get("device_id") != ieee_address:
+                continue
             trigger_type = trigger.get("type")
             
             if trigger_type == "state":
-                if self._check_state_trigger(trigger, ieee_address, state):
-                    return True
+                if self._check_state_trigger(trigger, ieee_address, state, rule_id, index, crossed):
+                    matched = True
             elif trigger_type == "device_state_changed":
                 if self._check_device_state_changed_trigger(trigger, ieee_address, state):
-                    return True
+                    matched = True
             # Time triggers handled separately by scheduler
             
-        return False
+        return matched
     
     def _check_device_state_changed_trigger(self, trigger: dict, ieee_address: str, state: dict) -> bool:
         """Check if a device state changed trigger matches."""
@@ -281,8 +336,23 @@ class AutomationEngine:
             
         return True
     
-    def _check_state_trigger(self, trigger: dict, ieee_address: str, state: dict) -> bool:
-        """Check if a state trigger matches."""
+    def _check_state_trigger(self, trigger: dict, ieee_address: str, state: dict, rule_id: str, index: int, crossed: List[tuple]) -> bool:
+        """
+        Check if a state trigger matches.
+
+        By default the trigger fires when the comparison starts to hold (the
+        first matching report, or one after a non-matching report), not on
+        every report while it holds. With "hysteresis", a trigger on < <= > >=
+        only re-arms once the value has moved that far back past the
+        threshold, so readings jittering around it don't fire it repeatedly.
+        "mode": "level" fires on every matching report instead. Crossings are
+        tracked per (rule_id, index of the trigger in the rule).
+
+        A matching edge trigger is added to `crossed`; the caller holds it
+        only if the rule then runs. While the rule is running or its
+        conditions fail, the trigger keeps matching, and the first report
+        that can run the rule does.
+        """
         if trigger.get("device_id") != ieee_address:
             return False
         
@@ -303,10 +373,31 @@ class AutomationEngine:
             return False
         
         try:
-            return op_func(current_value, threshold)
+            matches = op_func(current_value, threshold)
+            if trigger.get("mode") == "level":
+                return matches
+            key = (rule_id, index)
+            if key not in self._matched_triggers:
+                if matches:
+                    crossed.append(key)
+                return matches
+            if self._state_trigger_released(trigger, op_func, current_value, matches):
+                self._matched_triggers.discard(key)
+            return False
         except (ValueError, TypeError) as e:
             logger.warning(f"Error comparing {current_value} {operator} {threshold}: {e}")
             return False
+
+    @staticmethod
+    def _state_trigger_released(trigger: dict, op_func, current_value, matches: bool) -> bool:
+        """Whether a held edge trigger has moved far enough back to fire again."""
+        hysteresis = trigger.get("hysteresis")
+        operator = trigger.get("operator")
+        if not hysteresis or operator not in ("<", "<=", ">", ">="):
+            return not matches
+        # Shift the threshold away by the band: "< 30" with hysteresis 5 re-arms at >= 35
+        band = float(hysteresis) if operator in ("<", "<=") else -float(hysteresis)
+        return not op_func(current_value, float(trigger.get("value")) + band)
     
     def _check_conditions(self, rule: dict) -> bool:
         """Check if all conditions are satisfied (AND logic)."""
@@ -374,7 +465,7 @@ class AutomationEngine:
             elif action_type == "delay":
                 seconds = action.get("seconds", 0)
                 logger.info(f"⏳ Waiting {seconds}s...")
-                await asyncio.sleep(seconds)
+                await self._clock.sleep(seconds)
                 logger.info(f"⏳ Delay complete")
             
             elif action_type == "choose":
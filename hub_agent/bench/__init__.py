@@ -0,0 +1,18 @@
+"""
+Local test bench for the hub agent.
+
+Runs the real agent (registration, MQTT handling, automations, backend
+WebSocket) against in-process stand-ins, so no Mosquitto, zigbee2mqtt or
+backend is needed:
+
+- broker.Broker: a minimal MQTT 3.1.1 broker the agent's paho client connects to;
+- zigbee2mqtt.FakeZigbee2Mqtt: publishes bridge/devices and device state at
+  controlled rates and records the /set commands it receives;
+- backend.StubBackend: answers registration and automation requests and
+  records what the agent sends over its WebSocket.
+
+bench.automations benchmarks the automation engine on its own, and
+bench.replay runs a recorded MQTT log through it on virtual time.
+
+Run from hub_agent/, e.g. `python -m bench.e2e`.
+"""
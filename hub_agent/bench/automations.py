@@ -0,0 +1,308 @@
+"""
+AutomationEngine micro-benchmarks.
+
+For synthetic rule sets of each --rules size, evaluated against a synthetic
+device fleet, measures:
+
+- update_device_state throughput (state reports per second). Rules that fire
+  have their actions run on the event loop as in the agent;
+- the cost of one _check_time_triggers tick;
+- memory held per rule, for rules loaded from the backend's JSON;
+- load() time, including saving the rules to disk.
+
+Each timing repeats the same work (--repeat runs, and more until --seconds
+have passed) and keeps the fastest run, which is steadier than the mean on a
+busy machine.
+
+Rule sets mix state, device_state_changed, time_pattern and time triggers
+with state conditions, and device_action, choose, if, condition and delay
+actions. They are generated from --seed, so runs are comparable.
+
+Results are compared with a stored baseline (automations_baseline.json next
+to this file). A timing more than --tolerance worse than the baseline, or
+memory more than --memory-tolerance higher, fails the run (exit status 1). Timings depend on the machine: after an intended
+change, or on a new machine, record a new baseline with --update-baseline.
+
+Run from hub_agent/:
+    python -m bench.automations --rules 10 100 1000 10000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+import automation_engine
+from automation_engine import AutomationEngine
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "automations_baseline.json")
+# metric -> (label, unit, True if higher is better)
+METRICS = {
+    "updates_per_s": ("updates", "/s", True),
+    "tick_us": ("time tick", "us", False),
+    "bytes_per_rule": ("memory", "B/rule", False),
+    "load_ms": ("load()", "ms", False),
+}
+ENTITIES = ("soil_moisture", "temperature", "battery")
+START = datetime(2026, 5, 1, 6, 0, 0)
+
+
+class RecordingMqttClient:
+    """Stands in for the paho client: counts what the engine publishes."""
+
+    def __init__(self):
+        self.published = 0
+
+    def publish(self, topic, payload):
+        self.published += 1
+
+
+def generate_fleet(devices, seed=1):
+    """Sensor IEEE addresses and valve friendly names."""
+    sensors = [f"0x{0x1000 + index:016x}" for index in range(devices)]
+    valves = [f"valve-{index:03d}" for index in range(max(1, devices // 10))]
+    return sensors, valves
+
+
+def _condition(rng, sensors):
+    entity = rng.choice(ENTITIES)
+    return {
+        "type": "state", "device_id": rng.choice(sensors), "entity": entity,
+        "operator": rng.choice([">", "<", ">=", "<=", "!="]), "value": rng.randint(0, 100),
+    }
+
+
+def _device_action(rng, valves):
+    return {"type": "device_action", "device_id": rng.choice(valves), "entity": "state", "value": rng.choice(["ON", "OFF"])}
+
+
+def _actions(rng, sensors, valves):
+    kind = rng.random()
+    if kind < 0.4:
+        return [_device_action(rng, valves)]
+    if kind < 0.6:
+        return [{
+            "type": "choose",
+            "choices": [
+                {"conditions": [_condition(rng, sensors)], "sequence": [_device_action(rng, valves)]},
+                {"conditions": [_condition(rng, sensors)], "sequence": [_device_action(rng, valves)]},
+            ],
+            "default": [_device_action(rng, valves)],
+        }]
+    if kind < 0.8:
+        return [{
+            "type": "if",
+            "conditions": [_condition(rng, sensors)],
+            "then": [_device_action(rng, valves)],
+            "else": [_device_action(rng, valves)],
+        }]
+    return [
+        {"type": "condition", "conditions": [_condition(rng, sensors)]},
+        _device_action(rng, valves),
+        {"type": "delay", "seconds": 0},
+        _device_action(rng, valves),
+    ]
+
+
+def _trigger(rng, sensors):
+    kind = rng.random()
+    if kind < 0.5:
+        # Thresholds near the ends of the range, so a rule matches ~10% of its device's reports
+        if rng.random() < 0.5:
+            return {"type": "state", "device_id": rng.choice(sensors), "entity": "soil_moisture", "operator": "<", "value": rng.randint(5, 15)}
+        return {"type": "state", "device_id": rng.choice(sensors), "entity": "temperature", "operator": ">", "value": rng.randint(31, 34)}
+    if kind < 0.65:
+        return {"type": "device_state_changed", "device_id": rng.choice(sensors), "entity": rng.choice(ENTITIES)}
+    if kind < 0.9:
+        return {"type": "time_pattern", "hours": "*", "minutes": f"/{rng.choice([5, 10, 15, 30])}", "seconds": "0"}
+    return {"type": "time", "at": f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00"}
+
+
+def generate_rules(count, sensors, valves, seed=1):
+    """`count` enabled automations in the backend's sync format."""
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"bench-{index}",
+            "name": f"bench rule {index}",
+            "enabled": True,
+            "triggers": [_trigger(rng, sensors) for _ in range(rng.choice([1, 1, 2]))],
+            "conditions": [_condition(rng, sensors) for _ in range(rng.choice([0, 0, 1, 2]))],
+            "actions": _actions(rng, sensors, valves),
+        }
+        for index in range(count)
+    ]
+
+
+def generate_reports(count, sensors, seed=1):
+    rng = random.Random(seed)
+    return [
+        (rng.choice(sensors), {
+            "soil_moisture": rng.randint(0, 100),
+            "temperature": round(rng.uniform(0, 35), 1),
+            "battery": rng.randint(0, 100),
+        })
+        for _ in range(count)
+    ]
+
+
+def _engine(rules=None):
+    engine = AutomationEngine()
+    engine.set_mqtt_client(RecordingMqttClient())
+    # Actions run on the benchmark's loop; ticks are driven by the benchmark
+    engine.set_event_loop(asyncio.get_running_loop(), monitor_time_triggers=False)
+    if rules is not None:
+        engine.load(rules, save=False)
+    return engine
+
+
+async def _drain():
+    """Let scheduled action sequences run."""
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+async def _best(run_once, repeat, seconds):
+    """Shortest time of run_once(): at least `repeat` runs, and more until `seconds` have been spent."""
+    best, spent, runs = float("inf"), 0.0, 0
+    while runs < repeat or spent < seconds:
+        elapsed = await run_once()
+        best, spent, runs = min(best, elapsed), spent + elapsed, runs + 1
+    return best
+
+
+async def measure_updates(rules, reports, repeat, seconds, chunk=100):
+    """State reports per second, over the same reports each run."""
+    engine = _engine(rules)
+
+    async def run_once():
+        start = time.perf_counter()
+        for index in range(0, len(reports), chunk):
+            for ieee, state in reports[index:index + chunk]:
+                engine.update_device_state(ieee, state)
+            await _drain()
+        return time.perf_counter() - start
+
+    return len(reports) / await _best(run_once, repeat, seconds)
+
+
+async def measure_ticks(rules, repeat, seconds, ticks=300):
+    """Microseconds per tick, over the same five minutes each run."""
+    engine = _engine(rules)
+    times = [START + timedelta(seconds=tick) for tick in range(ticks)]
+
+    async def run_once():
+        start = time.perf_counter()
+        for now in times:
+            engine._check_time_triggers(now)
+            await _drain()
+        return time.perf_counter() - start
+
+    return await _best(run_once, repeat, seconds) / ticks * 1e6
+
+
+async def measure_memory(rules):
+    payload = json.dumps(rules)
+    engine = _engine()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        engine.load(json.loads(payload))
+        held = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    return held / len(rules)
+
+
+async def measure_load(rules, repeat):
+    payload = json.dumps(rules)
+    engine = _engine()
+    best = float("inf")
+    for _ in range(repeat):
+        parsed = json.loads(payload)
+        start = time.perf_counter()
+        engine.load(parsed)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+async def run(args):
+    sensors, valves = generate_fleet(args.devices, args.seed)
+    reports = generate_reports(1000, sensors, args.seed)
+    results = {}
+    for count in args.rules:
+        rules = generate_rules(count, sensors, valves, args.seed)
+        results[str(count)] = {
+            "updates_per_s": round(await measure_updates(rules, reports, args.repeat, args.seconds), 1),
+            "tick_us": round(await measure_ticks(rules, args.repeat, args.seconds), 2),
+            "bytes_per_rule": round(await measure_memory(rules), 1),
+            "load_ms": round(await measure_load(rules, args.repeat), 3),
+        }
+    return results
+
+
+def compare(results, baseline, tolerance, memory_tolerance):
+    """Print results against the baseline; returns the regressions."""
+    regressions = []
+    print(f"{'rules':>6} {'metric':12} {'result':>12} {'baseline':>12} {'change':>8}")
+    for count, metrics in results.items():
+        for metric, value in metrics.items():
+            label, unit, higher_is_better = METRICS[metric]
+            reference = baseline.get(count, {}).get(metric)
+            if not reference:
+                print(f"{count:>6} {label:12} {value:>12,.1f} {'-':>12} {'':>8} {unit}")
+                continue
+            change = value / reference - 1
+            worse = -change if higher_is_better else change
+            flag = ""
+            if worse > (memory_tolerance if metric == "bytes_per_rule" else tolerance):
+                flag = "  REGRESSION"
+                regressions.append(f"{count} rules {label}")
+            print(f"{count:>6} {label:12} {value:>12,.1f} {reference:>12,.1f} {change:+8.0%} {unit}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rules", type=int, nargs="+", default=[10, 100, 1000, 10000], help="rule set sizes")
+    parser.add_argument("--devices", type=int, default=200, help="sensors in the fleet")
+    parser.add_argument("--repeat", type=int, default=5, help="minimum timed runs per measurement; the best counts")
+    parser.add_argument("--seconds", type=float, default=1.0, help="minimum time spent per measurement")
+    parser.add_argument("--seed", type=int, default=1, help="seed for rules and reports")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown vs. the baseline (0.5 = 50%%)")
+    parser.add_argument("--memory-tolerance", type=float, default=0.05, help="allowed growth of memory per rule")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline results file")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the baseline")
+    args = parser.parse_args()
+
+    # Rules are saved on load(); keep them away from the agent's data directory
+    data_dir = tempfile.mkdtemp(prefix="automation-bench-")
+    automation_engine.DATA_DIR = data_dir
+    automation_engine.AUTOMATIONS_FILE = os.path.join(data_dir, "automations.json")
+    logging.getLogger("HubAgent").setLevel(logging.WARNING)
+
+    results = asyncio.run(run(args))
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance, args.memory_tolerance)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({**baseline, **results}, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline saved to {args.baseline}")
+    elif regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Stub backend for the bench: just the endpoints the agent uses.
+
+Registration approves the hub straight away, /automations serves the bench's
+rules, and the WebSocket behaves like the backend's hub socket (it
+acknowledges definitions and otherwise records what it receives). Commands
+can be pushed to the agent with send().
+"""
+import asyncio
+import collections
+import json
+import logging
+import time
+from aiohttp import WSMsgType, web
+
+logger = logging.getLogger("HubAgent.Bench.Backend")
+
+HUB_ID = "00000000-0000-0000-0000-0000000000b0"
+TOKEN = "bench-token"
+
+
+class StubBackend:
+    def __init__(self, automations=None):
+        self.automations = automations or []
+        self.frames = collections.Counter()  # message type -> count
+        self.last_frame_at = None
+        self.discovered = asyncio.Event()
+        self.automations_served = asyncio.Event()
+        self._sockets = set()
+        self._runner = None
+        self.port = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}/api"
+
+    @property
+    def ws_url(self):
+        return f"ws://127.0.0.1:{self.port}/api"
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/api/hubs/register", self._register)
+        app.router.add_get("/api/hubs/{hub_id}/automations", self._automations)
+        app.router.add_get("/api/hubs/{hub_id}/ws", self._ws)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", 0).start()
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self):
+        for ws in list(self._sockets):
+            await ws.close()
+        await self._runner.cleanup()
+
+    async def send(self, msg_type, payload):
+        """Send a message to every connected agent."""
+        for ws in list(self._sockets):
+            await ws.send_json({"type": msg_type, "payload": payload})
+
+    async def _register(self, request):
+        return web.json_response({"hub_id": HUB_ID, "status": "approved", "access_token": TOKEN})
+
+    async def _automations(self, request):
+        self.automations_served.set()
+        return web.json_response(self.automations)
+
+    async def _ws(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self._sockets.add(ws)
+        await ws.send_json({"type": "definitions_known", "payload": {"hashes": [], "replace": True}})
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                message = json.loads(msg.data)
+                self.frames[message.get("type")] += 1
+                self.last_frame_at = time.perf_counter()
+                if message.get("type") == "device_discovery":
+                    hashes = sorted({d["definition_hash"] for d in message.get("payload") or [] if "exposes" in d})
+                    await ws.send_json({"type": "definitions_known", "payload": {"hashes": hashes, "replace": False}})
+                    self.discovered.set()
+        finally:
+            self._sockets.discard(ws)
+        return ws
@@ -0,0 +1,156 @@
+"""
+Minimal in-process MQTT 3.1.1 broker.
+
+Enough of the protocol for paho clients: CONNECT, SUBSCRIBE/UNSUBSCRIBE with
++ and # wildcards, PUBLISH (delivered at QoS 0), retained messages, PINGREQ
+and DISCONNECT. No sessions, authentication or will messages.
+
+In-process code can publish and subscribe without a connection, via
+publish() and subscribe(), which is how the fake zigbee2mqtt talks to it.
+"""
+import asyncio
+import logging
+import struct
+
+logger = logging.getLogger("HubAgent.Bench.Broker")
+
+CONNECT, CONNACK, PUBLISH, PUBACK, SUBSCRIBE, SUBACK = 1, 2, 3, 4, 8, 9
+UNSUBSCRIBE, UNSUBACK, PINGREQ, PINGRESP, DISCONNECT = 10, 11, 12, 13, 14
+
+
+def topic_matches(topic_filter, topic):
+    """Whether `topic` matches a subscription filter with + and # wildcards."""
+    filter_levels, topic_levels = topic_filter.split("/"), topic.split("/")
+    for index, level in enumerate(filter_levels):
+        if level == "#":
+            return True
+        if index >= len(topic_levels) or (level != "+" and level != topic_levels[index]):
+            return False
+    return len(filter_levels) == len(topic_levels)
+
+
+def _encode_length(length):
+    encoded = bytearray()
+    while True:
+        byte, length = length % 128, length // 128
+        encoded.append(byte | 0x80 if length else byte)
+        if not length:
+            return bytes(encoded)
+
+
+def _packet(packet_type, flags, body):
+    return bytes([packet_type << 4 | flags]) + _encode_length(len(body)) + body
+
+
+def _string(data, offset):
+    (length,) = struct.unpack_from("!H", data, offset)
+    return data[offset + 2:offset + 2 + length].decode(), offset + 2 + length
+
+
+def publish_packet(topic, payload, retain=False):
+    encoded = topic.encode()
+    return _packet(PUBLISH, 1 if retain else 0, struct.pack("!H", len(encoded)) + encoded + payload)
+
+
+class _Session:
+    def __init__(self, writer):
+        self.writer = writer
+        self.filters = set()
+
+
+class Broker:
+    def __init__(self):
+        self._server = None
+        self._sessions = set()
+        self._local = []  # (filter, callback(topic, payload)) of in-process subscribers
+        self._retained = {}
+        self.published = 0
+        self.port = None
+
+    async def start(self, host="127.0.0.1", port=0):
+        self._server = await asyncio.start_server(self._serve, host, port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Bench broker listening on {host}:{self.port}")
+
+    async def stop(self):
+        for session in list(self._sessions):
+            session.writer.close()
+        self._server.close()
+        await self._server.wait_closed()
+
+    def subscribe(self, topic_filter, callback):
+        """Call `callback(topic, payload)` for every message published on matching topics."""
+        self._local.append((topic_filter, callback))
+
+    def publish(self, topic, payload, retain=False):
+        """Publish from in-process code; `payload` is bytes or str."""
+        if isinstance(payload, str):
+            payload = payload.encode()
+        self.published += 1
+        if retain:
+            self._retained[topic] = payload
+        packet = None
+        for session in self._sessions:
+            if any(topic_matches(topic_filter, topic) for topic_filter in session.filters):
+                packet = packet or publish_packet(topic, payload)
+                session.writer.write(packet)
+        for topic_filter, callback in self._local:
+            if topic_matches(topic_filter, topic):
+                callback(topic, payload)
+
+    async def _serve(self, reader, writer):
+        session = _Session(writer)
+        self._sessions.add(session)
+        try:
+            while True:
+                header = await reader.readexactly(1)
+                length, multiplier = 0, 1
+                while True:
+                    byte = (await reader.readexactly(1))[0]
+                    length += (byte & 0x7F) * multiplier
+                    multiplier *= 128
+                    if not byte & 0x80:
+                        break
+                body = await reader.readexactly(length)
+                if not self._handle(session, header[0] >> 4, header[0] & 0x0F, body):
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._sessions.discard(session)
+            writer.close()
+
+    def _handle(self, session, packet_type, flags, body):
+        """Handle one packet; returns False when the client disconnects."""
+        if packet_type == CONNECT:
+            session.writer.write(_packet(CONNACK, 0, b"\x00\x00"))
+        elif packet_type == PUBLISH:
+            qos, retain = (flags >> 1) & 0x03, bool(flags & 0x01)
+            topic, offset = _string(body, 0)
+            if qos:
+                packet_id = body[offset:offset + 2]
+                offset += 2
+                session.writer.write(_packet(PUBACK, 0, packet_id))
+            self.publish(topic, body[offset:], retain)
+        elif packet_type == SUBSCRIBE:
+            packet_id, offset, granted = body[:2], 2, bytearray()
+            while offset < len(body):
+                topic_filter, offset = _string(body, offset)
+                offset += 1  # Requested QoS; everything is delivered at QoS 0
+                session.filters.add(topic_filter)
+                granted.append(0)
+                for topic, payload in self._retained.items():
+                    if topic_matches(topic_filter, topic):
+                        session.writer.write(publish_packet(topic, payload, retain=True))
+            session.writer.write(_packet(SUBACK, 0, packet_id + bytes(granted)))
+        elif packet_type == UNSUBSCRIBE:
+            offset = 2
+            while offset < len(body):
+                topic_filter, offset = _string(body, offset)
+                session.filters.discard(topic_filter)
+            session.writer.write(_packet(UNSUBACK, 0, body[:2]))
+        elif packet_type == PINGREQ:
+            session.writer.write(_packet(PINGRESP, 0, b""))
+        elif packet_type == DISCONNECT:
+            return False
+        return True
@@ -0,0 +1,189 @@
+"""
+End-to-end latency and throughput of the hub agent.
+
+Starts the bench broker, fake zigbee2mqtt and stub backend, then the real
+agent (agent.main) pointed at them, and measures:
+
+- latency from a sensor publishing a state to the automation's MQTT command
+  reaching the valve: a probe rule turns a valve on when the probe sensor's
+  soil moisture drops below 30, and each probe publishes a dry reading after
+  a wet one. Measured idle, then under each load rate;
+- throughput: sensor states are published at each --rates rate for
+  --duration seconds, while --rules more rules are evaluated on every
+  message. Forwarded is the rate at which device_state_update frames reach
+  the backend, lag how long after the last publish the last one arrived.
+
+Everything runs in this process, the agent's MQTT thread included, so the
+numbers are a lower bound for the agent on its own. Nothing is written to
+data/automations.json.
+
+Run from hub_agent/:
+    python -m bench.e2e --rates 250 1000 2000 --duration 5
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import time
+from bench.backend import StubBackend
+from bench.broker import Broker
+from bench.zigbee2mqtt import FakeZigbee2Mqtt
+
+PROBE_TIMEOUT = 2.0
+
+
+def bench_automations(probe_sensor, probe_valve, sensors, rules):
+    """The probe rule, plus `rules` rules on the other sensors that are evaluated but never fire."""
+    automations = [{
+        "id": "bench-probe",
+        "name": "bench probe",
+        "enabled": True,
+        "triggers": [{
+            "type": "state", "device_id": probe_sensor["ieee_address"],
+            "entity": "soil_moisture", "operator": "<", "value": 30,
+        }],
+        "conditions": [],
+        "actions": [{"type": "device_action", "device_id": probe_valve["friendly_name"], "entity": "state", "value": "ON"}],
+    }]
+    for index in range(rules):
+        sensor = sensors[index % len(sensors)]
+        automations.append({
+            "id": f"bench-rule-{index}",
+            "name": f"bench rule {index}",
+            "enabled": True,
+            "triggers": [{
+                "type": "state", "device_id": sensor["ieee_address"],
+                "entity": "soil_moisture", "operator": "<", "value": 0,
+            }],
+            "conditions": [{
+                "type": "state", "device_id": sensor["ieee_address"],
+                "entity": "battery", "operator": ">", "value": 10,
+            }],
+            "actions": [{"type": "device_action", "device_id": probe_valve["friendly_name"], "entity": "state", "value": "OFF"}],
+        })
+    return automations
+
+
+async def probe(z2m, sensor, valve):
+    """One sensor-to-command round trip in seconds, or None if no command came."""
+    z2m.publish_state(sensor["friendly_name"], {"soil_moisture": 60})
+    await asyncio.sleep(0.005)
+    command = z2m.next_command(valve["friendly_name"])
+    published = z2m.publish_state(sensor["friendly_name"], {"soil_moisture": 10})
+    try:
+        return await asyncio.wait_for(command, PROBE_TIMEOUT) - published
+    except asyncio.TimeoutError:
+        return None
+
+
+async def probe_until(z2m, sensor, valve, interval, done):
+    latencies, missed = [], 0
+    while not done():
+        latency = await probe(z2m, sensor, valve)
+        if latency is None:
+            missed += 1
+        else:
+            latencies.append(latency)
+        await asyncio.sleep(interval)
+    return latencies, missed
+
+
+def _latency_columns(latencies):
+    if not latencies:
+        return f"{'-':>8} {'-':>8} {'-':>8}"
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))]
+    return f"{statistics.median(ordered) * 1000:8.2f} {p99 * 1000:8.2f} {ordered[-1] * 1000:8.2f}"
+
+
+async def run(args):
+    broker = Broker()
+    await broker.start()
+    z2m = FakeZigbee2Mqtt(broker, sensors=args.sensors, seed=args.seed)
+    probe_sensor, load_sensors, probe_valve = z2m.sensors[0], z2m.sensors[1:], z2m.valves[0]
+    backend = StubBackend(bench_automations(probe_sensor, probe_valve, load_sensors, args.rules))
+    await backend.start()
+    z2m.start()
+
+    # The agent reads its configuration on import
+    os.environ.update({
+        "MQTT_BROKER": "127.0.0.1", "MQTT_PORT": str(broker.port),
+        "SERVER_URL": backend.url, "WS_URL": backend.ws_url, "CHIP_ID": "bench-hub",
+    })
+    import agent
+    import automation_engine
+    import mqtt_handler
+
+    logging.getLogger().setLevel(args.log_level)
+    logging.getLogger("HubAgent").setLevel(args.log_level)
+    data_dir = tempfile.mkdtemp(prefix="hub-bench-")
+    automation_engine.DATA_DIR = data_dir
+    automation_engine.AUTOMATIONS_FILE = os.path.join(data_dir, "automations.json")
+
+    agent_task = asyncio.create_task(agent.main())
+    try:
+        await asyncio.wait_for(asyncio.gather(backend.discovered.wait(), backend.automations_served.wait()), 15)
+        await asyncio.sleep(0.5)
+
+        print(f"{'load msg/s':>10} {'published':>10} {'forwarded/s':>12} {'lag ms':>8} "
+              f"{'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'probes':>7} {'missed':>7}")
+
+        latencies, missed = [], 0
+        for _ in range(args.probes):
+            latency = await probe(z2m, probe_sensor, probe_valve)
+            if latency is None:
+                missed += 1
+            else:
+                latencies.append(latency)
+            await asyncio.sleep(args.probe_interval)
+        print(f"{'idle':>10} {'':>10} {'':>12} {'':>8} {_latency_columns(latencies)} {len(latencies):7d} {missed:7d}")
+
+        for rate in args.rates:
+            forwarded_before, published_before = backend.frames["device_state_update"], z2m.states_published
+            start = time.perf_counter()
+            load = asyncio.create_task(z2m.publish_load(rate, args.duration, load_sensors))
+            latencies, missed = await probe_until(z2m, probe_sensor, probe_valve, args.probe_interval, load.done)
+            published = await load
+            published_end = time.perf_counter()
+
+            # Wait for the agent to forward everything published (load, probes and valve echoes)
+            expected = z2m.states_published - published_before
+            deadline = published_end + args.drain_timeout
+            while backend.frames["device_state_update"] - forwarded_before < expected and time.perf_counter() < deadline:
+                await asyncio.sleep(0.01)
+            forwarded = backend.frames["device_state_update"] - forwarded_before
+            last = backend.last_frame_at or published_end
+            lag_ms = max(0.0, last - published_end) * 1000
+            lost = f" ({expected - forwarded} not forwarded)" if forwarded < expected else ""
+            print(f"{rate:10.0f} {published:10d} {forwarded / (last - start):12.1f} {lag_ms:8.1f} "
+                  f"{_latency_columns(latencies)} {len(latencies):7d} {missed:7d}{lost}")
+    finally:
+        agent_task.cancel()
+        if mqtt_handler._mqtt_client_ref:
+            mqtt_handler._mqtt_client_ref.disconnect()
+            mqtt_handler._mqtt_client_ref.loop_stop()
+        await backend.stop()
+        await broker.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rates", type=float, nargs="+", default=[250, 1000, 2000], help="sensor messages per second")
+    parser.add_argument("--duration", type=float, default=5, help="seconds per load rate")
+    parser.add_argument("--sensors", type=int, default=50, help="sensors publishing (one is the probe)")
+    parser.add_argument("--rules", type=int, default=20, help="automations evaluated besides the probe rule")
+    parser.add_argument("--probes", type=int, default=100, help="idle latency probes")
+    parser.add_argument("--probe-interval", type=float, default=0.05, help="seconds between probes")
+    parser.add_argument("--drain-timeout", type=float, default=10, help="seconds to wait for the agent to catch up")
+    parser.add_argument("--seed", type=int, default=1, help="seed for the published states")
+    parser.add_argument("--log-level", default="WARNING", help="agent log level")
+    args = parser.parse_args()
+    if args.sensors < 2:
+        parser.error("--sensors must be at least 2")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Replay a recorded MQTT log through the automation engine on virtual time.
+
+Messages go through the agent's own MQTT handling (bridge/devices discovery,
+friendly name resolution, state merging) into an AutomationEngine running on
+a clock.VirtualClock. Time triggers are checked at every second they can
+match, and delay actions wait for recorded time to pass, so a season of data
+replays in seconds. Prints every command the rules would have published, with
+its virtual time.
+
+The log has one message per line, either JSON:
+    {"timestamp": "2026-05-01T06:00:00", "topic": "zigbee2mqtt/Soil 1", "payload": {"soil_moisture": 28}}
+(timestamp as ISO 8601 or Unix seconds, payload as JSON or a string), or
+the output of
+    mosquitto_sub -t 'zigbee2mqtt/#' -F '%U %t %p'
+Include zigbee2mqtt/bridge/devices so friendly names resolve to devices.
+
+Run from hub_agent/:
+    python -m bench.replay mqtt.log --automations data/automations.json
+"""
+import argparse
+import asyncio
+import bisect
+import itertools
+import json
+import logging
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+import mqtt_handler
+from automation_engine import AutomationEngine
+from clock import VirtualClock
+
+Message = namedtuple("Message", "topic payload")
+
+
+def parse_timestamp(value):
+    """Naive local time, like datetime.now(), from Unix seconds or ISO 8601."""
+    if isinstance(value, (int, float)) or (isinstance(value, str) and value.replace(".", "", 1).isdigit()):
+        return datetime.fromtimestamp(float(value))
+    parsed = datetime.fromisoformat(value)
+    return parsed.astimezone().replace(tzinfo=None) if parsed.tzinfo else parsed
+
+
+def read_log(lines):
+    """(time, topic, payload bytes) per message, in time order."""
+    messages = []
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            if line.startswith("{"):
+                record = json.loads(line)
+                payload = record["payload"]
+                if not isinstance(payload, str):
+                    payload = json.dumps(payload)
+                messages.append((parse_timestamp(record["timestamp"]), record["topic"], payload.encode()))
+            else:
+                timestamp, topic, payload = line.split(" ", 2)
+                messages.append((parse_timestamp(timestamp), topic, payload.encode()))
+        except (KeyError, ValueError) as e:
+            raise ValueError(f"Line {number}: {e}") from e
+    messages.sort(key=lambda message: message[0])
+    return messages
+
+
+def time_trigger_seconds(engine, rules):
+    """Sorted seconds of the day at which any time or time_pattern trigger matches."""
+    seconds = set()
+    for rule in rules:
+        for trigger in rule.get("triggers", []):
+            if trigger.get("type") == "time" and trigger.get("at"):
+                at = datetime.strptime(trigger["at"], "%H:%M:%S")
+                seconds.add(at.hour * 3600 + at.minute * 60 + at.second)
+            elif trigger.get("type") == "time_pattern":
+                parts = [
+                    [value for value in range(limit) if engine._match_time_part(trigger.get(name), value)]
+                    for name, limit in (("hours", 24), ("minutes", 60), ("seconds", 60))
+                ]
+                seconds.update(h * 3600 + m * 60 + s for h, m, s in itertools.product(*parts))
+    return sorted(seconds)
+
+
+def time_trigger_times(schedule, after, until):
+    """Datetimes in (after, until] whose second of the day is in `schedule`."""
+    day = datetime.combine(after.date(), datetime.min.time())
+    while schedule and day <= until:
+        start = bisect.bisect_right(schedule, (after - day).total_seconds()) if day <= after else 0
+        for second in schedule[start:]:
+            when = day + timedelta(seconds=second)
+            if when > until:
+                return
+            yield when
+        day += timedelta(days=1)
+
+
+class RecordingMqttClient:
+    """Takes the engine's publishes and records them with the virtual time."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.published = []
+
+    def publish(self, topic, payload):
+        self.published.append((self.clock.now(), topic, payload))
+
+
+async def replay(messages, rules, until=None):
+    clock = VirtualClock(messages[0][0])
+    engine = AutomationEngine(clock=clock)
+    client = RecordingMqttClient(clock)
+    engine.set_mqtt_client(client)
+    engine.set_event_loop(asyncio.get_running_loop(), monitor_time_triggers=False)
+    engine.load(rules, save=False)
+    mqtt_handler.set_automation_engine(engine)
+    schedule = time_trigger_seconds(engine, engine.rules)
+
+    async def run_until(when):
+        for tick in time_trigger_times(schedule, clock.now(), when):
+            await clock.advance_to(tick)
+            engine._check_time_triggers(tick)
+            await clock.settle()
+        await clock.advance_to(when)
+
+    for when, topic, payload in messages:
+        await run_until(when)
+        running = len(engine._running_automations)
+        mqtt_handler.on_message(None, None, Message(topic, payload))
+        if len(engine._running_automations) != running:
+            await clock.settle()
+
+    # Let delayed actions finish, then run on to --until
+    while clock.next_wakeup() is not None and (until is None or clock.next_wakeup() <= until):
+        await run_until(clock.next_wakeup())
+    if until is not None:
+        await run_until(until)
+    return client.published, clock.now()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("log", help="recorded MQTT log ('-' for stdin)")
+    parser.add_argument("--automations", default="data/automations.json", help="rules to replay (the agent's cached rules by default)")
+    parser.add_argument("--until", type=parse_timestamp, help="keep time running after the last message until this time")
+    parser.add_argument("--format", choices=("text", "jsonl"), default="text", help="output format of the fired commands")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("HubAgent").setLevel(logging.WARNING)
+
+    with open(args.automations) as f:
+        rules = json.load(f)
+    if args.log == "-":
+        messages = read_log(sys.stdin)
+    else:
+        with open(args.log) as f:
+            messages = read_log(f)
+    if not messages:
+        parser.error("the log has no messages")
+
+    started = time.perf_counter()
+    published, ended = asyncio.run(replay(messages, rules, args.until))
+    wall = time.perf_counter() - started
+
+    for when, topic, payload in published:
+        if args.format == "jsonl":
+            print(json.dumps({"timestamp": when.isoformat(), "topic": topic, "payload": json.loads(payload)}))
+        else:
+            print(f"{when:%Y-%m-%d %H:%M:%S}  {topic}  {payload}")
+
+    span = (ended - messages[0][0]).total_seconds()
+    print(
+        f"{len(messages)} messages over {timedelta(seconds=round(span))} replayed in {wall:.2f}s "
+        f"({span / wall:,.0f}x real time), {len(published)} command(s)",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Fake zigbee2mqtt bridge for the bench broker.
+
+Publishes the device list (retained on bridge/devices, and on
+bridge/response/devices when the agent asks for it), publishes device state
+on request or at a steady rate, and records every /set command. Like the real
+bridge, it answers a command by publishing the device's new state.
+"""
+import asyncio
+import json
+import random
+import time
+
+PREFIX = "zigbee2mqtt"
+
+SENSOR_DEFINITION = {
+    "model": "SOIL-1",
+    "vendor": "Bench",
+    "description": "Soil sensor",
+    "exposes": [
+        {"type": "numeric", "name": "soil_moisture", "property": "soil_moisture", "access": 1, "unit": "%"},
+        {"type": "numeric", "name": "temperature", "property": "temperature", "access": 1, "unit": "°C"},
+        {"type": "numeric", "name": "battery", "property": "battery", "access": 1, "unit": "%"},
+    ],
+}
+VALVE_DEFINITION = {
+    "model": "VALVE-1",
+    "vendor": "Bench",
+    "description": "Water valve",
+    "exposes": [
+        {"type": "binary", "name": "state", "property": "state", "access": 7, "value_on": "ON", "value_off": "OFF"},
+    ],
+}
+
+
+class FakeZigbee2Mqtt:
+    def __init__(self, broker, sensors=50, valves=5, seed=1):
+        self.broker = broker
+        self.sensors = [self._device(f"sensor-{index:03d}", 0x1000 + index, SENSOR_DEFINITION) for index in range(sensors)]
+        self.valves = [self._device(f"valve-{index:03d}", 0x2000 + index, VALVE_DEFINITION) for index in range(valves)]
+        self.commands = []  # (perf_counter time, friendly_name, command)
+        self.states_published = 0
+        self._rng = random.Random(seed)
+        self._waiters = {}  # friendly_name -> future of the next command's time
+
+    @staticmethod
+    def _device(friendly_name, number, definition):
+        return {
+            "ieee_address": f"0x{number:016x}",
+            "friendly_name": friendly_name,
+            "type": "EndDevice",
+            "definition": definition,
+        }
+
+    @property
+    def devices(self):
+        coordinator = {"ieee_address": "0x0000000000000000", "friendly_name": "Coordinator", "type": "Coordinator"}
+        return [coordinator, *self.sensors, *self.valves]
+
+    def start(self):
+        self.broker.publish(f"{PREFIX}/bridge/devices", json.dumps(self.devices), retain=True)
+        self.broker.subscribe(f"{PREFIX}/bridge/request/devices", self._on_devices_request)
+        self.broker.subscribe(f"{PREFIX}/+/set", self._on_set)
+
+    def _on_devices_request(self, topic, payload):
+        self.broker.publish(f"{PREFIX}/bridge/response/devices", json.dumps({"data": self.devices, "status": "ok"}))
+
+    def _on_set(self, topic, payload):
+        received = time.perf_counter()
+        friendly_name = topic.split("/")[1]
+        command = json.loads(payload)
+        self.commands.append((received, friendly_name, command))
+        waiter = self._waiters.pop(friendly_name, None)
+        if waiter and not waiter.done():
+            waiter.set_result(received)
+        self.publish_state(friendly_name, command)
+
+    def publish_state(self, friendly_name, state):
+        """Publish a device state; returns the time it was handed to the broker."""
+        published = time.perf_counter()
+        self.broker.publish(f"{PREFIX}/{friendly_name}", json.dumps(state))
+        self.states_published += 1
+        return published
+
+    def next_command(self, friendly_name):
+        """Future resolved with the time the next /set command for `friendly_name` arrives."""
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[friendly_name] = waiter
+        return waiter
+
+    def random_sensor_state(self):
+        return {
+            "soil_moisture": self._rng.randint(40, 90),
+            "temperature": round(self._rng.uniform(5, 35), 1),
+            "battery": self._rng.randint(20, 100),
+        }
+
+    async def publish_load(self, rate, duration, sensors=None, tick=0.01):
+        """
+        Publish sensor states at `rate` messages per second for `duration`
+        seconds, spread over `sensors` (default: all). Messages due in a tick
+        are sent together, so rates above the timer resolution hold. Returns
+        the number published.
+        """
+        sensors = sensors or self.sensors
+        total = int(duration * rate)
+        start = time.perf_counter()
+        sent = 0
+        while sent < total:
+            due = min(int((time.perf_counter() - start) * rate) + 1, total) - sent
+            for _ in range(due):
+                self.publish_state(self._rng.choice(sensors)["friendly_name"], self.random_sensor_state())
+            sent += due
+            await asyncio.sleep(tick)
+        return sent
@@ -0,0 +1,62 @@
+import asyncio
+import heapq
+import itertools
+from datetime import datetime, timedelta
+
+
+class SystemClock:
+    """Wall-clock time and real sleeps; what the agent runs on."""
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(seconds)
+
+
+class VirtualClock:
+    """
+    Time that only moves when advanced, for replaying recorded data.
+
+    sleep() waits until advance_to() moves past its deadline, so an hour-long
+    `delay` action takes no real time. Sleepers wake in deadline order, each
+    seeing now() equal to its deadline, and get to run before time moves on.
+    """
+
+    # Event loop iterations given to woken tasks before time moves on
+    SETTLE_ROUNDS = 10
+
+    def __init__(self, start: datetime):
+        self._now = start
+        self._sleepers = []  # heap of (deadline, sequence, future)
+        self._sequence = itertools.count()
+
+    def now(self) -> datetime:
+        return self._now
+
+    async def sleep(self, seconds: float):
+        if seconds <= 0:
+            await asyncio.sleep(0)
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._sleepers, (self._now + timedelta(seconds=seconds), next(self._sequence), future))
+        await future
+
+    def next_wakeup(self):
+        """Deadline of the earliest sleeper, or None."""
+        return self._sleepers[0][0] if self._sleepers else None
+
+    async def settle(self):
+        """Let tasks that are ready (e.g. just woken or scheduled) run."""
+        for _ in range(self.SETTLE_ROUNDS):
+            await asyncio.sleep(0)
+
+    async def advance_to(self, when: datetime):
+        """Move time forward to `when`, waking every sleeper due by then."""
+        while self._sleepers and self._sleepers[0][0] <= when:
+            deadline, _, future = heapq.heappop(self._sleepers)
+            self._now = max(self._now, deadline)
+            if not future.done():
+                future.set_result(None)
+                await self.settle()
+        self._now = max(self._now, when)
@@ -16,6 +16,8 @@ MQTT_PORT = int(os.getenv("MQTT_PORT", 1883))
 MQTT_USERNAME = os.getenv("MQTT_USERNAME")
 MQTT_PASSWORD = os.getenv("MQTT_PASSWORD")
 CHIP_ID = os.getenv("CHIP_ID", "hub-" + str(int(time.time())))
+# Seconds between heartbeats; keep well below the backend's HUB_OFFLINE_AFTER_SECONDS (120)
+HEARTBEAT_INTERVAL = float(os.getenv("HEARTBEAT_INTERVAL", 30))
 
 
 class AgentState(Enum):
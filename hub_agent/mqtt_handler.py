@@ -1,5 +1,7 @@
 import asyncio
+import hashlib
 import json
+import threading
 import paho.mqtt.client as mqtt
 from config import logger, MQTT_BROKER, MQTT_PORT, MQTT_USERNAME, MQTT_PASSWORD
 
@@ -10,6 +12,24 @@ _event_loop = None
 _automation_engine = None
 _mqtt_client_ref = None
 
+# State batching: while the backend applies backpressure, state updates are
+# merged per device and forwarded once per window instead of per MQTT message.
+_batch_window = 0.0  # seconds
+_pending_states = {}
+_pending_lock = threading.Lock()
+_flush_scheduled = False
+
+# Device definitions (exposes) are sent once: for hashes the backend has
+# acknowledged, discovery only carries the hash.
+_known_definitions = set()
+_last_discovery = []
+
+
+def definition_hash(vendor, model, exposes):
+    """sha256 of the canonical JSON of (vendor, model, exposes); must match the backend."""
+    canonical = json.dumps([vendor, model, exposes], sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
 
 def set_event_loop(loop):
     """Set the asyncio event loop for scheduling coroutines from MQTT threads."""
@@ -29,6 +49,64 @@ def set_automation_engine(engine):
     _automation_engine = engine
 
 
+def set_batch_window(window_ms):
+    """Set the state batching window requested by the backend (0 disables batching)."""
+    global _batch_window
+    _batch_window = max(0, window_ms) / 1000.0
+    logger.info(f"State batching window set to {window_ms}ms")
+
+
+def set_known_definitions(hashes, replace=False):
+    """Record definition hashes the backend has stored (replace=True on a new connection)."""
+    if replace:
+        _known_definitions.clear()
+    _known_definitions.update(hashes)
+
+
+def resend_definitions(hashes):
+    """The backend lost or never got these definitions: send the last discovery again with them in full."""
+    _known_definitions.difference_update(hashes)
+    if _last_discovery:
+        _send_discovery()
+
+
+def _send_discovery():
+    """Forward the last device list, leaving out exposes the backend already has."""
+    backend_devices = []
+    for device in _last_discovery:
+        if device["definition_hash"] in _known_definitions:
+            device = {k: v for k, v in device.items() if k != "exposes"}
+        backend_devices.append(device)
+    _schedule_ws_send("device_discovery", backend_devices)
+
+
+def _queue_state_update(ieee, state):
+    """Forward a state update now, or merge it into the current batch."""
+    global _flush_scheduled
+    if _batch_window <= 0 or not _event_loop:
+        _schedule_ws_send("device_state_update", {"ieee_address": ieee, "state": state})
+        return
+
+    with _pending_lock:
+        _pending_states.setdefault(ieee, {}).update(state)
+        if _flush_scheduled:
+            return
+        _flush_scheduled = True
+
+    _event_loop.call_soon_threadsafe(_event_loop.call_later, _batch_window, _flush_pending_states)
+
+
+def _flush_pending_states():
+    """Send the merged state of every device updated during the batch window."""
+    global _pending_states, _flush_scheduled
+    with _pending_lock:
+        batch, _pending_states = _pending_states, {}
+        _flush_scheduled = False
+
+    for ieee, state in batch.items():
+        _schedule_ws_send("device_state_update", {"ieee_address": ieee, "state": state})
+
+
 def _schedule_ws_send(msg_type, payload):
     """Schedule an async WS send from the MQTT thread."""
     if _ws_send_callback and _event_loop:
@@ -63,7 +141,7 @@ def on_message(client, userdata, msg):
 
 def _handle_device_discovery(payload):
     """Process device list from zigbee2mqtt bridge."""
-    global device_map
+    global device_map, _last_discovery
     parsed = json.loads(payload)
     
     # Handle both direct list and response wrapper format
@@ -77,13 +155,16 @@ def _handle_device_discovery(payload):
     for d in devices:
         if d.get("type") == "Coordinator":
             continue
+        definition = d.get("definition") or {}
+        model, vendor, exposes = definition.get("model"), definition.get("vendor"), definition.get("exposes", [])
         backend_devices.append({
             "ieee_address": d.get("ieee_address"),
             "friendly_name": d.get("friendly_name"),
-            "model": d.get("definition", {}).get("model"),
-            "vendor": d.get("definition", {}).get("vendor"),
-            "description": d.get("definition", {}).get("description"),
-            "exposes": d.get("definition", {}).get("exposes", [])
+            "model": model,
+            "vendor": vendor,
+            "description": definition.get("description"),
+            "definition_hash": definition_hash(vendor, model, exposes),
+            "exposes": exposes
         })
 
     # Cache friendly_name → ieee_address mapping
@@ -94,7 +175,8 @@ def _handle_device_discovery(payload):
         if fname and ieee:
             device_map[fname] = ieee
 
-    _schedule_ws_send("device_discovery", backend_devices)
+    _last_discovery = backend_devices
+    _send_discovery()
 
 
 def _handle_device_state(topic, payload):
@@ -120,8 +202,7 @@ def _handle_device_state(topic, payload):
         return
 
     # Forward state to backend
-    msg = {"ieee_address": ieee, "state": state_payload}
-    _schedule_ws_send("device_state_update", msg)
+    _queue_state_update(ieee, state_payload)
 
     # Evaluate automations (engine handles MQTT publishing internally)
     if _automation_engine:
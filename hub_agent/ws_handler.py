@@ -1,6 +1,7 @@
+import asyncio
 import json
 import aiohttp
-from config import logger, WS_URL
+from config import logger, WS_URL, HEARTBEAT_INTERVAL
 
 
 async def send_ws_message(ws, msg_type, payload):
@@ -10,13 +11,22 @@ async def send_ws_message(ws, msg_type, payload):
         await ws.send_json(msg)
 
 
+async def _heartbeat_loop(ws):
+    """Keep the hub marked online while it is connected, even when no device reports."""
+    try:
+        while not ws.closed:
+            await send_ws_message(ws, "heartbeat", {})
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+    except (ConnectionResetError, aiohttp.ClientError):
+        pass  # ws_loop sees the connection drop and returns
+
+
 async def ws_loop(hub_id, access_token, mqtt_client, automation_engine=None):
     """
     Connect to the backend WebSocket and handle incoming messages.
     Runs until the connection drops, then returns so the caller can reconnect.
     """
     from mqtt_handler import set_ws_send_callback, set_event_loop
-    import asyncio
 
     loop = asyncio.get_running_loop()
     set_event_loop(loop)
@@ -39,25 +49,28 @@ async def ws_loop(hub_id, access_token, mqtt_client, automation_engine=None):
 
             set_ws_send_callback(_ws_send)
 
-            # Send initial heartbeat
-            await send_ws_message(ws, "heartbeat", {})
+            # Heartbeats, starting with one right away
+            heartbeat = asyncio.create_task(_heartbeat_loop(ws))
 
-            # Fetch automations on connect
-            if automation_engine:
-                await _fetch_automations(hub_id, access_token, automation_engine)
+            try:
+                # Fetch automations on connect
+                if automation_engine:
+                    await _fetch_automations(hub_id, access_token, automation_engine)
 
-            async for msg in ws:
-                if msg.type == aiohttp.WSMsgType.TEXT:
-                    data = json.loads(msg.data)
-                    logger.info(f"Received WS message: {data}")
-                    await _handle_ws_message(data, mqtt_client, automation_engine)
+                async for msg in ws:
+                    if msg.type == aiohttp.WSMsgType.TEXT:
+                        data = json.loads(msg.data)
+                        logger.info(f"Received WS message: {data}")
+                        await _handle_ws_message(data, mqtt_client, automation_engine)
 
-                elif msg.type == aiohttp.WSMsgType.CLOSED:
-                    logger.warning("WebSocket Closed")
-                    break
-                elif msg.type == aiohttp.WSMsgType.ERROR:
-                    logger.error("WebSocket Error")
-                    break
+                    elif msg.type == aiohttp.WSMsgType.CLOSED:
+                        logger.warning("WebSocket Closed")
+                        break
+                    elif msg.type == aiohttp.WSMsgType.ERROR:
+                        logger.error("WebSocket Error")
+                        break
+            finally:
+                heartbeat.cancel()
 
 
 async def _handle_ws_message(data, mqtt_client, automation_engine):
@@ -74,6 +87,20 @@ async def _handle_ws_message(data, mqtt_client, automation_engine):
             automation_engine.load(payload)
             logger.info(f"Automations synced: {len(payload)} rules loaded")
 
+    elif msg_type == "ingest_backpressure":
+        # Batching window for state updates: sent on connect, then widened while the backend throttles us
+        from mqtt_handler import set_batch_window
+        set_batch_window(payload.get("batch_window_ms", 0))
+
+    elif msg_type == "definitions_known":
+        # Definitions the backend has stored; discovery sends only their hashes
+        from mqtt_handler import set_known_definitions
+        set_known_definitions(payload.get("hashes", []), replace=payload.get("replace", False))
+
+    elif msg_type == "definition_request":
+        from mqtt_handler import resend_definitions
+        resend_definitions(payload.get("hashes", []))
+
     else:
         logger.debug(f"Unhandled WS message type: {msg_type}")
 